@@ -2,35 +2,125 @@ import bcrypt
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import mysql.connector
+from mysql.connector import errorcode
 from dotenv import load_dotenv
 import os
 import hashlib
+import csv
+import io
 from werkzeug.exceptions import HTTPException
 from datetime import datetime, date as PyDate
+from db_pool import ConnectionPool
+from pagination import InvalidPageRequest, parse_limit, encode_cursor, decode_cursor, keyset_condition
+from reports import REPORTS, read_report, refresh_reports
+from data_access import fetch_children, iter_chunks
+from reply_tree import (load_reply_page, reply_position, ancestors, descendant_count, child_path,
+                        MAX_DEPTH as MAX_REPLY_DEPTH)
+from cache import QueryCache, make_backend
+from conditional import ConditionalGet, bump_versions, PRIVATE_REVALIDATE
+from fast_json import make_json_provider
+from compression import init_compression
+from thread_ranking import HOT_SCORE_SQL
+from search import SEARCH_SOURCES, search
+from search_index import IndexLoader, indexed_search
 
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)
 
+app.json = make_json_provider(
+    app,
+    os.getenv('JSON_PROVIDER', 'orjson'),
+    datetime_format=os.getenv('JSON_DATETIME_FORMAT', 'http'),
+)
+if os.getenv('COMPRESS_RESPONSES', 'true').lower() in ('1', 'true', 'yes'):
+    init_compression(
+        app,
+        min_size=int(os.getenv('COMPRESS_MIN_SIZE', 1024)),
+        gzip_level=int(os.getenv('COMPRESS_GZIP_LEVEL', 6)),
+        brotli_quality=int(os.getenv('COMPRESS_BROTLI_QUALITY', 4)),
+    )
+
+DB_CONFIG = {
+    'host': 'db',
+    'user': 'root',
+    'password': 'helloworld',
+    'database': 'app_db',
+}
+
+# Pool settings can be tuned per deployment without touching the code
+db_pool = ConnectionPool(
+    lambda: mysql.connector.connect(**DB_CONFIG),
+    pool_size=int(os.getenv('DB_POOL_SIZE', 10)),
+    max_overflow=int(os.getenv('DB_POOL_MAX_OVERFLOW', 10)),
+    timeout=float(os.getenv('DB_POOL_TIMEOUT', 30)),
+    recycle=int(os.getenv('DB_POOL_RECYCLE', 3600)),
+    pre_ping=os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+)
+
+# Cached read routes and the tags that invalidate them are described in cache.py
+query_cache = QueryCache(
+    make_backend(
+        os.getenv('CACHE_BACKEND', 'local'),
+        redis_url=os.getenv('CACHE_REDIS_URL'),
+        max_entries=int(os.getenv('CACHE_MAX_ENTRIES', 1024)),
+    ),
+    ttl=int(os.getenv('CACHE_TTL', 300)),
+)
+
+# ETags for the read routes; resource names match the query cache's tags
+validators = ConditionalGet(lambda: get_db_connection())
+
+# /search uses the MySQL FULLTEXT indexes unless SEARCH_BACKEND=index. The
+# in-process index (search_index.py) also answers when those indexes are missing.
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'fulltext')
+# The index is opened on first use, so workers started before it was first saved still find it
+search_indexes = IndexLoader(os.getenv('SEARCH_INDEX_PATH'))
+
 def get_db_connection():
+    """
+    Check out a pooled connection. Calling close() on it returns it to the pool.
+    Returns None if no connection could be obtained.
+    """
     try:
-        db_host = 'db'
-        db_username = 'root'
-        db_password = 'helloworld'
-        db_name = 'app_db'
-
-        conn = mysql.connector.connect(
-            host=db_host,
-            user=db_username,
-            password=db_password,
-            database=db_name
-        )
-        return conn
+        return db_pool.connect()
     except mysql.connector.Error as err:
         print(f"Error connecting to database: {err}")
         return None
 
+def format_course(course_data):
+    """Course row with lecturer_firstname/lecturer_lastname -> course payload with lecturerName"""
+    lecturer_name = None
+    if course_data['lecturer_firstname'] and course_data['lecturer_lastname']:
+        lecturer_name = f"{course_data['lecturer_firstname']} {course_data['lecturer_lastname']}"
+    elif course_data['lecturer_firstname']:
+        lecturer_name = course_data['lecturer_firstname']  # Fallback if only firstname
+    return {
+        "coursecode": course_data['coursecode'],
+        "coursename": course_data['coursename'],
+        "lecturerName": lecturer_name
+    }
+
+def format_student_assignment(row):
+    """Assignment row joined with the student's submission and grade -> assignment payload"""
+    submission_details = None
+    if row['submissionid']:
+        submission_details = {
+            'submissionid': row['submissionid'],
+            'submissioncontent': row['submissioncontent'],
+            'uploaddate': row['submission_uploaddate'].isoformat() if row['submission_uploaddate'] else None,
+            'score': row['score']
+        }
+    return {
+        'coursecode': row['coursecode'],
+        'coursename': row['coursename'],
+        'assignmentid': row['assignmentid'],
+        'content': row['assignment_content'],
+        'duedate': row['assignment_duedate'].isoformat() if row['assignment_duedate'] else None,
+        'submission': submission_details
+    }
+
 # Global error handler for unhandled exceptions
 @app.errorhandler(Exception)
 def handle_unexpected_error(error):
@@ -50,6 +140,14 @@ def health_check():
     except Exception as e:
         return jsonify({'error': 'Unexpected error during health check.'}), 500
 
+@app.route('/health/pool', methods=['GET'])
+def pool_stats():
+    return jsonify({'pool': db_pool.stats()}), 200
+
+@app.route('/health/cache', methods=['GET'])
+def cache_stats():
+    return jsonify({'cache': query_cache.stats()}), 200
+
 @app.route('/register', methods=['POST'])
 def register_user():
     try:
@@ -168,7 +266,10 @@ def create_course():
             insert_query = "INSERT INTO Course (CourseCode, CourseName, LecturerID, AdminID) VALUES (%s, %s, %s, %s)"
             cursor.execute(insert_query, (course_code, course_name, lecturer_id, admin_id))
 
+            resources = ['catalog', f'course:{course_code}'] + ([f'lecturer:{lecturer_id}'] if lecturer_id else [])
+            bump_versions(cursor, *resources)
             conn.commit()
+            query_cache.invalidate(*resources)
             return jsonify({'message': 'Course created successfully', 'courseCode': course_code}), 201
 
         except mysql.connector.Error as err:
@@ -182,6 +283,8 @@ def create_course():
         return jsonify({'error': 'Unexpected error during course creation.'}), 500
 
 @app.route('/courses', methods=['GET'])
+@validators.conditional('catalog')
+@query_cache.cached('catalog')
 def get_courses():
     try:
         conn = get_db_connection()
@@ -201,20 +304,7 @@ def get_courses():
             cursor.execute(query)
             courses_raw = cursor.fetchall()
             
-            # Combine firstname and lastname for lecturerName
-            courses = []
-            for course_data in courses_raw:
-                lecturer_name = None
-                if course_data['lecturer_firstname'] and course_data['lecturer_lastname']:
-                    lecturer_name = f"{course_data['lecturer_firstname']} {course_data['lecturer_lastname']}"
-                elif course_data['lecturer_firstname']:
-                    lecturer_name = course_data['lecturer_firstname'] # Fallback if only firstname
-                
-                courses.append({
-                    "coursecode": course_data['coursecode'],
-                    "coursename": course_data['coursename'],
-                    "lecturerName": lecturer_name
-                })
+            courses = [format_course(course_data) for course_data in courses_raw]
 
             return jsonify({'courses': courses}), 200
 
@@ -228,6 +318,8 @@ def get_courses():
         return jsonify({'error': 'Unexpected error during course retrieval.'}), 500
 
 @app.route('/courses/student/<int:student_id>', methods=['GET'])
+@validators.conditional('student:{student_id}', 'lecturers', cache_control=PRIVATE_REVALIDATE)
+@query_cache.cached('student:{student_id}', 'lecturers')
 def get_student_courses(student_id):
     try:
         conn = get_db_connection()
@@ -247,19 +339,7 @@ def get_student_courses(student_id):
             cursor.execute(query, (student_id,))
             courses_raw = cursor.fetchall()
 
-            courses = []
-            for course_data in courses_raw:
-                lecturer_name = None
-                if course_data['lecturer_firstname'] and course_data['lecturer_lastname']:
-                    lecturer_name = f"{course_data['lecturer_firstname']} {course_data['lecturer_lastname']}"
-                elif course_data['lecturer_firstname']:
-                    lecturer_name = course_data['lecturer_firstname']
-                
-                courses.append({
-                    "coursecode": course_data['coursecode'],
-                    "coursename": course_data['coursename'],
-                    "lecturerName": lecturer_name
-                })
+            courses = [format_course(course_data) for course_data in courses_raw]
 
             return jsonify({'studentCourses': courses}), 200
 
@@ -273,6 +353,8 @@ def get_student_courses(student_id):
         return jsonify({'error': 'Unexpected error during student course retrieval.'}), 500
 
 @app.route('/courses/lecturer/<int:lecturer_id>', methods=['GET'])
+@validators.conditional('lecturer:{lecturer_id}', cache_control=PRIVATE_REVALIDATE)
+@query_cache.cached('lecturer:{lecturer_id}')
 def get_lecturer_courses(lecturer_id):
     try:
         conn = get_db_connection()
@@ -292,21 +374,9 @@ def get_lecturer_courses(lecturer_id):
             cursor.execute(query, (lecturer_id,))
             courses_raw = cursor.fetchall()
 
-            courses = []
             # For courses taught by this lecturer, the lecturerName will be their own name.
             # This might seem redundant for a lecturer viewing their own courses, but it keeps the data structure consistent.
-            for course_data in courses_raw:
-                lecturer_name = None
-                if course_data['lecturer_firstname'] and course_data['lecturer_lastname']:
-                    lecturer_name = f"{course_data['lecturer_firstname']} {course_data['lecturer_lastname']}"
-                elif course_data['lecturer_firstname']:
-                    lecturer_name = course_data['lecturer_firstname']
-                
-                courses.append({
-                    "coursecode": course_data['coursecode'],
-                    "coursename": course_data['coursename'],
-                    "lecturerName": lecturer_name 
-                })
+            courses = [format_course(course_data) for course_data in courses_raw]
 
             return jsonify({'lecturerCourses': courses}), 200
 
@@ -348,7 +418,11 @@ def assign_lecturer():
                 return jsonify({'error': 'Course already has an assigned lecturer'}), 409
 
             cursor.execute("UPDATE Course SET lecturerid = %s WHERE coursecode = %s", (lecturer_id, course_code))
+            # The lecturer's name shows up in the catalogue and in enrolled students' course lists
+            resources = ['catalog', 'lecturers', f'lecturer:{lecturer_id}', f'course:{course_code}']
+            bump_versions(cursor, *resources)
             conn.commit()
+            query_cache.invalidate(*resources)
             return jsonify({'message': 'Lecturer successfully assigned'}), 200
 
         except mysql.connector.Error as err:
@@ -390,7 +464,10 @@ def register_student():
                 return jsonify({'error': 'Student has reached the maximum enrollment limit'}), 403
 
             cursor.execute("INSERT INTO Enrol (UserID, CourseCode) VALUES (%s, %s)", (student_id, course_code))
+            resources = [f'student:{student_id}', f'course:{course_code}']
+            bump_versions(cursor, *resources)
             conn.commit()
+            query_cache.invalidate(*resources)
             return jsonify({'message': 'Student registered successfully'}), 201
 
         except mysql.connector.Error as err:
@@ -404,6 +481,8 @@ def register_student():
         return jsonify({'error': 'Unexpected error during student registration.'}), 500
 
 @app.route('/course_members/<string:course_code>', methods=['GET'])
+@validators.conditional('course:{course_code}', cache_control=PRIVATE_REVALIDATE)
+@query_cache.cached('course:{course_code}')
 def get_course_members(course_code):
     try:
         conn = get_db_connection()
@@ -433,6 +512,7 @@ def get_course_members(course_code):
         return jsonify({'error': 'Unexpected error during course member retrieval.'}), 500
 
 @app.route('/calendar_events/course/<string:course_code>', methods=['GET'])
+@validators.conditional('calendar:{course_code}')
 def get_calendar_events_for_course(course_code):
     try:
         conn = get_db_connection()
@@ -498,14 +578,18 @@ def get_calendar_events_for_course(course_code):
             print(f"Unexpected error in get_calendar_events_for_course: {e}")
             return jsonify({'error': 'An internal error occurred while fetching calendar events.'}), 500
         finally:
-            if conn and conn.is_connected():
-                cursor.close()
-                conn.close()
+            if conn:
+                try:
+                    cursor.close()
+                except mysql.connector.Error:
+                    pass
+                conn.close()  # the pool discards it if the server has gone away
     except Exception as e:
         print(f"Outer error in get_calendar_events_for_course: {e}")
         return jsonify({'error': 'Unexpected error during calendar event retrieval.'}), 500
 
 @app.route('/calendar_events/student', methods=['GET'])
+@validators.conditional('student:{studentId}', 'calendar', cache_control=PRIVATE_REVALIDATE)
 def get_calendar_events_for_student():
     try:
         student_id = request.args.get('studentId')
@@ -579,6 +663,8 @@ def create_calendar_event():
                 INSERT INTO CalendarEvents (coursecode, eventname, eventdate, createdby)
                 VALUES (%s, %s, %s, %s)
             """, (course_code, event_name, event_date, created_by))
+            # 'calendar' covers the student calendars, which span every enrolled course
+            bump_versions(cursor, f'calendar:{course_code}', 'calendar')
             conn.commit()
 
             return jsonify({'message': 'Calendar event created successfully'}), 201
@@ -593,6 +679,7 @@ def create_calendar_event():
         return jsonify({'error': 'Unexpected error during calendar event creation.'}), 500
 
 @app.route('/forums/<string:course_code>', methods=['GET'])
+@validators.conditional('forums:{course_code}')
 def get_forums(course_code):
     try:
         conn = get_db_connection()
@@ -636,6 +723,7 @@ def create_forum():
                 return jsonify({'error': 'Course does not exist'}), 404
             
             cursor.execute("INSERT INTO DiscussionForum (coursecode, forumname) VALUES (%s, %s)", (course_code, forum_name))
+            bump_versions(cursor, f'forums:{course_code}', 'forums')
             conn.commit()
 
             return jsonify({'message': 'Forum created successfully'}), 201
@@ -651,6 +739,7 @@ def create_forum():
         return jsonify({'error': 'Unexpected error during forum creation.'}), 500
 
 @app.route('/forums/student/<int:student_id>', methods=['GET'])
+@validators.conditional('student:{student_id}', 'forums', cache_control=PRIVATE_REVALIDATE)
 def get_student_forums(student_id):
     try:
         conn = get_db_connection()
@@ -673,25 +762,19 @@ def get_student_forums(student_id):
             """, (student_id,))
             courses = cursor.fetchall()
 
-            student_forums_data = []
-            if courses: # Ensure courses is not None and not empty
-                for course in courses:
-                    course_code = course['coursecode']
-                    course_name = course['coursename']
-                    
-                    # Get forums for this course
-                    cursor.execute("""
-                        SELECT forumid, forumname 
-                        FROM DiscussionForum 
-                        WHERE coursecode = %s
-                    """, (course_code,))
-                    forums_for_course = cursor.fetchall()
-                    
-                    student_forums_data.append({
-                        "courseCode": course_code,
-                        "courseName": course_name,
-                        "forums": forums_for_course
-                    })
+            # One query for the forums of every enrolled course, grouped in memory
+            forums_by_course = fetch_children(cursor, """
+                SELECT coursecode, forumid, forumname
+                FROM DiscussionForum
+                WHERE coursecode IN ({ids})
+                ORDER BY forumid
+            """, [course['coursecode'] for course in courses], key='coursecode', drop_key=True)
+
+            student_forums_data = [{
+                "courseCode": course['coursecode'],
+                "courseName": course['coursename'],
+                "forums": forums_by_course.get(course['coursecode'], [])
+            } for course in courses]
 
             return jsonify({'studentId': student_id, 'courses_forums': student_forums_data}), 200
 
@@ -700,49 +783,104 @@ def get_student_forums(student_id):
             print(f"Database error in get_student_forums for student {student_id}: {err}")
             return jsonify({'error': f'Failed to retrieve student forums: {str(err)}'}), 500
         finally:
-            if conn and conn.is_connected(): # Check if conn was successfully established and is still connected
-                cursor.close()
-                conn.close()
+            if conn:
+                try:
+                    cursor.close()
+                except mysql.connector.Error:
+                    pass
+                conn.close()  # the pool discards it if the server has gone away
     except Exception as e:
         # Log the exception e for debugging
         print(f"Unexpected error in get_student_forums for student {student_id}: {e}")
         return jsonify({'error': 'Unexpected error during student forum retrieval.'}), 500
 
+# ORDER BY keys for each thread listing; each ends in threadid so the key is unique
+THREAD_SORT_KEYS = {
+    'new': ('t.createdat', 't.threadid'),
+    'top': ('t.votes', 't.createdat', 't.threadid'),
+    'hot': ('t.hotscore', 't.threadid'),
+}
+
 @app.route('/threads/<int:forum_id>', methods=['GET'])
+@validators.conditional('forum:{forum_id}')
 def get_threads(forum_id):
-    sort = request.args.get('sort', 'new')  # 'new' or 'top'
+    """
+    Lists a forum's threads, newest first (sort=new), by votes (sort=top) or by
+    the stored hot score, which weighs votes and replies against age (sort=hot).
+
+    Optional query parameters:
+        limit:   page size; the response then includes a nextCursor
+        cursor:  nextCursor from the previous page
+        preview: return only the first N characters of each thread's content
+    Without limit or cursor every thread in the forum is returned.
+    """
+    sort = request.args.get('sort', 'new')  # 'new', 'top' or 'hot'
+    if sort not in THREAD_SORT_KEYS:
+        sort = 'new'
+    sort_columns = THREAD_SORT_KEYS[sort]
     try:
+        raw_limit = request.args.get('limit')
+        raw_cursor = request.args.get('cursor')
+        preview = request.args.get('preview', type=int)
+        try:
+            paginate = raw_limit is not None or raw_cursor is not None
+            limit = parse_limit(raw_limit) if paginate else None
+            after = decode_cursor(raw_cursor, f'threads:{sort}', len(sort_columns)) if raw_cursor else None
+        except InvalidPageRequest as err:
+            return jsonify({'error': str(err)}), 400
+        if preview is not None and preview < 1:
+            return jsonify({'error': 'preview must be a positive number of characters'}), 400
+
         conn = get_db_connection()
         if not conn:
             return jsonify({'error': 'Database connection failed'}), 500
 
         cursor = conn.cursor(dictionary=True)
         try:
-            if sort == 'top':
-                cursor.execute("""
-                    SELECT t.threadid, t.threadtitle, t.content, t.createdby, t.createdat, t.updatedat,
-                        u.firstname, u.lastname, COALESCE(SUM(v.vote), 0) AS votes
-                    FROM DiscussionThread t
-                    LEFT JOIN ThreadVote v ON t.threadid = v.threadid
-                    LEFT JOIN User u ON t.createdby = u.userid
-                    WHERE t.forumid = %s
-                    GROUP BY t.threadid
-                    ORDER BY votes DESC, t.createdat DESC
-                """, (forum_id,))
+            params = []
+            if preview:
+                # Fetch one extra character so we can tell whether the body was cut short
+                content_column = "LEFT(t.content, %s) AS content"
+                params.append(preview + 1)
             else:
-                cursor.execute("""
-                    SELECT t.threadid, t.threadtitle, t.content, t.createdby, t.createdat, t.updatedat,
-                        u.firstname, u.lastname, COALESCE(SUM(v.vote), 0) AS votes
-                    FROM DiscussionThread t
-                    LEFT JOIN ThreadVote v ON t.threadid = v.threadid
-                    LEFT JOIN User u ON t.createdby = u.userid
-                    WHERE t.forumid = %s
-                    GROUP BY t.threadid
-                    ORDER BY t.createdat DESC
-                """, (forum_id,))
+                content_column = "t.content"
+
+            query = f"""
+                SELECT t.threadid, t.threadtitle, {content_column}, t.createdby, t.createdat, t.updatedat,
+                    u.firstname, u.lastname, t.votes, t.replycount, t.hotscore
+                FROM DiscussionThread t
+                LEFT JOIN User u ON t.createdby = u.userid
+                WHERE t.forumid = %s
+            """
+            params.append(forum_id)
+            if after:
+                condition, condition_params = keyset_condition(sort_columns, after)
+                query += f" AND {condition}"
+                params.extend(condition_params)
+            query += " ORDER BY " + ", ".join(f"{column} DESC" for column in sort_columns)
+            if limit:
+                query += " LIMIT %s"
+                params.append(limit + 1)
+
+            cursor.execute(query, tuple(params))
             threads = cursor.fetchall()
 
-            return jsonify({'forumId': forum_id, 'threads': threads}), 200
+            next_cursor = None
+            if limit and len(threads) > limit:
+                threads = threads[:limit]
+                last = threads[-1]
+                next_cursor = encode_cursor(
+                    f'threads:{sort}', [last[column.split('.')[1]] for column in sort_columns]
+                )
+
+            if preview:
+                for thread in threads:
+                    content = thread['content']
+                    thread['contentTruncated'] = content is not None and len(content) > preview
+                    if thread['contentTruncated']:
+                        thread['content'] = content[:preview]
+
+            return jsonify({'forumId': forum_id, 'threads': threads, 'nextCursor': next_cursor}), 200
 
         except mysql.connector.Error as err:
             return jsonify({'error': f'Failed to retrieve discussion threads: {str(err)}'}), 500
@@ -753,11 +891,99 @@ def get_threads(forum_id):
     except Exception as e:
         return jsonify({'error': 'Unexpected error during thread retrieval.'}), 500
 
+@app.route('/search', methods=['GET'])
+def search_content():
+    """
+    Full-text search over threads, replies, course names and course content,
+    most relevant first (see search.py).
+
+    Query parameters:
+        q:         the words to search for (required)
+        types:     comma-separated subset of thread, reply, course, content (default: all)
+        course:    only return results from this course
+        studentId: only return results from the courses this student is enrolled in
+        limit:     page size (default 20)
+        cursor:    nextCursor from the previous page
+    Each result has a type, a score and a snippet with the matched words in <mark>.
+    The in-process index (see search_index.py) does not cover course names.
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Missing search query (q)'}), 400
+    raw_types = request.args.get('types')
+    kinds = [kind.strip() for kind in raw_types.split(',')] if raw_types else list(SEARCH_SOURCES)
+    unknown = [kind for kind in kinds if kind not in SEARCH_SOURCES]
+    if unknown:
+        return jsonify({'error': f"Unknown search types: {', '.join(unknown)}"}), 400
+    course_code = request.args.get('course')
+    student_id = request.args.get('studentId')
+    if student_id is not None and not student_id.isdigit():
+        return jsonify({'error': 'studentId must be a number'}), 400
+
+    try:
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            raw_cursor = request.args.get('cursor')
+            after = decode_cursor(raw_cursor, 'search', 3) if raw_cursor else None
+        except InvalidPageRequest as err:
+            return jsonify({'error': str(err)}), 400
+
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({'error': 'Database connection failed'}), 500
+
+        cursor = conn.cursor(dictionary=True)
+        try:
+            arguments = dict(course_code=course_code, student_id=int(student_id) if student_id else None,
+                             limit=limit, after=after)
+            search_index = search_indexes.get()
+            use_index = search_index is not None and SEARCH_BACKEND == 'index'
+            if not use_index:
+                try:
+                    results, next_key = search(cursor, query, kinds, **arguments)
+                except mysql.connector.Error as err:
+                    if search_index is None or err.errno != errorcode.ER_FT_MATCHING_KEY_NOT_FOUND:
+                        raise
+                    print("FULLTEXT indexes missing; answering /search from the in-process index")
+                    use_index = True
+            if use_index:
+                results, next_key = indexed_search(search_index, cursor, query, kinds, **arguments)
+            return jsonify({
+                'query': query,
+                'engine': 'index' if use_index else 'fulltext',
+                'results': results,
+                'nextCursor': encode_cursor('search', next_key) if next_key else None,
+            }), 200
+
+        except InvalidPageRequest as err:
+            return jsonify({'error': str(err)}), 400
+
+        except mysql.connector.Error as err:
+            return jsonify({'error': f'Search failed: {str(err)}'}), 500
+
+        finally:
+            cursor.close()
+            conn.close()
+    except Exception as e:
+        print(f"Unexpected error in search_content: {e}")
+        return jsonify({'error': 'Unexpected error during search.'}), 500
+
 @app.route('/thread/<int:thread_id>/replies', methods=['GET'])
+@validators.conditional('thread:{thread_id}')
 def get_thread_replies(thread_id):
     """
-    Returns all replies for a thread as a nested tree, with vote counts.
+    Returns all replies for a thread as a nested tree, with their stored vote tallies.
+
+    Optional query parameters:
+        limit:  number of top-level replies per page; the response then includes a nextCursor
+        cursor: nextCursor from the previous page
+        depth:  levels of replies to include below each top-level reply (default 2)
+    With any of these, each reply also has a depth and a childCount, and replies
+    whose children were cut off by depth can be expanded with /reply/<id>/children.
+    Without them the whole tree is returned.
     """
+    if any(name in request.args for name in ('limit', 'cursor', 'depth')):
+        return get_reply_page(thread_id=thread_id)
     try:
         conn = get_db_connection()
         if not conn:
@@ -766,12 +992,10 @@ def get_thread_replies(thread_id):
         try:
             cursor.execute("""
                 SELECT r.replyid, r.parentreplyid, r.content, r.createdby, r.replydate,
-                    u.firstname, u.lastname, COALESCE(SUM(rv.vote), 0) AS votes
+                    u.firstname, u.lastname, r.votes
                 FROM Reply r
-                LEFT JOIN ReplyVote rv ON r.replyid = rv.replyid
                 LEFT JOIN User u ON r.createdby = u.userid
                 WHERE r.threadid = %s
-                GROUP BY r.replyid
                 ORDER BY r.replydate ASC
             """, (thread_id,))
             replies = cursor.fetchall()
@@ -798,9 +1022,10 @@ def get_thread_replies(thread_id):
         return jsonify({'error': 'Unexpected error during reply retrieval.'}), 500
 
 @app.route('/thread/<int:thread_id>/replies_flat', methods=['GET'])
+@validators.conditional('thread:{thread_id}')
 def get_thread_replies_flat(thread_id):
     """
-    Returns all replies for a thread as a flat list, with vote counts.
+    Returns all replies for a thread as a flat list, with their stored vote tallies.
     """
     try:
         conn = get_db_connection()
@@ -810,12 +1035,10 @@ def get_thread_replies_flat(thread_id):
         try:
             cursor.execute("""
                 SELECT r.replyid, r.parentreplyid, r.content, r.createdby, r.replydate,
-                    u.firstname, u.lastname, COALESCE(SUM(rv.vote), 0) AS votes
+                    u.firstname, u.lastname, r.votes
                 FROM Reply r
-                LEFT JOIN ReplyVote rv ON r.replyid = rv.replyid
                 LEFT JOIN User u ON r.createdby = u.userid
                 WHERE r.threadid = %s
-                GROUP BY r.replyid
                 ORDER BY r.replydate ASC
             """, (thread_id,))
             replies = cursor.fetchall()
@@ -828,6 +1051,97 @@ def get_thread_replies_flat(thread_id):
     except Exception as e:
         return jsonify({'error': 'Unexpected error during reply retrieval.'}), 500
 
+DEFAULT_REPLY_DEPTH = 2
+
+def get_reply_page(thread_id=None, reply_id=None):
+    """
+    A page of replies with their subtrees: the top-level replies of a thread,
+    or the direct replies to reply_id. See get_thread_replies for parameters.
+    """
+    try:
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            raw_cursor = request.args.get('cursor')
+            after = decode_cursor(raw_cursor, 'replies', 2) if raw_cursor else None
+        except InvalidPageRequest as err:
+            return jsonify({'error': str(err)}), 400
+        depth = request.args.get('depth', DEFAULT_REPLY_DEPTH, type=int)
+        if depth < 0 or depth > MAX_REPLY_DEPTH:
+            return jsonify({'error': f'depth must be between 0 and {MAX_REPLY_DEPTH}'}), 400
+
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({'error': 'Database connection failed'}), 500
+        cursor = conn.cursor(dictionary=True)
+        try:
+            parent = None
+            if reply_id is not None:
+                parent = reply_position(cursor, reply_id)
+                if parent is None:
+                    return jsonify({'error': 'Reply not found'}), 404
+                thread_id = parent['threadid']
+
+            replies, next_key = load_reply_page(cursor, thread_id, parent, limit, after, depth)
+            next_cursor = encode_cursor('replies', next_key) if next_key else None
+
+            if reply_id is not None:
+                return jsonify({'replyId': reply_id, 'threadId': thread_id,
+                                'replies': replies, 'nextCursor': next_cursor}), 200
+            return jsonify({'threadId': thread_id, 'replies': replies, 'nextCursor': next_cursor}), 200
+
+        except mysql.connector.Error as err:
+            return jsonify({'error': f'Failed to retrieve replies: {str(err)}'}), 500
+        finally:
+            cursor.close()
+            conn.close()
+    except Exception as e:
+        return jsonify({'error': 'Unexpected error during reply retrieval.'}), 500
+
+@app.route('/reply/<int:reply_id>', methods=['GET'])
+def get_reply(reply_id):
+    """
+    A single reply with the chain of replies above it (top-level reply first)
+    and the number of replies anywhere below it, e.g. for linking to a reply
+    deep inside a long thread.
+    """
+    try:
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({'error': 'Database connection failed'}), 500
+        cursor = conn.cursor(dictionary=True)
+        try:
+            position = reply_position(cursor, reply_id)
+            if position is None:
+                return jsonify({'error': 'Reply not found'}), 404
+
+            chain = ancestors(cursor, position, include_self=True)
+            reply = chain.pop()
+            for row in chain + [reply]:
+                del row['path']
+            return jsonify({
+                'threadId': position['threadid'],
+                'reply': reply,
+                'ancestors': chain,
+                'descendantCount': descendant_count(cursor, position),
+            }), 200
+
+        except mysql.connector.Error as err:
+            return jsonify({'error': f'Failed to retrieve reply: {str(err)}'}), 500
+        finally:
+            cursor.close()
+            conn.close()
+    except Exception as e:
+        return jsonify({'error': 'Unexpected error during reply retrieval.'}), 500
+
+@app.route('/reply/<int:reply_id>/children', methods=['GET'])
+def get_reply_children(reply_id):
+    """
+    Returns the direct replies to a reply, a page at a time, each with its own
+    replies nested up to `depth` levels. Takes the same limit, cursor and
+    depth parameters as /thread/<id>/replies.
+    """
+    return get_reply_page(reply_id=reply_id)
+
 @app.route('/vote/thread', methods=['POST'])
 def vote_thread():
     """
@@ -846,12 +1160,27 @@ def vote_thread():
             return jsonify({'error': 'Database connection failed'}), 500
         cursor = conn.cursor()
         try:
-            # Upsert vote
-            cursor.execute("""
-                INSERT INTO ThreadVote (threadid, userid, vote)
-                VALUES (%s, %s, %s)
-                ON DUPLICATE KEY UPDATE vote = %s
-            """, (thread_id, user_id, vote, vote))
+            # Lock the user's existing vote so the tally delta is computed against it
+            cursor.execute("SELECT vote FROM ThreadVote WHERE threadid = %s AND userid = %s FOR UPDATE",
+                           (thread_id, user_id))
+            previous = cursor.fetchone()
+            delta = vote - (previous[0] if previous else 0)
+
+            if delta:
+                # Upsert vote
+                cursor.execute("""
+                    INSERT INTO ThreadVote (threadid, userid, vote)
+                    VALUES (%s, %s, %s)
+                    ON DUPLICATE KEY UPDATE vote = %s
+                """, (thread_id, user_id, vote, vote))
+                # Keep the stored tally in step (+1/-1 for a new vote, +2/-2 for a flip),
+                # and the hot score with it. A vote does not edit the thread, so UpdatedAt stays
+                cursor.execute(f"UPDATE DiscussionThread SET votes = votes + %s, hotscore = {HOT_SCORE_SQL}, "
+                               "updatedat = updatedat WHERE threadid = %s", (delta, thread_id))
+                cursor.execute("SELECT forumid FROM DiscussionThread WHERE threadid = %s", (thread_id,))
+                thread = cursor.fetchone()
+                if thread:
+                    bump_versions(cursor, f'forum:{thread[0]}')
             conn.commit()
             return jsonify({'message': 'Vote recorded'}), 200
         except mysql.connector.Error as err:
@@ -881,12 +1210,26 @@ def vote_reply():
             return jsonify({'error': 'Database connection failed'}), 500
         cursor = conn.cursor()
         try:
-            # Upsert vote
-            cursor.execute("""
-                INSERT INTO ReplyVote (replyid, userid, vote)
-                VALUES (%s, %s, %s)
-                ON DUPLICATE KEY UPDATE vote = %s
-            """, (reply_id, user_id, vote, vote))
+            # Lock the user's existing vote so the tally delta is computed against it
+            cursor.execute("SELECT vote FROM ReplyVote WHERE replyid = %s AND userid = %s FOR UPDATE",
+                           (reply_id, user_id))
+            previous = cursor.fetchone()
+            delta = vote - (previous[0] if previous else 0)
+
+            if delta:
+                # Upsert vote
+                cursor.execute("""
+                    INSERT INTO ReplyVote (replyid, userid, vote)
+                    VALUES (%s, %s, %s)
+                    ON DUPLICATE KEY UPDATE vote = %s
+                """, (reply_id, user_id, vote, vote))
+                # Keep the stored tally in step (+1/-1 for a new vote, +2/-2 for a flip)
+                cursor.execute("UPDATE Reply SET votes = votes + %s WHERE replyid = %s",
+                               (delta, reply_id))
+                cursor.execute("SELECT threadid FROM Reply WHERE replyid = %s", (reply_id,))
+                reply = cursor.fetchone()
+                if reply:
+                    bump_versions(cursor, f'thread:{reply[0]}')
             conn.commit()
             return jsonify({'message': 'Vote recorded'}), 200
         except mysql.connector.Error as err:
@@ -899,6 +1242,8 @@ def vote_reply():
         return jsonify({'error': 'Unexpected error during voting.'}), 500
 
 @app.route('/course_content/<string:course_code>', methods=['GET'])
+@validators.conditional('content:{course_code}')
+@query_cache.cached('content:{course_code}')
 def get_course_content(course_code):
     try:
         conn = get_db_connection()
@@ -945,15 +1290,22 @@ def add_course_content():
 
         cursor = conn.cursor()
         try:
-            cursor.execute("SELECT sectionid FROM Section WHERE sectionid = %s", (section_id,))
-            if cursor.fetchone() is None:
+            cursor.execute("SELECT coursecode FROM Section WHERE sectionid = %s", (section_id,))
+            section = cursor.fetchone()
+            if section is None:
                 return jsonify({'error': 'Section does not exist'}), 404
             
             cursor.execute("""
                 INSERT INTO SectionItem (sectionid, itemtitle, link, filename, description)
                 VALUES (%s, %s, %s, %s, %s)
             """, (section_id, item_title, link, filename, description))
+            item_id = cursor.lastrowid
+            bump_versions(cursor, f'content:{section[0]}')
             conn.commit()
+            query_cache.invalidate(f'content:{section[0]}')
+            search_index = search_indexes.get()
+            if search_index is not None:
+                search_index.add('content', item_id, section[0], ' '.join(filter(None, (item_title, description))))
 
             return jsonify({'message': 'Course content added successfully'}), 201
 
@@ -1125,6 +1477,7 @@ def get_student_grades(student_id):
 
 @app.route('/assignments/student/<int:student_id>', methods=['GET'])
 def get_student_assignments_with_submissions(student_id):
+    conn = cursor = None
     try:
         conn = get_db_connection()
         if not conn:
@@ -1160,25 +1513,7 @@ def get_student_assignments_with_submissions(student_id):
         cursor.execute(query, (student_id,))
         results = cursor.fetchall()
 
-        assignments_with_submissions = []
-        for row in results:
-            submission_details = None
-            if row['submissionid']:
-                submission_details = {
-                    'submissionid': row['submissionid'],
-                    'submissioncontent': row['submissioncontent'],
-                    'uploaddate': row['submission_uploaddate'].isoformat() if row['submission_uploaddate'] else None,
-                    'score': row['score']
-                }
-            
-            assignments_with_submissions.append({
-                'coursecode': row['coursecode'],
-                'coursename': row['coursename'],
-                'assignmentid': row['assignmentid'],
-                'content': row['assignment_content'],
-                'duedate': row['assignment_duedate'].isoformat() if row['assignment_duedate'] else None,
-                'submission': submission_details
-            })
+        assignments_with_submissions = [format_student_assignment(row) for row in results]
 
         return jsonify({'student_assignments': assignments_with_submissions}), 200
 
@@ -1189,12 +1524,17 @@ def get_student_assignments_with_submissions(student_id):
         print(f"Error in get_student_assignments_with_submissions: {e}")
         return jsonify({'error': 'An unexpected error occurred while fetching student assignments.'}), 500
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        if conn:
+            if cursor:
+                try:
+                    cursor.close()
+                except mysql.connector.Error:
+                    pass
+            conn.close()  # the pool discards it if the server has gone away
 
 @app.route('/assignments/course/<string:course_code>/student/<int:student_id>', methods=['GET'])
 def get_course_assignments_for_student(course_code, student_id):
+    conn = cursor = None
     try:
         conn = get_db_connection()
         if not conn:
@@ -1257,13 +1597,204 @@ def get_course_assignments_for_student(course_code, student_id):
         print(f"Error in get_course_assignments_for_student: {e}")
         return jsonify({'error': 'An unexpected error occurred while fetching course assignments.'}), 500
     finally:
-        if conn and conn.is_connected():
+        if conn:
+            if cursor:
+                try:
+                    cursor.close()
+                except mysql.connector.Error:
+                    pass
+            conn.close()  # the pool discards it if the server has gone away
+
+# Sections of /dashboard/student/<id>, selectable with ?fields=
+DASHBOARD_SECTIONS = ('courses', 'assignments', 'calendar', 'forums', 'grades')
+
+@app.route('/dashboard/student/<int:student_id>', methods=['GET'])
+def get_student_dashboard(student_id):
+    """
+    Everything the student dashboard loads, in one request. The enrolled courses
+    are read once and every other section is fetched with an IN list over them.
+    Each section has the same shape as the route it replaces:
+
+        courses      /courses/student/<id>          (studentCourses)
+        assignments  /assignments/student/<id>      (student_assignments)
+        calendar     /calendar_events/student       (events)
+        forums       /forums/student/<id>           (courses_forums)
+        grades       /student/<id>/grades           (studentGrades)
+
+    ?fields=courses,calendar limits the response to the listed sections.
+    """
+    fields = request.args.get('fields')
+    if fields:
+        sections = {field.strip() for field in fields.split(',') if field.strip()}
+        unknown = sections.difference(DASHBOARD_SECTIONS)
+        if unknown:
+            return jsonify({'error': f"Unknown dashboard fields: {', '.join(sorted(unknown))}"}), 400
+    else:
+        sections = set(DASHBOARD_SECTIONS)
+
+    try:
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({'error': 'Database connection failed'}), 500
+
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("SELECT studentid FROM Student WHERE studentid = %s", (student_id,))
+            if cursor.fetchone() is None:
+                return jsonify({'error': 'Student not found'}), 404
+
+            # The enrolment set, read once for every section
+            cursor.execute("""
+                SELECT c.coursecode, c.coursename, u.FirstName as lecturer_firstname, u.LastName as lecturer_lastname
+                FROM Enrol e
+                JOIN Course c ON e.coursecode = c.coursecode
+                LEFT JOIN User u ON c.LecturerID = u.UserID
+                WHERE e.UserID = %s
+                ORDER BY c.coursecode
+            """, (student_id,))
+            courses = cursor.fetchall()
+            codes = [course['coursecode'] for course in courses]
+            course_names = {course['coursecode']: course['coursename'] for course in courses}
+
+            dashboard = {'studentId': student_id}
+            if 'courses' in sections:
+                dashboard['courses'] = [format_course(course) for course in courses]
+
+            if 'assignments' in sections or 'grades' in sections:
+                # Assignments and grades are two views of the same rows
+                assignments_by_course = fetch_children(cursor, """
+                    SELECT
+                        a.coursecode,
+                        a.assignmentid,
+                        a.content AS assignment_content,
+                        a.duedate AS assignment_duedate,
+                        s.submissionid,
+                        s.submissioncontent,
+                        s.uploaddate AS submission_uploaddate,
+                        g.score
+                    FROM Assignment a
+                    LEFT JOIN Submission s ON a.assignmentid = s.assignmentid AND s.studentid = %s
+                    LEFT JOIN Grade g ON s.submissionid = g.submissionid
+                    WHERE a.coursecode IN ({ids})
+                    ORDER BY a.coursecode, a.duedate
+                """, codes, key='coursecode', params=(student_id,))
+                rows = []
+                for code in codes:
+                    for row in assignments_by_course[code]:
+                        row['coursename'] = course_names[code]
+                        rows.append(row)
+
+                if 'assignments' in sections:
+                    dashboard['assignments'] = [format_student_assignment(row) for row in rows]
+                if 'grades' in sections:
+                    dashboard['grades'] = [{
+                        'coursecode': row['coursecode'],
+                        'coursename': row['coursename'],
+                        'assignmentid': row['assignmentid'],
+                        'assignmentcontent': row['assignment_content'],
+                        'assignmentduedate': row['assignment_duedate'],
+                        'submissionid': row['submissionid'],
+                        'submissioncontent': row['submissioncontent'],
+                        'submissiondate': row['submission_uploaddate'],
+                        'score': row['score']
+                    } for row in rows]
+
+            if 'calendar' in sections:
+                events_by_course = fetch_children(cursor, """
+                    SELECT CourseCode, EventName, EventDate
+                    FROM CalendarEvents
+                    WHERE CourseCode IN ({ids})
+                    ORDER BY EventDate
+                """, codes, key='CourseCode', drop_key=True)
+                dashboard['calendar'] = [
+                    dict(event, CourseName=course_names[code])
+                    for code in codes
+                    for event in events_by_course[code]
+                ]
+
+            if 'forums' in sections:
+                forums_by_course = fetch_children(cursor, """
+                    SELECT coursecode, forumid, forumname
+                    FROM DiscussionForum
+                    WHERE coursecode IN ({ids})
+                    ORDER BY forumid
+                """, codes, key='coursecode', drop_key=True)
+                dashboard['forums'] = [{
+                    "courseCode": code,
+                    "courseName": course_names[code],
+                    "forums": forums_by_course[code]
+                } for code in codes]
+
+            return jsonify(dashboard), 200
+
+        except mysql.connector.Error as err:
+            print(f"Database error in get_student_dashboard for student {student_id}: {err}")
+            return jsonify({'error': f'Failed to retrieve student dashboard: {str(err)}'}), 500
+        finally:
             cursor.close()
             conn.close()
+    except Exception as e:
+        print(f"Unexpected error in get_student_dashboard for student {student_id}: {e}")
+        return jsonify({'error': 'Unexpected error during student dashboard retrieval.'}), 500
+
+# Every submission (or a row with no submission) for each assignment in a lecturer's courses.
+# Missing due dates and student ids are replaced in the ORDER BY so the sort key can be paged
+# through with keyset_condition; NULLs already sorted first, so the order is unchanged.
+GRADEBOOK_QUERY = """
+    SELECT
+        c.coursecode,
+        c.coursename,
+        a.assignmentid,
+        a.content AS assignmentcontent,
+        a.duedate AS assignmentduedate,
+        s.submissionid,
+        s.studentid,
+        u.firstname AS studentfirstname,
+        u.lastname AS studentlastname,
+        s.submissioncontent,
+        s.uploaddate AS submissiondate,
+        g.score
+    FROM Course c
+    JOIN Assignment a ON c.coursecode = a.coursecode
+    LEFT JOIN Submission s ON a.assignmentid = s.assignmentid
+    LEFT JOIN User u ON s.studentid = u.userid
+    LEFT JOIN Grade g ON s.submissionid = g.submissionid
+    WHERE c.lecturerid = %s
+"""
+GRADEBOOK_SORT_KEY = ('c.coursecode', "COALESCE(a.duedate, CAST('1000-01-01' AS DATETIME))",
+                      'a.assignmentid', 'COALESCE(s.studentid, 0)')
+GRADEBOOK_ORDER_BY = " ORDER BY " + ", ".join(GRADEBOOK_SORT_KEY)
+GRADEBOOK_COLUMNS = ['coursecode', 'coursename', 'assignmentid', 'assignmentcontent', 'assignmentduedate',
+                     'submissionid', 'studentid', 'studentfirstname', 'studentlastname',
+                     'submissioncontent', 'submissiondate', 'score']
+GRADEBOOK_EXPORT_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+def gradebook_sort_values(row):
+    """The GRADEBOOK_SORT_KEY values of a gradebook row"""
+    return [row['coursecode'], row['assignmentduedate'] or datetime(1000, 1, 1),
+            row['assignmentid'], row['studentid'] or 0]
 
 @app.route('/lecturer/<int:lecturer_id>/course_grades', methods=['GET'])
 def get_lecturer_course_grades(lecturer_id):
+    """
+    Gradebook rows for every course the lecturer teaches.
+
+    Optional query parameters:
+        limit:  page size; the response then includes a nextCursor
+        cursor: nextCursor from the previous page
+    Without limit or cursor every row is returned. For complete gradebooks use
+    /lecturer/<id>/course_grades/export, which streams them.
+    """
     try:
+        raw_limit = request.args.get('limit')
+        raw_cursor = request.args.get('cursor')
+        try:
+            paginate = raw_limit is not None or raw_cursor is not None
+            limit = parse_limit(raw_limit, default=100, maximum=1000) if paginate else None
+            after = decode_cursor(raw_cursor, 'gradebook', len(GRADEBOOK_SORT_KEY)) if raw_cursor else None
+        except InvalidPageRequest as err:
+            return jsonify({'error': str(err)}), 400
+
         conn = get_db_connection()
         if not conn:
             return jsonify({'error': 'Database connection failed'}), 500
@@ -1274,31 +1805,26 @@ def get_lecturer_course_grades(lecturer_id):
             if cursor.fetchone() is None:
                 return jsonify({'error': 'Lecturer not found'}), 404
 
-            query = """
-                SELECT
-                    c.coursecode,
-                    c.coursename,
-                    a.assignmentid,
-                    a.content AS assignmentcontent,
-                    a.duedate AS assignmentduedate,
-                    s.submissionid,
-                    s.studentid,
-                    u.firstname AS studentfirstname,
-                    u.lastname AS studentlastname,
-                    s.submissioncontent,
-                    s.uploaddate AS submissiondate,
-                    g.score
-                FROM Course c
-                JOIN Assignment a ON c.coursecode = a.coursecode
-                LEFT JOIN Submission s ON a.assignmentid = s.assignmentid
-                LEFT JOIN User u ON s.studentid = u.userid
-                LEFT JOIN Grade g ON s.submissionid = g.submissionid
-                WHERE c.lecturerid = %s
-                ORDER BY c.coursecode, a.duedate, s.studentid;
-            """
-            cursor.execute(query, (lecturer_id,))
+            query = GRADEBOOK_QUERY
+            params = [lecturer_id]
+            if after:
+                condition, condition_params = keyset_condition(GRADEBOOK_SORT_KEY, after, descending=False)
+                query += f" AND {condition}"
+                params.extend(condition_params)
+            query += GRADEBOOK_ORDER_BY
+            if limit:
+                query += " LIMIT %s"
+                params.append(limit + 1)
+
+            cursor.execute(query, tuple(params))
             course_grades = cursor.fetchall()
-            return jsonify({'lecturerCourseGrades': course_grades}), 200
+
+            next_cursor = None
+            if limit and len(course_grades) > limit:
+                course_grades = course_grades[:limit]
+                next_cursor = encode_cursor('gradebook', gradebook_sort_values(course_grades[-1]))
+
+            return jsonify({'lecturerCourseGrades': course_grades, 'nextCursor': next_cursor}), 200
         except mysql.connector.Error as err:
             return jsonify({'error': f'Failed to retrieve lecturer course grades: {str(err)}'}), 500
         finally:
@@ -1307,6 +1833,78 @@ def get_lecturer_course_grades(lecturer_id):
     except Exception as e:
         return jsonify({'error': 'Unexpected error while fetching lecturer course grades.'}), 500
 
+def gradebook_ndjson(rows):
+    return "".join(f"{app.json.dumps(row)}\n" for row in rows)
+
+def gradebook_csv(rows, header=False):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(GRADEBOOK_COLUMNS)
+    writer.writerows([row[column] for column in GRADEBOOK_COLUMNS] for row in rows)
+    return buffer.getvalue()
+
+@app.route('/lecturer/<int:lecturer_id>/course_grades/export', methods=['GET'])
+def export_lecturer_course_grades(lecturer_id):
+    """
+    Streams a lecturer's whole gradebook as NDJSON (one row object per line,
+    the default) or CSV (?format=csv). Rows are read through an unbuffered
+    cursor and written out a chunk at a time, so memory use stays flat however
+    large the rosters are. If the database fails part way through, the
+    download ends early; the error is logged.
+    """
+    try:
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in GRADEBOOK_EXPORT_FORMATS:
+            return jsonify({'error': f"format must be one of: {', '.join(GRADEBOOK_EXPORT_FORMATS)}"}), 400
+
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({'error': 'Database connection failed'}), 500
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT lecturerid FROM Lecturer WHERE lecturerid = %s", (lecturer_id,))
+                lecturer = cursor.fetchone()
+            finally:
+                cursor.close()
+            if lecturer is None:
+                conn.close()
+                return jsonify({'error': 'Lecturer not found'}), 404
+        except mysql.connector.Error as err:
+            conn.close()
+            return jsonify({'error': f'Failed to export lecturer course grades: {str(err)}'}), 500
+
+        def generate():
+            # The connection is held until the last row has been sent (or the client disconnects)
+            cursor = conn.cursor(dictionary=True, buffered=False)
+            finished = False
+            try:
+                cursor.execute(GRADEBOOK_QUERY + GRADEBOOK_ORDER_BY, (lecturer_id,))
+                if export_format == 'csv':
+                    yield gradebook_csv([], header=True)
+                for rows in iter_chunks(cursor):
+                    yield gradebook_ndjson(rows) if export_format == 'ndjson' else gradebook_csv(rows)
+                finished = True
+            except mysql.connector.Error as err:
+                print(f"Gradebook export for lecturer {lecturer_id} failed: {err}")
+            finally:
+                try:
+                    cursor.close()
+                except mysql.connector.Error:
+                    pass  # rows left unread by an interrupted export
+                if finished:
+                    conn.close()
+                else:
+                    conn.invalidate()  # may still have unread rows; don't hand it to another request
+
+        extension = 'csv' if export_format == 'csv' else 'ndjson'
+        return app.response_class(generate(), mimetype=GRADEBOOK_EXPORT_FORMATS[export_format], headers={
+            'Content-Disposition': f'attachment; filename=lecturer-{lecturer_id}-grades.{extension}',
+        })
+    except Exception as e:
+        return jsonify({'error': 'Unexpected error while exporting lecturer course grades.'}), 500
+
 @app.route('/reports/popular_courses', methods=['GET'])
 def get_popular_courses():
     try:
@@ -1314,24 +1912,14 @@ def get_popular_courses():
         if not conn:
             return jsonify({'error': 'Database connection failed'}), 500
 
-        cursor = conn.cursor(dictionary=True)
         try:
-            cursor.execute("""
-                SELECT c.coursecode, c.coursename, count(e.UserID) AS student_count
-                FROM Course c
-                JOIN Enrol e ON c.coursecode = e.coursecode
-                GROUP BY c.coursecode
-                HAVING student_count >= 50
-            """)
-            courses = cursor.fetchall()
-
-            return jsonify({'popularCourses': courses}), 200
+            rows, refreshed_at = read_report(conn, 'popular_courses')
+            return jsonify({'popularCourses': rows, 'refreshedAt': refreshed_at}), 200
 
         except mysql.connector.Error as err:
             return jsonify({'error': f'Failed to retrieve popular courses: {str(err)}'}), 500
 
         finally:
-            cursor.close()
             conn.close()
     except Exception as e:
         return jsonify({'error': 'Unexpected error during popular courses report.'}), 500
@@ -1343,25 +1931,14 @@ def get_active_students():
         if not conn:
             return jsonify({'error': 'Database connection failed'}), 500
 
-        cursor = conn.cursor(dictionary=True)
         try:
-            cursor.execute("""
-                SELECT s.studentid, u.firstname, u.lastname, count(e.coursecode) AS course_count
-                FROM Student s
-                JOIN User u ON s.studentid = u.userid
-                JOIN Enrol e ON s.studentid = e.UserID
-                GROUP BY s.studentid
-                HAVING course_count >= 5
-            """)
-            students = cursor.fetchall()
-
-            return jsonify({'activeStudents': students}), 200
+            rows, refreshed_at = read_report(conn, 'active_students')
+            return jsonify({'activeStudents': rows, 'refreshedAt': refreshed_at}), 200
 
         except mysql.connector.Error as err:
             return jsonify({'error': f'Failed to retrieve active students: {str(err)}'}), 500
 
         finally:
-            cursor.close()
             conn.close()
     except Exception as e:
         return jsonify({'error': 'Unexpected error during active students report.'}), 500
@@ -1373,25 +1950,14 @@ def get_busy_lecturers():
         if not conn:
             return jsonify({'error': 'Database connection failed'}), 500
 
-        cursor = conn.cursor(dictionary=True)
         try:
-            cursor.execute("""
-                SELECT l.lecturerid, u.firstname, u.lastname, count(c.coursecode) AS course_count
-                FROM Lecturer l
-                JOIN User u ON l.lecturerid = u.userid
-                JOIN Course c ON l.lecturerid = c.lecturerid
-                GROUP BY l.lecturerid
-                HAVING course_count >= 3
-            """)
-            lecturers = cursor.fetchall()
-
-            return jsonify({'busyLecturers': lecturers}), 200
+            rows, refreshed_at = read_report(conn, 'busy_lecturers')
+            return jsonify({'busyLecturers': rows, 'refreshedAt': refreshed_at}), 200
 
         except mysql.connector.Error as err:
             return jsonify({'error': f'Failed to retrieve busy lecturers: {str(err)}'}), 500
 
         finally:
-            cursor.close()
             conn.close()
     except Exception as e:
         return jsonify({'error': 'Unexpected error during busy lecturers report.'}), 500
@@ -1403,25 +1969,14 @@ def get_top_courses():
         if not conn:
             return jsonify({'error': 'Database connection failed'}), 500
 
-        cursor = conn.cursor(dictionary=True)
         try:
-            cursor.execute("""
-                SELECT c.coursecode, c.coursename, count(e.userid) AS student_count
-                FROM Course c
-                JOIN Enrol e ON c.coursecode = e.coursecode
-                GROUP BY c.coursecode
-                ORDER BY student_count DESC
-                LIMIT 10
-            """)
-            courses = cursor.fetchall()
-
-            return jsonify({'topEnrolledCourses': courses}), 200
+            rows, refreshed_at = read_report(conn, 'top_courses')
+            return jsonify({'topEnrolledCourses': rows, 'refreshedAt': refreshed_at}), 200
 
         except mysql.connector.Error as err:
             return jsonify({'error': f'Failed to retrieve top enrolled courses: {str(err)}'}), 500
 
         finally:
-            cursor.close()
             conn.close()
     except Exception as e:
         return jsonify({'error': 'Unexpected error during top courses report.'}), 500
@@ -1433,31 +1988,63 @@ def get_top_students():
         if not conn:
             return jsonify({'error': 'Database connection failed'}), 500
 
-        cursor = conn.cursor(dictionary=True)
         try:
-            cursor.execute("""
-                SELECT s.studentid, u.firstname, u.lastname, avg(g.score) AS average_score
-                FROM Student s
-                JOIN User u ON s.studentid = u.userid
-                JOIN Submission sub ON s.studentid = sub.studentid
-                JOIN Grade g ON sub.submissionid = g.submissionid
-                GROUP BY s.studentid
-                ORDER BY average_score DESC
-                LIMIT 10
-            """)
-            students = cursor.fetchall()
-
-            return jsonify({'topStudents': students}), 200
+            rows, refreshed_at = read_report(conn, 'top_students')
+            return jsonify({'topStudents': rows, 'refreshedAt': refreshed_at}), 200
 
         except mysql.connector.Error as err:
             return jsonify({'error': f'Failed to retrieve top students: {str(err)}'}), 500
 
         finally:
-            cursor.close()
             conn.close()
     except Exception as e:
         return jsonify({'error': 'Unexpected error during top students report.'}), 500
 
+@app.route('/reports/refresh', methods=['POST'])
+def refresh_report_snapshots():
+    """
+    Rebuilds the report snapshots. Admin only.
+
+    Expected request body:
+    {
+        "adminId": int,
+        "reports": [string] (optional, defaults to every report)
+    }
+    """
+    try:
+        data = request.get_json()
+        admin_id = data.get('adminId')
+        report_names = data.get('reports') or list(REPORTS)
+
+        if not admin_id:
+            return jsonify({'error': 'Missing required fields'}), 400
+
+        unknown = [name for name in report_names if name not in REPORTS]
+        if unknown:
+            return jsonify({'error': f"Unknown reports: {', '.join(unknown)}"}), 400
+
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({'error': 'Database connection failed'}), 500
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT adminid FROM Admin WHERE adminid = %s", (admin_id,))
+            if cursor.fetchone() is None:
+                return jsonify({'error': 'Not an administrator'}), 403
+
+            refreshed = refresh_reports(conn, report_names)
+            return jsonify({'message': 'Reports refreshed', 'refreshedAt': refreshed}), 200
+
+        except mysql.connector.Error as err:
+            return jsonify({'error': f'Failed to refresh reports: {str(err)}'}), 500
+
+        finally:
+            cursor.close()
+            conn.close()
+    except Exception as e:
+        return jsonify({'error': 'Unexpected error during report refresh.'}), 500
+
 @app.route('/reply_thread', methods=['POST'])
 def reply_to_thread():
     """
@@ -1490,18 +2077,26 @@ def reply_to_thread():
         cursor = conn.cursor(dictionary=True)
         try:
             # Check if thread exists
-            cursor.execute("SELECT threadid FROM DiscussionThread WHERE threadid = %s", (thread_id,))
+            cursor.execute("""
+                SELECT t.threadid, t.forumid, f.coursecode
+                FROM DiscussionThread t
+                JOIN DiscussionForum f ON t.forumid = f.forumid
+                WHERE t.threadid = %s
+            """, (thread_id,))
             thread = cursor.fetchone()
             if not thread:
                 return jsonify({'error': 'Thread not found'}), 404
             
             # Check if parent reply exists (if provided)
+            parent_reply = None
             if parent_reply_id:
-                cursor.execute("SELECT replyid FROM Reply WHERE replyid = %s AND threadid = %s", 
+                cursor.execute("SELECT replyid, path, depth FROM Reply WHERE replyid = %s AND threadid = %s", 
                                (parent_reply_id, thread_id))
                 parent_reply = cursor.fetchone()
                 if not parent_reply:
                     return jsonify({'error': 'Parent reply not found or does not belong to this thread'}), 404
+                if parent_reply['depth'] >= MAX_REPLY_DEPTH:
+                    return jsonify({'error': f'Replies cannot be nested more than {MAX_REPLY_DEPTH} levels deep'}), 400
             
             # Check if User exists
             cursor.execute("SELECT userid FROM User WHERE userid = %s", (created_by,))
@@ -1515,9 +2110,23 @@ def reply_to_thread():
                 VALUES (%s, %s, %s, %s, NOW())
             """
             cursor.execute(insert_query, (thread_id, parent_reply_id, content, created_by))
-            conn.commit()
-            
             reply_id = cursor.lastrowid
+
+            # The path needs the new id, so it is filled in right after the insert
+            cursor.execute("UPDATE Reply SET path = %s, depth = %s WHERE replyid = %s", (
+                child_path(parent_reply['path'] if parent_reply else None, reply_id),
+                parent_reply['depth'] + 1 if parent_reply else 0,
+                reply_id,
+            ))
+            # A reply does not edit the thread itself, so UpdatedAt stays
+            cursor.execute(f"UPDATE DiscussionThread SET replycount = replycount + 1, hotscore = {HOT_SCORE_SQL}, "
+                           "updatedat = updatedat WHERE threadid = %s", (thread_id,))
+            # The forum's thread listing shows reply counts, so it changes too
+            bump_versions(cursor, f'thread:{thread_id}', f"forum:{thread['forumid']}")
+            conn.commit()
+            search_index = search_indexes.get()
+            if search_index is not None:
+                search_index.add('reply', reply_id, thread['coursecode'], content)
             
             return jsonify({
                 'message': 'Reply posted successfully',
@@ -0,0 +1,134 @@
+"""
+Backfill denormalized columns
+
+The API keeps a few derived values in stored columns so that read routes do not
+have to aggregate on every request. This script rebuilds them from the source
+tables, for example after a bulk import (insert.sql) or if they ever drift:
+
+- DiscussionThread.Votes / Reply.Votes from ThreadVote / ReplyVote
+- Reply.Path / Reply.Depth from ParentReplyID (see reply_tree.py)
+
+Work is done in primary-key ranges so that each transaction only locks a
+bounded number of rows.
+"""
+
+import time
+from dotenv import load_dotenv
+from sqlalchemy import text
+from models.database import engine
+
+load_dotenv()
+
+def backfill_in_ranges(table, id_column, statement, batch_size=10000):
+    """
+    Run `statement` (which must take :lo and :hi bind parameters) once per
+    id range of `table`, committing after each range.
+    """
+    with engine.connect() as connection:
+        bounds = connection.execute(text(f"SELECT MIN({id_column}), MAX({id_column}) FROM {table}")).one()
+    low, high = bounds
+    if low is None:
+        print(f"{table}: nothing to backfill")
+        return 0
+
+    updated = 0
+    start_time = time.time()
+    for lo in range(low, high + 1, batch_size):
+        hi = lo + batch_size - 1
+        with engine.begin() as connection:
+            result = connection.execute(text(statement), {'lo': lo, 'hi': hi})
+            updated += result.rowcount
+    print(f"{table}: updated {updated} rows in {time.time() - start_time:.1f}s")
+    return updated
+
+def backfill_vote_tallies(batch_size=10000):
+    """Recompute the stored vote tallies on threads and replies"""
+    backfill_in_ranges('DiscussionThread', 'ThreadID', """
+        UPDATE DiscussionThread t
+        LEFT JOIN (
+            SELECT ThreadID, SUM(Vote) AS total
+            FROM ThreadVote
+            WHERE ThreadID BETWEEN :lo AND :hi
+            GROUP BY ThreadID
+        ) v ON t.ThreadID = v.ThreadID
+        SET t.Votes = COALESCE(v.total, 0), t.UpdatedAt = t.UpdatedAt
+        WHERE t.ThreadID BETWEEN :lo AND :hi
+    """, batch_size)
+    backfill_in_ranges('Reply', 'ReplyID', """
+        UPDATE Reply r
+        LEFT JOIN (
+            SELECT ReplyID, SUM(Vote) AS total
+            FROM ReplyVote
+            WHERE ReplyID BETWEEN :lo AND :hi
+            GROUP BY ReplyID
+        ) v ON r.ReplyID = v.ReplyID
+        SET r.Votes = COALESCE(v.total, 0)
+        WHERE r.ReplyID BETWEEN :lo AND :hi
+    """, batch_size)
+    return True
+
+def backfill_reply_paths(batch_size=10000):
+    """
+    Rebuild every reply's materialized path and depth by walking the reply
+    trees from their top-level replies. Batches are ranges of ThreadID, so
+    each tree is rebuilt whole in one transaction.
+    """
+    backfill_in_ranges('DiscussionThread', 'ThreadID', """
+        UPDATE Reply r
+        JOIN (
+            WITH RECURSIVE tree (ReplyID, Path, Depth) AS (
+                SELECT ReplyID, CAST(LPAD(HEX(ReplyID), 8, '0') AS CHAR(1024) CHARACTER SET ascii), 0
+                FROM Reply
+                WHERE ParentReplyID IS NULL AND ThreadID BETWEEN :lo AND :hi
+                UNION ALL
+                SELECT child.ReplyID, CONCAT(tree.Path, LPAD(HEX(child.ReplyID), 8, '0')), tree.Depth + 1
+                FROM Reply child
+                JOIN tree ON child.ParentReplyID = tree.ReplyID
+            )
+            SELECT ReplyID, Path, Depth FROM tree
+        ) t ON r.ReplyID = t.ReplyID
+        SET r.Path = t.Path, r.Depth = t.Depth
+    """, batch_size)
+    return True
+
+def check_reply_paths(limit=20):
+    """
+    Report replies whose Path or Depth does not follow from their parent's.
+    Checking each reply against its parent covers the whole tree, since a
+    top-level reply's path is fixed by its own id. Returns the number found.
+    """
+    with engine.connect() as connection:
+        problems = connection.execute(text("""
+            SELECT r.ReplyID, r.Path, r.Depth
+            FROM Reply r
+            LEFT JOIN Reply p ON r.ParentReplyID = p.ReplyID
+            WHERE r.Path <> CONCAT(COALESCE(p.Path, ''), LPAD(HEX(r.ReplyID), 8, '0'))
+               OR r.Depth <> COALESCE(p.Depth + 1, 0)
+        """)).all()
+    for reply_id, path, depth in problems[:limit]:
+        print(f"Reply {reply_id}: path={path!r} depth={depth}")
+    if len(problems) > limit:
+        print(f"... and {len(problems) - limit} more")
+    print(f"{len(problems)} replies with an invalid path" if problems else "All reply paths are valid")
+    return len(problems)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rebuild denormalized columns from their source tables")
+    parser.add_argument("--votes", action="store_true", help="Recompute thread and reply vote tallies")
+    parser.add_argument("--reply-paths", action="store_true", help="Rebuild reply paths and depths")
+    parser.add_argument("--check-reply-paths", action="store_true",
+                        help="Report replies whose path or depth is wrong (exit status 1 if any)")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Primary-key range per transaction")
+
+    args = parser.parse_args()
+
+    if not (args.votes or args.reply_paths or args.check_reply_paths):
+        parser.print_help()
+    if args.votes:
+        backfill_vote_tallies(args.batch_size)
+    if args.reply_paths:
+        backfill_reply_paths(args.batch_size)
+    if args.check_reply_paths and check_reply_paths():
+        raise SystemExit(1)
@@ -0,0 +1,120 @@
+"""
+Benchmark JSON encoding and compression of the API's largest responses
+
+Requests a set of heavy routes through Flask's test client against the live
+database, captures the data each route passes to jsonify, and then times
+encoding that data with every JSON provider, followed by every compression
+encoding. Load a seeded dataset (insert.py) first so the payloads are
+realistic.
+
+Usage:
+    python bench_json.py                 # default routes, 20 rounds each
+    python bench_json.py --rounds 50
+    python bench_json.py --url /courses --url /thread/12/replies
+"""
+
+import gzip
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+import app as api
+from explain_routes import load_samples
+from fast_json import OrjsonProvider, orjson
+from compression import brotli
+
+DEFAULT_URLS = [
+    '/lecturer/{lecturer_id}/course_grades',
+    '/thread/{thread_id}/replies',
+    '/thread/{thread_id}/replies_flat',
+    '/threads/{forum_id}',
+    '/dashboard/student/{student_id}',
+    '/courses',
+]
+
+class CapturingProvider(DefaultJSONProvider):
+    """Default provider that remembers the last object it serialized"""
+
+    captured = None
+
+    def response(self, *args, **kwargs):
+        self.captured = self._prepare_response_obj(args, kwargs)
+        return super().response(*args, **kwargs)
+
+def capture_payloads(urls):
+    """{url: data passed to jsonify} for every URL that answered 200"""
+    provider = CapturingProvider(api.app)
+    original_provider, api.app.json = api.app.json, provider
+    client = api.app.test_client()
+    payloads = {}
+    try:
+        for url in urls:
+            provider.captured = None
+            response = client.get(url, headers={'Accept-Encoding': 'identity'})
+            if response.status_code != 200 or provider.captured is None:
+                print(f"Skipping {url}: status {response.status_code}")
+                continue
+            payloads[url] = provider.captured
+    finally:
+        api.app.json = original_provider
+    return payloads
+
+def encoders():
+    """(name, function returning bytes) for each available JSON provider"""
+    std = DefaultJSONProvider(api.app)
+    available = [('std json', lambda obj: std.dumps(obj, separators=(',', ':')).encode())]
+    if orjson is not None:
+        http_dates = OrjsonProvider(api.app, 'http')
+        iso_dates = OrjsonProvider(api.app, 'iso')
+        available.append(('orjson', http_dates.dumps_bytes))
+        available.append(('orjson iso', iso_dates.dumps_bytes))
+    return available
+
+def compressors():
+    available = [('identity', lambda data: data),
+                 ('gzip 6', lambda data: gzip.compress(data, compresslevel=6))]
+    if brotli is not None:
+        available.append(('br 4', lambda data: brotli.compress(data, quality=4)))
+    return available
+
+def time_call(function, argument, rounds):
+    """Best of `rounds` runs in milliseconds, plus the last result"""
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = function(argument)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+def main(urls, rounds=20):
+    conn = api.get_db_connection()
+    if not conn:
+        raise SystemExit("Database connection failed")
+    try:
+        samples = load_samples(conn)
+    finally:
+        conn.close()
+
+    payloads = capture_payloads([url.format(**samples) for url in urls])
+    print(f"{'Route':<40}{'Encoder':<13}{'Encode ms':>10}{'Bytes':>11}"
+          f"{'Encoding':>11}{'Compress ms':>13}{'Sent bytes':>12}")
+    for url, payload in payloads.items():
+        for encoder_name, encode in encoders():
+            encode_ms, body = time_call(encode, payload, rounds)
+            for compressor_name, compress in compressors():
+                compress_ms, sent = time_call(compress, body, rounds)
+                print(f"{url:<40}{encoder_name:<13}{encode_ms:>10.2f}{len(body):>11}"
+                      f"{compressor_name:>11}{compress_ms:>13.2f}{len(sent):>12}")
+        print()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare JSON encoders and compression on real responses")
+    parser.add_argument("--url", dest="urls", action="append",
+                        help="Route to benchmark, may use {student_id}, {lecturer_id}, {course_code}, "
+                             "{forum_id} or {thread_id} (repeatable, default: the largest routes)")
+    parser.add_argument("--rounds", type=int, default=20, help="Timed runs per measurement (the best is reported)")
+    args = parser.parse_args()
+
+    main(args.urls or DEFAULT_URLS, args.rounds)
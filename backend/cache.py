@@ -0,0 +1,246 @@
+"""
+Query result cache for the course catalogue routes
+
+Read routes that change rarely (/courses, /courses/student/<id>,
+/courses/lecturer/<id>, /course_members/<code>, /course_content/<code>) keep
+their JSON responses here instead of querying MySQL on every request.
+
+- Entries are keyed by view function, URL parameters and query string.
+- Every cached route declares the tags its data depends on, for example
+  'course:{course_code}'. An entry remembers the versions of its tags it was
+  built from, and entries built from an older version are treated as misses,
+  so invalidation is exact without having to find the keys.
+- The versions are the ResourceVersion counters that @validators.conditional
+  has just read from the database (tags and resource names are the same), so
+  every worker sees a write as soon as it commits, whatever the backend. Only
+  when those are unavailable does the cache fall back to its own per-backend
+  tag counters, which write routes bump after committing.
+- Tag versions are read before the route runs its queries, so a write that
+  commits while a response is being built always invalidates that response.
+- Entries also expire after a TTL, which bounds staleness when a write does not
+  go through the API.
+
+Backends:
+
+- LocalBackend: in-process LRU with per-entry TTL. Each gunicorn worker has its
+  own copy. Its tag counters only see the writes that worker served, so without
+  database versions other workers catch up when their entries expire.
+- RedisBackend: shared by every worker (requires the `redis` package). Entries
+  use Redis expiry; eviction follows the server's maxmemory policy.
+
+Backend errors never fail a request: reads fall through to the database and
+failed invalidations are logged (the TTL still applies).
+"""
+
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from flask import g, request, make_response
+
+
+class LocalBackend:
+    """Thread-safe in-process LRU cache with per-entry expiry"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value), least recently used first
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def tag_versions(self, tags):
+        with self._lock:
+            return [self._versions.get(tag, 0) for tag in tags]
+
+    def bump(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'backend': 'local', 'entries': len(self._entries),
+                    'maxEntries': self.max_entries, 'evictions': self.evictions}
+
+
+class RedisBackend:
+    """Cache shared by every worker through Redis"""
+
+    def __init__(self, url, prefix='cms:cache:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package (pip install redis)")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        data = self.client.get(f"{self.prefix}entry:{key}")
+        return json.loads(data) if data is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(f"{self.prefix}entry:{key}", json.dumps(value), ex=ttl)
+
+    def tag_versions(self, tags):
+        if not tags:
+            return []
+        versions = self.client.mget([f"{self.prefix}tag:{tag}" for tag in tags])
+        return [int(version) if version is not None else 0 for version in versions]
+
+    def bump(self, tags):
+        pipeline = self.client.pipeline()
+        for tag in tags:
+            pipeline.incr(f"{self.prefix}tag:{tag}")
+        pipeline.execute()
+
+    def clear(self):
+        for key in self.client.scan_iter(f"{self.prefix}*"):
+            self.client.delete(key)
+
+    def stats(self):
+        return {'backend': 'redis'}
+
+
+def make_backend(name, redis_url=None, max_entries=1024):
+    """Backend for a CACHE_BACKEND setting: 'local', 'redis' or 'none' (caching disabled)"""
+    if name == 'none':
+        return None
+    if name == 'redis':
+        return RedisBackend(redis_url or 'redis://localhost:6379/0')
+    if name == 'local':
+        return LocalBackend(max_entries)
+    raise ValueError(f"Unknown cache backend: {name}")
+
+
+class QueryCache:
+    """Caches JSON responses of read routes, invalidated by tag"""
+
+    def __init__(self, backend, ttl=300):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._counters = {}  # view name -> {'hits', 'misses', 'stale'}
+        self.invalidations = 0
+        self.errors = 0
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def _count(self, name, counter):
+        with self._lock:
+            counters = self._counters.setdefault(name, {'hits': 0, 'misses': 0, 'stale': 0})
+            counters[counter] += 1
+
+    def _call(self, operation, *args):
+        """Run a backend operation; on failure log it and return None"""
+        try:
+            return operation(*args)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            print(f"Cache backend error: {e}")
+            return None
+
+    @staticmethod
+    def make_key(name, view_args, query_args):
+        return f"{name}:{urlencode(sorted(view_args.items()))}?{urlencode(sorted(query_args))}"
+
+    def _versions(self, tags):
+        """Versions of `tags`: the database versions read for this request if there are any, else the backend's"""
+        database_versions = g.get('resource_versions') or {}
+        if all(tag in database_versions for tag in tags):
+            return ['db'] + [database_versions[tag] for tag in tags]
+        return self._call(self.backend.tag_versions, tags)
+
+    def cached(self, *tags):
+        """
+        Decorator for a read route, placed below @app.route. `tags` are format
+        strings filled in from the URL parameters, e.g. 'student:{student_id}'.
+        Only 200 responses are stored.
+        """
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(**view_args):
+                if not self.enabled:
+                    return view(**view_args)
+
+                name = view.__name__
+                key = self.make_key(name, view_args, request.args.items(multi=True))
+                versions = self._versions([tag.format(**view_args) for tag in tags])
+
+                entry = self._call(self.backend.get, key) if versions is not None else None
+                if entry is not None and entry['versions'] == versions:
+                    self._count(name, 'hits')
+                    response = make_response(entry['body'], entry['status'])
+                    response.mimetype = 'application/json'
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                self._count(name, 'misses' if entry is None else 'stale')
+                response = make_response(view(**view_args))
+                if response.status_code == 200 and versions is not None:
+                    self._call(self.backend.set, key, {
+                        'versions': versions,
+                        'status': response.status_code,
+                        'body': response.get_data(as_text=True),
+                    }, self.ttl)
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+    def invalidate(self, *tags):
+        """Invalidate every entry built from any of `tags`; call after the write commits"""
+        if not self.enabled or not tags:
+            return
+        with self._lock:
+            self.invalidations += 1
+        self._call(self.backend.bump, list(tags))
+
+    def stats(self):
+        with self._lock:
+            routes = {name: dict(counters) for name, counters in self._counters.items()}
+            stats = {'enabled': self.enabled, 'ttl': self.ttl,
+                     'invalidations': self.invalidations, 'errors': self.errors}
+        for counters in routes.values():
+            lookups = counters['hits'] + counters['misses'] + counters['stale']
+            counters['hitRatio'] = round(counters['hits'] / lookups, 3) if lookups else None
+        hits = sum(counters['hits'] for counters in routes.values())
+        lookups = sum(counters['hits'] + counters['misses'] + counters['stale'] for counters in routes.values())
+        stats.update(hits=hits, misses=lookups - hits,
+                     hitRatio=round(hits / lookups, 3) if lookups else None, routes=routes)
+        if self.enabled:
+            backend_stats = self._call(self.backend.stats)
+            if backend_stats:
+                stats.update(backend_stats)
+        return stats
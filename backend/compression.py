@@ -0,0 +1,57 @@
+"""
+Response compression
+
+Compresses JSON and text responses at least COMPRESS_MIN_SIZE bytes long with
+the best encoding the client accepts: brotli (if the `brotli` package is
+installed) or gzip. Smaller responses are sent as they are, since compressing
+them costs more CPU than it saves in transfer time. Streamed responses and 304s
+are never compressed.
+"""
+
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html')
+
+
+def _encode(encoding, data, gzip_level, brotli_quality):
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level)
+
+
+def init_compression(app, min_size=1024, gzip_level=6, brotli_quality=4):
+    """Register an after_request hook on `app` that compresses eligible responses"""
+    from flask import request
+
+    encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code != 200
+                or response.direct_passthrough
+                or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        if response.content_length is not None and response.content_length < min_size:
+            return response
+
+        encoding = request.accept_encodings.best_match(encodings)
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        response.set_data(_encode(encoding, data, gzip_level, brotli_quality))
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    return compress_response
@@ -0,0 +1,147 @@
+"""
+Conditional GET support (ETag / Last-Modified) for the read routes
+
+Every read route declares the resources its response is built from, such as
+'content:{course_code}' or 'thread:{thread_id}'. The ResourceVersion table keeps
+a version counter for each resource. Write routes bump the counters they change
+with bump_versions(), inside the same transaction as the write itself.
+
+A conditional route first reads those counters, a primary-key lookup, and
+derives the ETag from them. No hashing of the response body is needed. If the
+request's If-None-Match (or, without one, If-Modified-Since) still matches, the
+route answers 304 Not Modified without running its queries or serializing
+anything. Otherwise the route runs as usual and the response is sent with the
+ETag, Last-Modified and the route's Cache-Control policy.
+
+Counters are read before the route runs. A write that commits while a response
+is being built therefore leaves the client with an ETag that is already out of
+date, so its next request fetches the new data.
+
+ETags are weak (W/"..."), because the same version may be sent gzip-compressed
+or not. Writes that bypass the API (imports, manual SQL) do not bump versions.
+After one of those, bump the affected resources or empty ResourceVersion; the
+counters restart at 1, so set ETAG_SALT to a new value as well.
+"""
+
+import functools
+import hashlib
+import os
+from datetime import timedelta
+
+from flask import g, request, make_response
+from werkzeug.http import http_date
+
+# Changing this invalidates every ETag clients hold, e.g. when a deploy changes
+# response formats or ResourceVersion has been emptied
+ETAG_SALT = os.getenv('ETAG_SALT', '')
+
+# Cache-Control policies: the browser may store responses, but must revalidate
+# them on every use. The revalidation is the cheap 304 above.
+PUBLIC_REVALIDATE = 'public, no-cache'
+PRIVATE_REVALIDATE = 'private, no-cache'  # per-user data: never stored by shared caches
+
+def bump_versions(cursor, *resources):
+    """Increment the version of each resource; call before the write's commit"""
+    if not resources:
+        return
+    resources = sorted(set(resources))  # consistent lock order between concurrent writes
+    values = ", ".join(["(%s, 1, UTC_TIMESTAMP())"] * len(resources))
+    cursor.execute(f"""
+        INSERT INTO ResourceVersion (Resource, Version, UpdatedAt)
+        VALUES {values}
+        ON DUPLICATE KEY UPDATE Version = Version + 1, UpdatedAt = VALUES(UpdatedAt)
+    """, tuple(resources))
+
+def read_versions(cursor, resources):
+    """
+    Returns ([version per resource], last_modified, now). Resources that were
+    never bumped have version 0. last_modified is the latest bump (None when
+    none was ever bumped), now is the database's current UTC time.
+    """
+    placeholders = ", ".join(["%s"] * len(resources))
+    cursor.execute(f"""
+        SELECT Resource, Version, UpdatedAt, UTC_TIMESTAMP()
+        FROM ResourceVersion
+        WHERE Resource IN ({placeholders})
+    """, tuple(resources))
+    rows = cursor.fetchall()
+    found = {row[0]: row[1] for row in rows}
+    last_modified = max((row[2] for row in rows), default=None)
+    now = rows[0][3] if rows else None
+    return [found.get(resource, 0) for resource in resources], last_modified, now
+
+def make_etag(name, view_args, query_args, versions):
+    key = repr((ETAG_SALT, name, sorted(view_args.items()), sorted(query_args), versions))
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+class ConditionalGet:
+    """Adds validators and 304 handling to read routes"""
+
+    def __init__(self, get_connection):
+        self.get_connection = get_connection
+
+    def _lookup(self, resources):
+        conn = self.get_connection()
+        if not conn:
+            return None
+        cursor = conn.cursor()
+        try:
+            return read_versions(cursor, resources)
+        except Exception as e:
+            print(f"Error reading resource versions: {e}")
+            return None
+        finally:
+            cursor.close()
+            conn.close()
+
+    def conditional(self, *resources, cache_control=PUBLIC_REVALIDATE):
+        """
+        Decorator for a read route, placed directly below @app.route.
+        `resources` are format strings filled in from the URL and query
+        parameters, e.g. 'student:{student_id}'. Validators are only added to
+        200 responses; if the versions cannot be read the route runs without them.
+        """
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(**view_args):
+                query_args = list(request.args.items(multi=True))
+                parameters = dict(request.args.to_dict(), **view_args)
+                try:
+                    names = [resource.format_map(parameters) for resource in resources]
+                except KeyError:
+                    return view(**view_args)  # a required parameter is missing; the route reports it
+
+                lookup = self._lookup(names)
+                if lookup is None:
+                    return view(**view_args)
+                versions, last_modified, now = lookup
+                # Let @query_cache.cached below validate its entry against the same versions
+                g.resource_versions = dict(zip(names, versions))
+
+                etag = make_etag(view.__name__, view_args, query_args, versions)
+                # A Last-Modified in the current second could be followed by another
+                # write in that same second, which If-Modified-Since could not tell apart
+                if last_modified is not None and last_modified + timedelta(seconds=1) > now:
+                    last_modified = None
+
+                if request.if_none_match:
+                    not_modified = request.if_none_match.contains_weak(etag)
+                else:
+                    since = request.if_modified_since
+                    not_modified = (last_modified is not None and since is not None
+                                    and last_modified <= since.replace(tzinfo=None))
+
+                if not_modified:
+                    response = make_response('', 304)
+                else:
+                    response = make_response(view(**view_args))
+                    if response.status_code != 200:
+                        return response
+
+                response.set_etag(etag, weak=True)
+                if last_modified is not None:
+                    response.headers['Last-Modified'] = http_date(last_modified)
+                response.headers['Cache-Control'] = cache_control
+                return response
+            return wrapper
+        return decorator
@@ -0,0 +1,47 @@
+"""
+Shared query helpers for the raw mysql-connector routes
+"""
+
+def fetch_children(cursor, query, parent_ids, key, drop_key=False, params=(), chunk_size=1000):
+    """
+    Load the child rows of many parents with one IN-list query instead of one
+    query per parent, and group them by parent in memory.
+
+    `query` must select `key` and contain a single `{ids}` placeholder where the
+    IN list goes, for example:
+
+        SELECT coursecode, forumid, forumname
+        FROM DiscussionForum
+        WHERE coursecode IN ({ids})
+
+    The cursor must return dictionaries. Parent ids are sent in chunks of
+    `chunk_size`, so the number of queries only grows with the number of parents
+    past that size. Returns {parent_id: [rows]} with an entry, possibly empty,
+    for every parent id. With drop_key=True the `key` column is removed from the
+    returned rows. `params` are bound before the IN list, for placeholders that
+    appear ahead of it in the query.
+    """
+    grouped = {parent_id: [] for parent_id in parent_ids}
+    unique_ids = list(grouped)
+
+    for start in range(0, len(unique_ids), chunk_size):
+        chunk = unique_ids[start:start + chunk_size]
+        placeholders = ", ".join(["%s"] * len(chunk))
+        cursor.execute(query.format(ids=placeholders), tuple(params) + tuple(chunk))
+        for row in cursor.fetchall():
+            parent_id = row.pop(key) if drop_key else row[key]
+            grouped.setdefault(parent_id, []).append(row)
+
+    return grouped
+
+def iter_chunks(cursor, chunk_size=1000):
+    """
+    Yield the rows of an executed query `chunk_size` at a time. With an
+    unbuffered cursor (conn.cursor(buffered=False)) rows are read from the
+    server as they are consumed, so memory use does not depend on result size.
+    """
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
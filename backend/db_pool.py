@@ -0,0 +1,260 @@
+"""
+Bounded MySQL connection pool
+
+Keeps a set of open mysql-connector connections that routes check out and
+return, instead of paying for a TCP + auth handshake on every request.
+
+- pool_size: connections kept open while idle
+- max_overflow: extra connections allowed under load (closed on return)
+- timeout: seconds to wait for a free connection before giving up
+- recycle: seconds after which a connection is replaced on checkout
+- pre_ping: check the connection is alive before handing it out
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector import errors
+
+
+class PoolTimeout(errors.PoolError):
+    """Raised when no connection becomes available within the pool timeout"""
+
+
+class PooledConnection:
+    """
+    Proxy around a raw connection checked out from a ConnectionPool.
+
+    Everything is forwarded to the underlying connection except close(),
+    which hands the connection back to the pool. This lets existing code that
+    ends with conn.close() return connections without any changes.
+    """
+
+    def __init__(self, pool, record):
+        self._pool = pool
+        self._record = record
+
+    @property
+    def raw_connection(self):
+        if self._record is None:
+            raise errors.InterfaceError("Connection has already been returned to the pool")
+        return self._record.connection
+
+    def __getattr__(self, name):
+        return getattr(self.raw_connection, name)
+
+    def is_connected(self):
+        if self._record is None:
+            return False
+        return self._record.connection.is_connected()
+
+    def close(self):
+        """Return the connection to the pool (safe to call more than once)"""
+        record, self._record = self._record, None
+        if record is not None:
+            self._pool._checkin(record)
+
+    def invalidate(self):
+        """Discard the connection instead of returning it to the pool"""
+        record, self._record = self._record, None
+        if record is not None:
+            self._pool._checkin(record, discard=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            try:
+                self.raw_connection.rollback()
+            except mysql.connector.Error:
+                self.invalidate()
+        self.close()
+        return False
+
+
+class _ConnectionRecord:
+    """A raw connection plus the bookkeeping the pool needs for it"""
+
+    __slots__ = ("connection", "created_at")
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = time.monotonic()
+
+
+class ConnectionPool:
+    """Thread-safe, bounded pool of MySQL connections"""
+
+    def __init__(self, creator, pool_size=10, max_overflow=10, timeout=30.0,
+                 recycle=3600, pre_ping=True):
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+        if max_overflow < 0:
+            raise ValueError("max_overflow cannot be negative")
+
+        self._creator = creator
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        self._lock = threading.Condition()
+        self._idle = deque()
+        self._open = 0  # connections that currently exist (idle + checked out)
+
+        self._counters = {
+            'checkouts': 0,
+            'created': 0,
+            'recycled': 0,
+            'invalidated': 0,
+            'waits': 0,
+            'timeouts': 0,
+        }
+
+    # Checkout / checkin
+
+    def connect(self):
+        """Check out a connection, waiting up to `timeout` seconds for one to free up"""
+        record = self._checkout_record()
+        try:
+            record = self._validate(record)
+        except Exception:
+            self._release_slot()
+            raise
+        with self._lock:
+            self._counters['checkouts'] += 1
+        return PooledConnection(self, record)
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks out a connection and always returns it"""
+        conn = self.connect()
+        with conn:
+            yield conn
+
+    def _checkout_record(self):
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        with self._lock:
+            waited = False
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._open < self.pool_size + self.max_overflow:
+                    # Reserve the slot now, open the connection outside the lock
+                    self._open += 1
+                    break
+                if not waited:
+                    self._counters['waits'] += 1
+                    waited = True
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._counters['timeouts'] += 1
+                    raise PoolTimeout(
+                        f"Connection pool exhausted: {self._open} connections in use, "
+                        f"waited {self.timeout}s"
+                    )
+                self._lock.wait(remaining)
+
+        try:
+            return self._create_record()
+        except Exception:
+            self._release_slot()
+            raise
+
+    def _create_record(self):
+        record = _ConnectionRecord(self._creator())
+        with self._lock:
+            self._counters['created'] += 1
+        return record
+
+    def _validate(self, record):
+        """Replace connections that are too old or no longer answer a ping"""
+        if self.recycle is not None and self.recycle >= 0 \
+                and time.monotonic() - record.created_at > self.recycle:
+            self._close_quietly(record)
+            with self._lock:
+                self._counters['recycled'] += 1
+            return self._create_record()
+
+        if self.pre_ping and not self._ping(record.connection):
+            self._close_quietly(record)
+            with self._lock:
+                self._counters['invalidated'] += 1
+            return self._create_record()
+
+        return record
+
+    def _checkin(self, record, discard=False):
+        if not discard:
+            # Never hand the next request an open transaction or stale snapshot
+            try:
+                record.connection.rollback()
+            except mysql.connector.Error:
+                discard = True
+
+        with self._lock:
+            if not discard and len(self._idle) < self.pool_size:
+                self._idle.append(record)
+                self._lock.notify()
+                return
+            if discard:
+                self._counters['invalidated'] += 1
+
+        self._close_quietly(record)
+        self._release_slot()
+
+    def _release_slot(self):
+        with self._lock:
+            self._open -= 1
+            self._lock.notify()
+
+    # Helpers
+
+    @staticmethod
+    def _ping(connection):
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except mysql.connector.Error:
+            return False
+
+    @staticmethod
+    def _close_quietly(record):
+        try:
+            record.connection.close()
+        except mysql.connector.Error:
+            pass
+
+    def dispose(self):
+        """
+        Close every idle connection. Checked-out connections are closed when
+        they are returned. Call this after forking a worker process so the
+        child never reuses sockets opened by the parent.
+        """
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+            self._open -= len(idle)
+            self._lock.notify_all()
+        for record in idle:
+            self._close_quietly(record)
+
+    def stats(self):
+        """Snapshot of the pool's current state and lifetime counters"""
+        with self._lock:
+            idle = len(self._idle)
+            return {
+                'poolSize': self.pool_size,
+                'maxOverflow': self.max_overflow,
+                'timeout': self.timeout,
+                'recycle': self.recycle,
+                'open': self._open,
+                'idle': idle,
+                'checkedOut': self._open - idle,
+                'overflow': max(0, self._open - self.pool_size),
+                **self._counters,
+            }
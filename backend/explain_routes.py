@@ -0,0 +1,179 @@
+"""
+EXPLAIN every query issued by the API's read routes
+
+Calls each GET route in app.py through Flask's test client, records the SQL the
+route runs, and EXPLAINs every SELECT against the live database. The script
+exits with status 1 if any query reads a table with a full scan (EXPLAIN type
+ALL, or a full index scan), so it can run in CI after `alembic upgrade head`
+and a seeded dataset (insert.py) has been loaded. On a nearly empty database
+MySQL may prefer scans regardless of the indexes, so run it against seed data.
+
+Usage:
+    python explain_routes.py            # report failures only
+    python explain_routes.py --verbose  # print the plan of every query
+"""
+
+import sys
+import app as api
+
+# Scans that are the point of the query rather than a missing index, by route rule
+ALLOWED_FULL_SCANS = {
+    '/courses': {'c'},  # the full course catalogue
+    '/reports/popular_courses': {'ReportPopularCourses'},
+    '/reports/active_students': {'ReportActiveStudents'},
+    '/reports/busy_lecturers': {'ReportBusyLecturers'},
+    '/reports/top_courses': {'ReportTopCourses'},
+    '/reports/top_students': {'ReportTopStudents'},
+}
+
+# Query strings for routes that need them, plus extra variants worth checking
+QUERY_STRINGS = {
+    '/calendar_events/student': ['studentId={student_id}'],
+    '/threads/<int:forum_id>': ['', 'sort=top', 'limit=20', 'sort=top&limit=20&preview=200',
+                                'sort=hot', 'sort=hot&limit=20'],
+    '/thread/<int:thread_id>/replies': ['', 'limit=20', 'limit=20&depth=3'],
+    '/reply/<int:reply_id>/children': ['', 'limit=20&depth=0'],
+    '/lecturer/<int:lecturer_id>/course_grades': ['', 'limit=100'],
+    '/lecturer/<int:lecturer_id>/course_grades/export': ['format=ndjson', 'format=csv'],
+    '/search': ['q={search_term}', 'q={search_term}&course={course_code}',
+                'q={search_term}&studentId={student_id}&types=thread,reply'],
+}
+
+FULL_SCAN_TYPES = ('ALL', 'index')
+
+class RecordingCursor:
+    """Cursor wrapper that remembers every statement it executes"""
+
+    def __init__(self, cursor, log):
+        self._cursor = cursor
+        self._log = log
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        self._log.append((operation, params))
+        return self._cursor.execute(operation, params, *args, **kwargs)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class RecordingConnection:
+    """Connection wrapper whose cursors record their statements"""
+
+    def __init__(self, conn, log):
+        self._conn = conn
+        self._log = log
+
+    def cursor(self, *args, **kwargs):
+        return RecordingCursor(self._conn.cursor(*args, **kwargs), self._log)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+def load_samples(conn):
+    """Pick ids that exercise each route with real data"""
+    cursor = conn.cursor()
+    samples = {}
+    lookups = {
+        'student_id': "SELECT UserID FROM Enrol GROUP BY UserID ORDER BY COUNT(*) DESC LIMIT 1",
+        'lecturer_id': "SELECT LecturerID FROM Course GROUP BY LecturerID ORDER BY COUNT(*) DESC LIMIT 1",
+        'course_code': "SELECT CourseCode FROM Enrol GROUP BY CourseCode ORDER BY COUNT(*) DESC LIMIT 1",
+        'forum_id': "SELECT ForumID FROM DiscussionThread GROUP BY ForumID ORDER BY COUNT(*) DESC LIMIT 1",
+        'thread_id': "SELECT ThreadID FROM Reply GROUP BY ThreadID ORDER BY COUNT(*) DESC LIMIT 1",
+        'reply_id': "SELECT ParentReplyID FROM Reply WHERE ParentReplyID IS NOT NULL "
+                    "GROUP BY ParentReplyID ORDER BY COUNT(*) DESC LIMIT 1",
+        # First word of a reply, long enough for the FULLTEXT indexes to have kept it
+        'search_term': "SELECT SUBSTRING_INDEX(Content, ' ', 1) FROM Reply "
+                       "WHERE CHAR_LENGTH(SUBSTRING_INDEX(Content, ' ', 1)) >= 4 LIMIT 1",
+    }
+    try:
+        for name, query in lookups.items():
+            cursor.execute(query)
+            row = cursor.fetchone()
+            if row is None:
+                raise SystemExit(f"No data to sample {name}; load a seeded dataset first")
+            samples[name] = row[0]
+    finally:
+        cursor.close()
+    return samples
+
+def build_requests(samples):
+    """(rule, url) pairs for every GET route"""
+    adapter = api.app.url_map.bind('localhost')
+    requests = []
+    for rule in api.app.url_map.iter_rules():
+        if 'GET' not in rule.methods or rule.endpoint == 'static' or rule.rule.startswith('/health'):
+            continue
+        path = adapter.build(rule.endpoint, {argument: samples[argument] for argument in rule.arguments})
+        for query_string in QUERY_STRINGS.get(rule.rule, ['']):
+            query_string = query_string.format(**samples)
+            requests.append((rule.rule, f"{path}?{query_string}" if query_string else path))
+    return requests
+
+def explain(conn, statement, params):
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(f"EXPLAIN {statement}", params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+def main(verbose=False):
+    conn = api.get_db_connection()
+    if not conn:
+        raise SystemExit("Database connection failed")
+
+    failures = []
+    try:
+        samples = load_samples(conn)
+        original_get_db_connection = api.get_db_connection
+        client = api.app.test_client()
+
+        for rule, url in build_requests(samples):
+            log = []
+            api.get_db_connection = lambda: RecordingConnection(original_get_db_connection(), log)
+            try:
+                response = client.get(url)
+                # Streamed bodies (the grade export) run their queries while they are
+                # read; reading and closing also returns the route's connection
+                response.get_data()
+                response.close()
+            finally:
+                api.get_db_connection = original_get_db_connection
+            if response.status_code >= 500:
+                failures.append(f"{url}: route returned {response.status_code}")
+                continue
+
+            for statement, params in log:
+                if not statement.lstrip().upper().startswith('SELECT'):
+                    continue
+                for plan in explain(conn, statement, params):
+                    table = plan.get('table') or ''
+                    full_scan = (plan.get('type') in FULL_SCAN_TYPES
+                                 and not table.startswith('<')  # derived tables / unions
+                                 and table not in ALLOWED_FULL_SCANS.get(rule, set()))
+                    if verbose or full_scan:
+                        print(f"{'FULL SCAN' if full_scan else 'ok':9} {url} table={table} "
+                              f"type={plan.get('type')} key={plan.get('key')} rows={plan.get('rows')}")
+                    if full_scan:
+                        failures.append(f"{url}: full scan of {table}\n    {' '.join(statement.split())}")
+    finally:
+        conn.close()
+
+    if failures:
+        print(f"\n{len(failures)} problem(s) found:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("No full table scans found")
+    return 0
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="EXPLAIN the queries behind every GET route")
+    parser.add_argument("--verbose", action="store_true", help="Print the plan of every query")
+    args = parser.parse_args()
+
+    sys.exit(main(args.verbose))
@@ -0,0 +1,89 @@
+"""
+Fast JSON provider for the Flask app
+
+Flask's default provider serializes with the standard json module and calls
+back into Python for every datetime and Decimal a MySQL row contains. When
+orjson is installed, OrjsonProvider serializes in C instead. The output
+matches the default provider's:
+
+- keys are sorted and the output is compact (indented in debug mode)
+- Decimal values are sent as strings
+- datetime and date values are sent as HTTP dates ("Wed, 21 Oct 2026 07:28:00 GMT")
+
+Non-ASCII characters are sent as UTF-8 rather than \\u escapes; both decode to
+the same strings. With JSON_DATETIME_FORMAT=iso, datetimes are sent as ISO
+8601 strings and encoded natively by orjson, which is faster still. Clients
+that parse dates with `new Date(...)` accept either format.
+
+Select the provider with JSON_PROVIDER=orjson (default, falls back to the
+standard provider if orjson is missing) or JSON_PROVIDER=std.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider, _default
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default_http_dates(value):
+    if isinstance(value, date):
+        return http_date(value)
+    return _default(value)
+
+
+def _default_iso_dates(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    return _default(value)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """DefaultJSONProvider with dumps() done by orjson"""
+
+    def __init__(self, app, datetime_format='http'):
+        super().__init__(app)
+        if datetime_format not in ('http', 'iso'):
+            raise ValueError(f"Unknown datetime format: {datetime_format}")
+        self.datetime_format = datetime_format
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj, indent=kwargs.get('indent')).decode()
+
+    def dumps_bytes(self, obj, indent=None):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if self.datetime_format == 'http':
+            # Hand datetimes to the default callback so they keep Flask's format
+            option |= orjson.OPT_PASSTHROUGH_DATETIME
+            default = _default_http_dates
+        else:
+            default = _default_iso_dates
+        return orjson.dumps(obj, default=default, option=option)
+
+    def response(self, *args, **kwargs):
+        # Same as DefaultJSONProvider.response, without the bytes -> str -> bytes round trip
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent=indent) + b"\n",
+                                        mimetype=self.mimetype)
+
+
+def make_json_provider(app, name='orjson', datetime_format='http'):
+    """JSON provider for a JSON_PROVIDER setting: 'orjson' or 'std'"""
+    if name == 'std':
+        return DefaultJSONProvider(app)
+    if name != 'orjson':
+        raise ValueError(f"Unknown JSON provider: {name}")
+    if orjson is None:
+        print("orjson is not installed; using the standard JSON provider")
+        return DefaultJSONProvider(app)
+    return OrjsonProvider(app, datetime_format)
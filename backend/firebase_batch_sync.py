@@ -10,8 +10,8 @@ import os
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session
 from models.database import engine
-from models.models import User, Student, Lecturer, Admin, Course, Assignment
-from models.models import DiscussionForum, DiscussionThread
+from models.models import User
+from firebase_extract import user_documents, course_documents, forum_documents
 import time
 import concurrent.futures
 
@@ -93,20 +93,7 @@ def batch_sync_to_firebase(collection_name, data_list, id_field, batch_size=500)
 def fetch_users_data(chunk_size=10000, offset=0):
     """Fetch users data in chunks"""
     with Session(engine) as session:
-        users = session.query(User).limit(chunk_size).offset(offset).all()
-        
-        users_data = []
-        for user in users:
-            user_dict = {
-                'userId': user.UserID,
-                'firstName': user.FirstName,
-                'lastName': user.LastName,
-                'userType': user.UserType
-                # Don't include password
-            }
-            users_data.append(user_dict)
-        
-        return users_data
+        return user_documents(session, chunk_size, offset)
 
 def sync_users_in_chunks(chunk_size=10000):
     """Sync users to Firebase in chunks"""
@@ -160,20 +147,7 @@ def sync_courses_to_firebase():
     """Sync courses data to Firebase using batch operations"""
     try:
         with Session(engine) as session:
-            courses = session.query(Course).all()
-            
-            courses_data = []
-            for course in courses:
-                lecturer = session.query(User).filter(User.UserID == course.LecturerID).first()
-                
-                course_dict = {
-                    'courseCode': course.CourseCode,
-                    'courseName': course.CourseName,
-                    'lecturerId': course.LecturerID,
-                    'lecturerName': f"{lecturer.FirstName} {lecturer.LastName}" if lecturer else "Unknown",
-                    'adminId': course.AdminID
-                }
-                courses_data.append(course_dict)
+            courses_data = course_documents(session)
         
         return batch_sync_to_firebase('courses', courses_data, 'courseCode')
     
@@ -185,34 +159,7 @@ def sync_discussions_to_firebase():
     """Sync discussion forums to Firebase using batch operations"""
     try:
         with Session(engine) as session:
-            forums = session.query(DiscussionForum).all()
-            
-            forums_data = []
-            for forum in forums:
-                threads = session.query(DiscussionThread).filter(DiscussionThread.ForumID == forum.ForumID).all()
-                
-                threads_data = []
-                for thread in threads:
-                    creator = session.query(User).filter(User.UserID == thread.CreatedBy).first()
-                    
-                    thread_dict = {
-                        'threadId': thread.ThreadID,
-                        'title': thread.ThreadTitle,
-                        'content': thread.Content,
-                        'createdBy': thread.CreatedBy,
-                        'creatorName': f"{creator.FirstName} {creator.LastName}" if creator else "Unknown",
-                        'createdAt': thread.CreatedAt.isoformat() if thread.CreatedAt else None,
-                        'updatedAt': thread.UpdatedAt.isoformat() if thread.UpdatedAt else None
-                    }
-                    threads_data.append(thread_dict)
-                
-                forum_dict = {
-                    'forumId': forum.ForumID,
-                    'forumName': forum.ForumName,
-                    'courseCode': forum.CourseCode,
-                    'threads': threads_data
-                }
-                forums_data.append(forum_dict)
+            forums_data = forum_documents(session)
         
         return batch_sync_to_firebase('forums', forums_data, 'forumId')
     
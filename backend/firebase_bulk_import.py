@@ -13,9 +13,8 @@ from datetime import datetime
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session
 from models.database import engine
-from models.models import User, Student, Lecturer, Admin, Course, Assignment
-from models.models import DiscussionForum, DiscussionThread, Reply, ThreadVote, ReplyVote
-from models.models import Section, SectionItem, Submission, Grade, Enrol
+from models.models import User
+from firebase_extract import user_documents, course_documents, forum_documents, assignment_documents
 import concurrent.futures
 import subprocess
 
@@ -96,20 +95,7 @@ def generate_firestore_import_json(collection_name, data_list, id_field):
 def fetch_users_data(chunk_size=50000, offset=0):
     """Fetch users data in chunks"""
     with Session(engine) as session:
-        users = session.query(User).limit(chunk_size).offset(offset).all()
-        
-        users_data = []
-        for user in users:
-            user_dict = {
-                'userId': user.UserID,
-                'firstName': user.FirstName,
-                'lastName': user.LastName,
-                'userType': user.UserType
-                # Don't include password
-            }
-            users_data.append(user_dict)
-        
-        return users_data
+        return user_documents(session, chunk_size, offset)
 
 def export_users_to_json(chunk_size=50000):
     """Export users to JSON files for Firebase import"""
@@ -147,20 +133,7 @@ def export_courses_to_json():
     """Export courses to JSON file for Firebase import"""
     try:
         with Session(engine) as session:
-            courses = session.query(Course).all()
-            
-            courses_data = []
-            for course in courses:
-                lecturer = session.query(User).filter(User.UserID == course.LecturerID).first()
-                
-                course_dict = {
-                    'courseCode': course.CourseCode,
-                    'courseName': course.CourseName,
-                    'lecturerId': course.LecturerID,
-                    'lecturerName': f"{lecturer.FirstName} {lecturer.LastName}" if lecturer else "Unknown",
-                    'adminId': course.AdminID
-                }
-                courses_data.append(course_dict)
+            courses_data = course_documents(session)
         
         return generate_firestore_import_json('courses', courses_data, 'courseCode')
     
@@ -172,34 +145,7 @@ def export_discussions_to_json():
     """Export discussion forums to JSON file for Firebase import"""
     try:
         with Session(engine) as session:
-            forums = session.query(DiscussionForum).all()
-            
-            forums_data = []
-            for forum in forums:
-                threads = session.query(DiscussionThread).filter(DiscussionThread.ForumID == forum.ForumID).all()
-                
-                threads_data = []
-                for thread in threads:
-                    creator = session.query(User).filter(User.UserID == thread.CreatedBy).first()
-                    
-                    thread_dict = {
-                        'threadId': thread.ThreadID,
-                        'title': thread.ThreadTitle,
-                        'content': thread.Content,
-                        'createdBy': thread.CreatedBy,
-                        'creatorName': f"{creator.FirstName} {creator.LastName}" if creator else "Unknown",
-                        'createdAt': thread.CreatedAt.isoformat() if thread.CreatedAt else None,
-                        'updatedAt': thread.UpdatedAt.isoformat() if thread.UpdatedAt else None
-                    }
-                    threads_data.append(thread_dict)
-                
-                forum_dict = {
-                    'forumId': forum.ForumID,
-                    'forumName': forum.ForumName,
-                    'courseCode': forum.CourseCode,
-                    'threads': threads_data
-                }
-                forums_data.append(forum_dict)
+            forums_data = forum_documents(session)
         
         return generate_firestore_import_json('forums', forums_data, 'forumId')
     
@@ -211,17 +157,7 @@ def export_assignments_to_json():
     """Export assignments to JSON file for Firebase import"""
     try:
         with Session(engine) as session:
-            assignments = session.query(Assignment).all()
-            
-            assignments_data = []
-            for assignment in assignments:
-                assignment_dict = {
-                    'assignmentId': assignment.AssignmentID,
-                    'courseCode': assignment.CourseCode,
-                    'content': assignment.Content,
-                    'dueDate': assignment.DueDate.isoformat() if assignment.DueDate else None
-                }
-                assignments_data.append(assignment_dict)
+            assignments_data = assignment_documents(session)
         
         return generate_firestore_import_json('assignments', assignments_data, 'assignmentId')
     
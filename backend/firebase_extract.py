@@ -0,0 +1,91 @@
+"""
+Shared data extraction for the Firebase exporters
+
+firebase_sync.py, firebase_batch_sync.py, firebase_bulk_import.py and
+firebase_rest_import.py all publish the same users, courses, forums and
+assignments documents. The queries that build those documents live here. Names
+of lecturers and thread creators are joined in rather than looked up per row,
+and threads are read in one query for every forum, so each collection costs a
+fixed number of queries however many rows it has:
+
+- users:       1 query (per chunk)
+- courses:     1 query
+- forums:      2 queries (forums, then every thread with its creator's name)
+- assignments: 1 query
+"""
+
+from models.models import User, Course, Assignment, DiscussionForum, DiscussionThread
+
+def full_name(first_name, last_name):
+    """Display name for a joined user; the outer join yields None for a missing user"""
+    if first_name is None:
+        return "Unknown"
+    return f"{first_name} {last_name}"
+
+def user_documents(session, chunk_size=None, offset=0):
+    """Users, without passwords, in UserID order; optionally one chunk of them"""
+    query = session.query(User.UserID, User.FirstName, User.LastName, User.UserType).order_by(User.UserID)
+    if chunk_size is not None:
+        query = query.limit(chunk_size).offset(offset)
+
+    return [{
+        'userId': user_id,
+        'firstName': first_name,
+        'lastName': last_name,
+        'userType': user_type
+        # Don't include password
+    } for user_id, first_name, last_name, user_type in query]
+
+def course_documents(session):
+    """Courses with their lecturer's name"""
+    query = (
+        session.query(Course.CourseCode, Course.CourseName, Course.LecturerID, Course.AdminID,
+                      User.FirstName, User.LastName)
+        .outerjoin(User, User.UserID == Course.LecturerID)
+        .order_by(Course.CourseCode)
+    )
+
+    return [{
+        'courseCode': course_code,
+        'courseName': course_name,
+        'lecturerId': lecturer_id,
+        'lecturerName': full_name(first_name, last_name),
+        'adminId': admin_id
+    } for course_code, course_name, lecturer_id, admin_id, first_name, last_name in query]
+
+def forum_documents(session):
+    """Forums with their threads, and each thread's creator name, embedded"""
+    forums = session.query(DiscussionForum).order_by(DiscussionForum.ForumID).all()
+
+    threads_by_forum = {}
+    threads = (
+        session.query(DiscussionThread, User.FirstName, User.LastName)
+        .outerjoin(User, User.UserID == DiscussionThread.CreatedBy)
+        .order_by(DiscussionThread.ForumID, DiscussionThread.ThreadID)
+    )
+    for thread, first_name, last_name in threads:
+        threads_by_forum.setdefault(thread.ForumID, []).append({
+            'threadId': thread.ThreadID,
+            'title': thread.ThreadTitle,
+            'content': thread.Content,
+            'createdBy': thread.CreatedBy,
+            'creatorName': full_name(first_name, last_name),
+            'createdAt': thread.CreatedAt.isoformat() if thread.CreatedAt else None,
+            'updatedAt': thread.UpdatedAt.isoformat() if thread.UpdatedAt else None
+        })
+
+    return [{
+        'forumId': forum.ForumID,
+        'forumName': forum.ForumName,
+        'courseCode': forum.CourseCode,
+        'threads': threads_by_forum.get(forum.ForumID, [])
+    } for forum in forums]
+
+def assignment_documents(session):
+    """Assignments"""
+    return [{
+        'assignmentId': assignment.AssignmentID,
+        'courseCode': assignment.CourseCode,
+        'content': assignment.Content,
+        'dueDate': assignment.DueDate.isoformat() if assignment.DueDate else None
+    } for assignment in session.query(Assignment).order_by(Assignment.AssignmentID)]
@@ -15,8 +15,8 @@ import concurrent.futures
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session
 from models.database import engine
-from models.models import User, Student, Lecturer, Admin, Course, Assignment
-from models.models import DiscussionForum, DiscussionThread
+from models.models import User
+from firebase_extract import user_documents, course_documents, forum_documents
 
 load_dotenv()
 
@@ -165,20 +165,7 @@ def batch_upload_documents(collection, data_list, id_field, batch_size=50, max_w
 def fetch_users_data(chunk_size=10000, offset=0):
     """Fetch users data in chunks"""
     with Session(engine) as session:
-        users = session.query(User).limit(chunk_size).offset(offset).all()
-        
-        users_data = []
-        for user in users:
-            user_dict = {
-                'userId': user.UserID,
-                'firstName': user.FirstName,
-                'lastName': user.LastName,
-                'userType': user.UserType
-                # Don't include password
-            }
-            users_data.append(user_dict)
-        
-        return users_data
+        return user_documents(session, chunk_size, offset)
 
 def upload_users_in_chunks(chunk_size=10000, batch_size=100, max_workers=10):
     """Upload users to Firebase in chunks"""
@@ -217,20 +204,7 @@ def upload_courses():
     """Upload courses to Firebase"""
     try:
         with Session(engine) as session:
-            courses = session.query(Course).all()
-            
-            courses_data = []
-            for course in courses:
-                lecturer = session.query(User).filter(User.UserID == course.LecturerID).first()
-                
-                course_dict = {
-                    'courseCode': course.CourseCode,
-                    'courseName': course.CourseName,
-                    'lecturerId': course.LecturerID,
-                    'lecturerName': f"{lecturer.FirstName} {lecturer.LastName}" if lecturer else "Unknown",
-                    'adminId': course.AdminID
-                }
-                courses_data.append(course_dict)
+            courses_data = course_documents(session)
         
         return batch_upload_documents('courses', courses_data, 'courseCode')
     
@@ -242,34 +216,7 @@ def upload_discussions():
     """Upload discussion forums to Firebase"""
     try:
         with Session(engine) as session:
-            forums = session.query(DiscussionForum).all()
-            
-            forums_data = []
-            for forum in forums:
-                threads = session.query(DiscussionThread).filter(DiscussionThread.ForumID == forum.ForumID).all()
-                
-                threads_data = []
-                for thread in threads:
-                    creator = session.query(User).filter(User.UserID == thread.CreatedBy).first()
-                    
-                    thread_dict = {
-                        'threadId': thread.ThreadID,
-                        'title': thread.ThreadTitle,
-                        'content': thread.Content,
-                        'createdBy': thread.CreatedBy,
-                        'creatorName': f"{creator.FirstName} {creator.LastName}" if creator else "Unknown",
-                        'createdAt': thread.CreatedAt.isoformat() if thread.CreatedAt else None,
-                        'updatedAt': thread.UpdatedAt.isoformat() if thread.UpdatedAt else None
-                    }
-                    threads_data.append(thread_dict)
-                
-                forum_dict = {
-                    'forumId': forum.ForumID,
-                    'forumName': forum.ForumName,
-                    'courseCode': forum.CourseCode,
-                    'threads': threads_data
-                }
-                forums_data.append(forum_dict)
+            forums_data = forum_documents(session)
         
         return batch_upload_documents('forums', forums_data, 'forumId')
     
@@ -318,8 +265,8 @@ if __name__ == "__main__":
     
     args = parser.parse_args()
     
-    # Set API key from command line if provided
-    global FIREBASE_API_KEY
+    # Set API key from command line if provided (this block runs at module
+    # level, so the assignment already rebinds the module global)
     if args.api_key:
         FIREBASE_API_KEY = args.api_key
     
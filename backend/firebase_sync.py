@@ -5,26 +5,44 @@ This script provides functions to:
 1. Publish database schema to Firebase
 2. Sync specific data from your database to Firebase
 3. Set up real-time listeners for Firebase data changes
+
+Collections can be synced in two modes. A full sync deletes every document in
+the collection and writes all of them again. An incremental sync (--incremental)
+keeps a content hash of every document it has written in a local state file
+(FIREBASE_SYNC_STATE_PATH, default firebase_sync_state.json) and only writes
+documents that were added, changed or deleted since the previous run, in
+batches of up to 500 writes. Point FIRESTORE_EMULATOR_HOST at a Firestore
+emulator to run either mode without a Firebase project.
 """
 
 import firebase_admin
 from firebase_admin import credentials, firestore
+import hashlib
 import json
 import os
 from dotenv import load_dotenv
 from sqlalchemy import inspect, select
 from sqlalchemy.orm import Session
 from models.database import engine
-from models.models import User, Student, Lecturer, Admin, Course, Assignment
-from models.models import DiscussionForum, DiscussionThread
+from models.models import Course
+from firebase_extract import user_documents, course_documents, forum_documents
 import threading
 import time
 
 load_dotenv()
 
+# Firestore rejects batches of more than 500 writes
+BATCH_SIZE = 500
+
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'firebase_sync_state.json')
+
 # Initialize Firebase
 def initialize_firebase():
     """Initialize Firebase Admin SDK"""
+    # The emulator needs no credentials, only a project id
+    if os.getenv('FIRESTORE_EMULATOR_HOST'):
+        return firestore.Client(project=os.getenv('GOOGLE_CLOUD_PROJECT', 'demo-course-management'))
+
     # Check if Firebase credentials are provided as environment variables
     firebase_creds_path = os.getenv('FIREBASE_CREDENTIALS_PATH')
     
@@ -39,46 +57,58 @@ def initialize_firebase():
     return firestore.client()
 
 # Schema Publishing
-def publish_schema_to_firebase():
-    """Publish database schema to Firebase"""
-    try:
-        # Get schema information
-        inspector = inspect(engine)
-        schema_info = {}
-        
-        # Get all tables
-        for table_name in inspector.get_table_names():
-            table_info = {
-                'columns': {},
-                'foreign_keys': [],
-                'primary_key': []
+def read_schema():
+    """Describe every table in the database: columns, primary key and foreign keys"""
+    inspector = inspect(engine)
+    schema_info = {}
+
+    # Get all tables
+    for table_name in inspector.get_table_names():
+        table_info = {
+            'columns': {},
+            'foreign_keys': [],
+            'primary_key': []
+        }
+
+        # Get columns
+        for column in inspector.get_columns(table_name):
+            col_type = str(column['type'])
+            table_info['columns'][column['name']] = {
+                'type': col_type,
+                'nullable': column.get('nullable', True),
+                'default': str(column.get('default', None))
             }
-            
-            # Get columns
-            for column in inspector.get_columns(table_name):
-                col_type = str(column['type'])
-                table_info['columns'][column['name']] = {
-                    'type': col_type,
-                    'nullable': column.get('nullable', True),
-                    'default': str(column.get('default', None))
-                }
-            
-            # Get primary keys
-            for pk in inspector.get_pk_constraint(table_name).get('constrained_columns', []):
-                table_info['primary_key'].append(pk)
-            
-            # Get foreign keys
-            for fk in inspector.get_foreign_keys(table_name):
-                table_info['foreign_keys'].append({
-                    'constrained_columns': fk.get('constrained_columns', []),
-                    'referred_table': fk.get('referred_table', ''),
-                    'referred_columns': fk.get('referred_columns', [])
-                })
-            
-            schema_info[table_name] = table_info
-        
+
+        # Get primary keys
+        for pk in inspector.get_pk_constraint(table_name).get('constrained_columns', []):
+            table_info['primary_key'].append(pk)
+
+        # Get foreign keys
+        for fk in inspector.get_foreign_keys(table_name):
+            table_info['foreign_keys'].append({
+                'constrained_columns': fk.get('constrained_columns', []),
+                'referred_table': fk.get('referred_table', ''),
+                'referred_columns': fk.get('referred_columns', [])
+            })
+
+        schema_info[table_name] = table_info
+
+    return schema_info
+
+def publish_schema_to_firebase(db=None, state=None):
+    """
+    Publish database schema to Firebase. With a SyncState the schema is only
+    published when it differs from the one published last time.
+    """
+    try:
+        schema_info = read_schema()
+        schema_hash = content_hash(schema_info)
+        if state is not None and state.get('database_schema').get('current_schema') == schema_hash:
+            print("Schema unchanged since the last sync, not publishing")
+            return True
+
         # Initialize Firebase
-        db = initialize_firebase()
+        db = db or initialize_firebase()
         
         # Create a document with the schema information
         schema_ref = db.collection('database_schema').document('current_schema')
@@ -93,6 +123,10 @@ def publish_schema_to_firebase():
             'tables': schema_info,
             'created_at': firestore.SERVER_TIMESTAMP
         })
+
+        if state is not None:
+            state.update('database_schema', {'current_schema': schema_hash})
+            state.save()
         
         print("Schema successfully published to Firebase")
         return True
@@ -101,150 +135,174 @@ def publish_schema_to_firebase():
         print(f"Error publishing schema to Firebase: {str(e)}")
         return False
 
-# Data Synchronization
-def sync_courses_to_firebase():
-    """Sync courses data to Firebase"""
-    try:
-        # Initialize Firebase
-        db = initialize_firebase()
-        
-        # Get courses from database
-        with Session(engine) as session:
-            courses = session.query(Course).all()
-            
-            # Convert courses to dictionary
-            courses_data = []
-            for course in courses:
-                # Get lecturer information
-                lecturer = session.query(User).filter(User.UserID == course.LecturerID).first()
-                
-                course_dict = {
-                    'courseCode': course.CourseCode,
-                    'courseName': course.CourseName,
-                    'lecturerId': course.LecturerID,
-                    'lecturerName': f"{lecturer.FirstName} {lecturer.LastName}" if lecturer else "Unknown",
-                    'adminId': course.AdminID
-                }
-                courses_data.append(course_dict)
-        
-        # Update Firebase collection
-        courses_collection = db.collection('courses')
-        
-        # Delete existing documents
-        existing_docs = courses_collection.stream()
-        for doc in existing_docs:
-            doc.reference.delete()
-        
-        # Add new documents
-        for course_data in courses_data:
-            courses_collection.document(course_data['courseCode']).set(course_data)
-        
-        print(f"Successfully synced {len(courses_data)} courses to Firebase")
-        return True
+# Document builders: {document id: document data} for each synced collection
+def build_course_documents(session):
+    """Course documents keyed by course code"""
+    return {course['courseCode']: course for course in course_documents(session)}
+
+def build_user_documents(session):
+    """User documents keyed by user id"""
+    return {str(user['userId']): user for user in user_documents(session)}
+
+def build_forum_documents(session):
+    """Forum documents, with their threads embedded, keyed by forum id"""
+    return {str(forum['forumId']): forum for forum in forum_documents(session)}
+
+# Incremental sync state
+def content_hash(data):
+    """Stable hash of a document's content"""
+    payload = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class SyncState:
+    """
+    The content hash of every document last written to each collection,
+    persisted as JSON so an incremental sync can tell what changed since the
+    previous run.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('FIREBASE_SYNC_STATE_PATH', DEFAULT_STATE_PATH)
+        self.collections = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.collections = json.load(f)
+
+    def has(self, collection_name):
+        return collection_name in self.collections
+
+    def get(self, collection_name):
+        return self.collections.get(collection_name, {})
+
+    def update(self, collection_name, hashes):
+        """Record hashes for written documents; a hash of None forgets the document"""
+        current = self.collections.setdefault(collection_name, {})
+        for doc_id, doc_hash in hashes.items():
+            if doc_hash is None:
+                current.pop(doc_id, None)
+            else:
+                current[doc_id] = doc_hash
+
+    def replace(self, collection_name, hashes):
+        self.collections[collection_name] = dict(hashes)
+
+    def save(self):
+        # Write to a temporary file first so a crash never leaves a truncated state
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.collections, f, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+def plan_changes(documents, previous_hashes):
+    """
+    Compare freshly built documents with the hashes from the last sync.
+    Returns (upserts, deletes, hashes): the documents to write, the ids to delete
+    and the hash of every current document.
+    """
+    hashes = {doc_id: content_hash(data) for doc_id, data in documents.items()}
+    upserts = {doc_id: documents[doc_id] for doc_id, doc_hash in hashes.items()
+               if previous_hashes.get(doc_id) != doc_hash}
+    deletes = [doc_id for doc_id in previous_hashes if doc_id not in documents]
+    return upserts, deletes, hashes
+
+def commit_in_batches(db, collection_name, upserts, deletes, state=None):
+    """
+    Write upserts and deletes with batched writes. After each batch commits its
+    documents are recorded in `state`, so an interrupted sync resumes where it
+    stopped instead of starting over.
+    """
+    collection = db.collection(collection_name)
+    operations = [(doc_id, data) for doc_id, data in upserts.items()]
+    operations += [(doc_id, None) for doc_id in deletes]
+
+    for start in range(0, len(operations), BATCH_SIZE):
+        chunk = operations[start:start + BATCH_SIZE]
+        batch = db.batch()
+        for doc_id, data in chunk:
+            if data is None:
+                batch.delete(collection.document(doc_id))
+            else:
+                batch.set(collection.document(doc_id), data)
+        batch.commit()
+
+        if state is not None:
+            state.update(collection_name, {
+                doc_id: None if data is None else content_hash(data) for doc_id, data in chunk
+            })
+            state.save()
+
+def sync_collection_incremental(db, collection_name, documents, state, dry_run=False):
+    """
+    Push only the documents that changed since the last sync. Returns the
+    number of (upserts, deletes).
+    """
+    if not state.has(collection_name):
+        # First incremental run: adopt whatever is already in Firestore, with an
+        # unknown hash, so stale documents get deleted and the rest rewritten once
+        state.replace(collection_name, {
+            ref.id: '' for ref in db.collection(collection_name).list_documents()
+        })
+
+    upserts, deletes, _ = plan_changes(documents, state.get(collection_name))
+    if dry_run:
+        print(f"{collection_name}: would write {len(upserts)} and delete {len(deletes)} documents")
+    else:
+        commit_in_batches(db, collection_name, upserts, deletes, state)
+        state.save()
+    return len(upserts), len(deletes)
+
+def replace_collection(db, collection_name, documents, state=None):
+    """Full sync: delete every document in the collection and write all of them again"""
+    collection = db.collection(collection_name)
     
-    except Exception as e:
-        print(f"Error syncing courses to Firebase: {str(e)}")
-        return False
+    # Delete existing documents
+    existing_ids = [doc.id for doc in collection.stream()]
+    commit_in_batches(db, collection_name, {}, existing_ids)
+    
+    # Add new documents
+    commit_in_batches(db, collection_name, documents, [])
 
-def sync_users_to_firebase():
-    """Sync users data to Firebase"""
+    # Keep the incremental state in step so the next incremental run starts from here
+    if state is not None:
+        state.replace(collection_name, {doc_id: content_hash(data) for doc_id, data in documents.items()})
+        state.save()
+
+def sync_collection(collection_name, build_documents, db=None, incremental=False, state=None, dry_run=False):
+    """Build a collection's documents from the database and sync them to Firebase"""
     try:
         # Initialize Firebase
-        db = initialize_firebase()
+        db = db or initialize_firebase()
         
-        # Get users from database
         with Session(engine) as session:
-            users = session.query(User).all()
-            
-            # Convert users to dictionary
-            users_data = []
-            for user in users:
-                # Don't include password in Firebase data
-                user_dict = {
-                    'userId': user.UserID,
-                    'firstName': user.FirstName,
-                    'lastName': user.LastName,
-                    'userType': user.UserType
-                }
-                users_data.append(user_dict)
-        
-        # Update Firebase collection
-        users_collection = db.collection('users')
-        
-        # Delete existing documents
-        existing_docs = users_collection.stream()
-        for doc in existing_docs:
-            doc.reference.delete()
-        
-        # Add new documents
-        for user_data in users_data:
-            users_collection.document(str(user_data['userId'])).set(user_data)
-        
-        print(f"Successfully synced {len(users_data)} users to Firebase")
+            documents = build_documents(session)
+
+        if incremental or dry_run:
+            state = state if state is not None else SyncState()
+            written, deleted = sync_collection_incremental(db, collection_name, documents, state, dry_run)
+            if not dry_run:
+                print(f"Synced {collection_name} to Firebase: {written} written, {deleted} deleted, "
+                      f"{len(documents) - written} unchanged")
+        else:
+            replace_collection(db, collection_name, documents, state)
+            print(f"Successfully synced {len(documents)} {collection_name} to Firebase")
         return True
     
     except Exception as e:
-        print(f"Error syncing users to Firebase: {str(e)}")
+        print(f"Error syncing {collection_name} to Firebase: {str(e)}")
         return False
 
-def sync_discussions_to_firebase():
+# Data Synchronization
+def sync_courses_to_firebase(db=None, incremental=False, state=None, dry_run=False):
+    """Sync courses data to Firebase"""
+    return sync_collection('courses', build_course_documents, db, incremental, state, dry_run)
+
+def sync_users_to_firebase(db=None, incremental=False, state=None, dry_run=False):
+    """Sync users data to Firebase"""
+    return sync_collection('users', build_user_documents, db, incremental, state, dry_run)
+
+def sync_discussions_to_firebase(db=None, incremental=False, state=None, dry_run=False):
     """Sync discussion forums and threads to Firebase"""
-    try:
-        # Initialize Firebase
-        db = initialize_firebase()
-        
-        # Get forums and threads from database
-        with Session(engine) as session:
-            forums = session.query(DiscussionForum).all()
-            
-            # Convert forums to dictionary
-            forums_data = []
-            for forum in forums:
-                # Get threads for this forum
-                threads = session.query(DiscussionThread).filter(DiscussionThread.ForumID == forum.ForumID).all()
-                
-                threads_data = []
-                for thread in threads:
-                    # Get creator information
-                    creator = session.query(User).filter(User.UserID == thread.CreatedBy).first()
-                    
-                    thread_dict = {
-                        'threadId': thread.ThreadID,
-                        'title': thread.ThreadTitle,
-                        'content': thread.Content,
-                        'createdBy': thread.CreatedBy,
-                        'creatorName': f"{creator.FirstName} {creator.LastName}" if creator else "Unknown",
-                        'createdAt': thread.CreatedAt.isoformat() if thread.CreatedAt else None,
-                        'updatedAt': thread.UpdatedAt.isoformat() if thread.UpdatedAt else None
-                    }
-                    threads_data.append(thread_dict)
-                
-                forum_dict = {
-                    'forumId': forum.ForumID,
-                    'forumName': forum.ForumName,
-                    'courseCode': forum.CourseCode,
-                    'threads': threads_data
-                }
-                forums_data.append(forum_dict)
-        
-        # Update Firebase collection
-        forums_collection = db.collection('forums')
-        
-        # Delete existing documents
-        existing_docs = forums_collection.stream()
-        for doc in existing_docs:
-            doc.reference.delete()
-        
-        # Add new documents
-        for forum_data in forums_data:
-            forums_collection.document(str(forum_data['forumId'])).set(forum_data)
-        
-        print(f"Successfully synced {len(forums_data)} forums to Firebase")
-        return True
-    
-    except Exception as e:
-        print(f"Error syncing discussions to Firebase: {str(e)}")
-        return False
+    return sync_collection('forums', build_forum_documents, db, incremental, state, dry_run)
 
 # Firebase Listeners
 def setup_firebase_listeners():
@@ -288,12 +346,19 @@ def setup_firebase_listeners():
         return None
 
 # Sync All Data
-def sync_all_to_firebase():
-    """Sync all data to Firebase"""
-    print("Starting data synchronization to Firebase...")
+def sync_all_to_firebase(incremental=False, dry_run=False, db=None, state=None):
+    """
+    Sync all data to Firebase. Full syncs rewrite every collection; incremental
+    syncs only write what changed since the last run.
+    """
+    print(f"Starting {'incremental' if incremental else 'full'} data synchronization to Firebase...")
+
+    db = db or initialize_firebase()
+    # Full syncs record hashes too, so a later incremental sync starts from them
+    state = state if state is not None else SyncState()
     
     # Publish schema
-    if not publish_schema_to_firebase():
+    if not dry_run and not publish_schema_to_firebase(db, state if incremental else None):
         print("Failed to publish schema to Firebase")
         return False
     
@@ -306,7 +371,7 @@ def sync_all_to_firebase():
     
     success = True
     for sync_func in sync_functions:
-        if not sync_func():
+        if not sync_func(db, incremental, state, dry_run):
             success = False
             print(f"Synchronization failed at {sync_func.__name__}")
             # Continue with other sync functions even if one fails
@@ -319,7 +384,7 @@ def sync_all_to_firebase():
     return success
 
 # Run as a service
-def run_sync_service(interval_minutes=15):
+def run_sync_service(interval_minutes=15, incremental=False):
     """Run the sync service at regular intervals"""
     print(f"Starting Firebase sync service (interval: {interval_minutes} minutes)")
     
@@ -329,7 +394,7 @@ def run_sync_service(interval_minutes=15):
     try:
         while True:
             # Sync all data to Firebase
-            sync_all_to_firebase()
+            sync_all_to_firebase(incremental)
             
             # Wait for the next sync
             print(f"Next sync in {interval_minutes} minutes...")
@@ -348,15 +413,19 @@ if __name__ == "__main__":
     parser.add_argument("--sync", action="store_true", help="Sync all data to Firebase")
     parser.add_argument("--service", action="store_true", help="Run as a sync service")
     parser.add_argument("--interval", type=int, default=15, help="Sync interval in minutes (for service mode)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only write documents that changed since the last sync")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Report what an incremental sync would write, without writing")
     
     args = parser.parse_args()
     
     if args.schema:
         publish_schema_to_firebase()
     elif args.sync:
-        sync_all_to_firebase()
+        sync_all_to_firebase(args.incremental, args.dry_run)
     elif args.service:
-        run_sync_service(args.interval)
+        run_sync_service(args.interval, args.incremental)
     else:
         # Default action: sync all
-        sync_all_to_firebase()
+        sync_all_to_firebase(args.incremental, args.dry_run)
@@ -0,0 +1,57 @@
+"""
+Gunicorn configuration for the Flask API (see README_DEPLOYMENT.md)
+
+Every setting can be overridden with an environment variable so the same image
+can be tuned per deployment:
+
+    GUNICORN_WORKERS            worker processes (default: 2 x CPU cores + 1)
+    GUNICORN_THREADS            request threads per worker (default: 4)
+    GUNICORN_BIND               listen address (default: 0.0.0.0:5000)
+    GUNICORN_TIMEOUT            seconds before a stuck worker is killed (default: 30)
+    GUNICORN_GRACEFUL_TIMEOUT   seconds a worker gets to finish requests on reload/shutdown (default: 30)
+    GUNICORN_KEEPALIVE          seconds to hold idle keep-alive connections (default: 5)
+    GUNICORN_MAX_REQUESTS       recycle a worker after this many requests, 0 = never (default: 1000)
+    GUNICORN_MAX_REQUESTS_JITTER  random spread so workers do not recycle together (default: 100)
+
+Graceful reload: `kill -HUP <master pid>` (or `docker compose kill -s HUP app-prod`)
+starts new workers with fresh code and lets the old ones finish their requests.
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+
+# gthread workers: each process serves GUNICORN_THREADS requests concurrently,
+# all drawing from that process's own connection pool
+worker_class = 'gthread'
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# Seconds an idle client connection is held open; raise it when a reverse proxy
+# reuses its upstream connections to the API
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Worker recycling bounds the impact of slow leaks in long-running processes
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# Each worker imports the app itself, so a HUP reload picks up new code
+preload_app = False
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+def post_fork(server, worker):
+    # The pool opens connections lazily; if the app is ever preloaded, make sure
+    # a worker never inherits a socket that was opened in the master
+    from wsgi import db_pool
+    db_pool.dispose()
+
+def worker_exit(server, worker):
+    from wsgi import db_pool
+    db_pool.dispose()
@@ -1,19 +1,87 @@
 from faker import Faker
+import numpy as np
 import random
 import time
 import hashlib
 import os
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, date, timedelta
+from thread_ranking import HOT_SCORE_SQL
 
 fake = Faker()
 
-sql_statements = []
+# Dataset size at --scale 1.0. The course catalogue (UWI_COURSES) is fixed, and
+# with it the number of lecturers (1-5 courses each) and admins.
+BASE_STUDENTS = 100000
+NUM_LECTURERS = 200
+NUM_ADMINS = 50
+
+# Fewest students that can fill every course to 10 members at 6 courses each
+MIN_STUDENTS = 500
+
+# Users are generated in fixed-size blocks, each seeded from (seed, block), so
+# the output does not depend on how many worker processes share the blocks
+USER_BLOCK_SIZE = 10000
+
+# Dates are drawn relative to this instead of the wall clock, so a seeded run
+# can be repeated exactly; set by main()
+reference_time = datetime.combine(date.today(), datetime.min.time())
+
+# Column lists of the generated tables, in the order they are written out.
+# Auto-increment ids are left out; rows are loaded in generation order, so the
+# database assigns the same ids the generators count with.
+TABLE_COLUMNS = {
+    'User': ('UserID', 'FirstName', 'LastName', 'Password', 'UserType'),
+    'Student': ('StudentID',),
+    'Lecturer': ('LecturerID',),
+    'Admin': ('AdminID',),
+    'Course': ('CourseCode', 'CourseName', 'LecturerID', 'AdminID'),
+    'Enrol': ('CourseCode', 'UserID'),
+    'Assignment': ('CourseCode', 'Content', 'DueDate'),
+    'CalendarEvents': ('CourseCode', 'EventName', 'EventDate', 'CreatedBy'),
+    'DiscussionForum': ('CourseCode', 'ForumName'),
+    'DiscussionThread': ('ForumID', 'ThreadTitle', 'Content', 'CreatedBy', 'CreatedAt', 'UpdatedAt'),
+    'Reply': ('ThreadID', 'ParentReplyID', 'Content', 'CreatedBy', 'Path', 'Depth'),
+    'ThreadVote': ('ThreadID', 'UserID', 'Vote'),
+    'ReplyVote': ('ReplyID', 'UserID', 'Vote'),
+    'Section': ('CourseCode', 'SectionTitle'),
+    'SectionItem': ('SectionID', 'ItemTitle', 'Link', 'Filename', 'Description'),
+    'Submission': ('StudentID', 'AssignmentID', 'SubmissionContent', 'UploadDate'),
+    'Grade': ('SubmissionID', 'LecturerID', 'Score'),
+}
+
+# Writer the generators stream rows to, set by main()
+output = None
+
+# Output files are written through large buffers rather than line by line
+WRITE_BUFFER_SIZE = 1 << 20
+
+def add_row(table, values):
+    output.add(table, values)
 
 def escape_string(value: str) -> str:
-    return value.replace("'", "''")
+    return value.replace("\\", "\\\\").replace("'", "''")
+
+def sql_literal(value) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, str):
+        return f"'{escape_string(value)}'"
+    return str(value)
 
 def hash_password(password: str) -> str:
     return hashlib.sha256(password.encode('utf-8')).hexdigest()
 
+def derive_seed(seed, *parts) -> int:
+    """Independent, reproducible seed for one part of the dataset"""
+    digest = hashlib.sha256(repr((seed,) + parts).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+def days_from_reference(days):
+    return reference_time + timedelta(days=days)
+
 UWI_COURSES = [
     ("ACCT1002", "Introduction to Financial Accounting"),
     ("ACCT1003", "Introduction to Cost and Management Accounting"),
@@ -315,52 +383,74 @@ UWI_COURSES = [
     ("TOUR3002", "Tourism Marketing")
 ]
 
-def generate_users(num_students=100000, num_lecturers=200, num_admins=50):
-    student_id = 620100000
-    lecturer_id = 300000000
-    admin_id = 100000000
-    student_ids = []
-    lecturer_ids = []
-    admin_ids = []
-
-    for _ in range(num_students):
-        fname = escape_string(fake.first_name())
-        lname = escape_string(fake.last_name())
-        password = hash_password(f"student_{student_id}_{fake.uuid4()}")
-        sql_statements.append(
-            f"INSERT INTO User (UserID, FirstName, LastName, Password, UserType) VALUES ({student_id}, '{fname}', '{lname}', '{password}', 'student');"
-        )
-        sql_statements.append(f"INSERT INTO Student (StudentID) VALUES ({student_id});")
-        student_ids.append(student_id)
-        student_id += 1
-
-    for _ in range(num_lecturers):
-        fname = escape_string(fake.first_name())
-        lname = escape_string(fake.last_name())
-        password = hash_password(f"lecturer_{lecturer_id}_{fake.uuid4()}")
-        sql_statements.append(
-            f"INSERT INTO User (UserID, FirstName, LastName, Password, UserType) VALUES ({lecturer_id}, '{fname}', '{lname}', '{password}', 'lecturer');"
-        )
-        sql_statements.append(f"INSERT INTO Lecturer (LecturerID) VALUES ({lecturer_id});")
-        lecturer_ids.append(lecturer_id)
-        lecturer_id += 1
-
-    for _ in range(num_admins):
-        fname = escape_string(fake.first_name())
-        lname = escape_string(fake.last_name())
-        password = hash_password(f"admin_{admin_id}_{fake.uuid4()}")
-        sql_statements.append(
-            f"INSERT INTO User (UserID, FirstName, LastName, Password, UserType) VALUES ({admin_id}, '{fname}', '{lname}', '{password}', 'admin');"
-        )
-        sql_statements.append(f"INSERT INTO Admin (AdminID) VALUES ({admin_id});")
-        admin_ids.append(admin_id)
-        admin_id += 1
-    return student_ids, lecturer_ids, admin_ids
+# Faker used for user blocks, separate from the module-level one so that running
+# blocks in this process does not change what the later tables draw
+_block_fake = None
+
+def generate_user_block(user_type, first_id, count, seed):
+    """
+    User rows for `count` users of one type with consecutive ids from first_id.
+    The result depends only on the arguments, so blocks can be generated in any
+    process and in any order.
+    """
+    global _block_fake
+    if _block_fake is None:
+        _block_fake = Faker()
+    _block_fake.seed_instance(derive_seed(seed, 'users', user_type, first_id))
+
+    rows = []
+    for user_id in range(first_id, first_id + count):
+        fname = _block_fake.first_name()
+        lname = _block_fake.last_name()
+        password = hash_password(f"{user_type}_{user_id}_{_block_fake.uuid4()}")
+        rows.append((user_id, fname, lname, password, user_type))
+    return rows
+
+def ordered_map(pool, fn, arg_lists, window):
+    """
+    pool.map that keeps at most `window` results in flight, so finished blocks
+    do not pile up in memory while the writer catches up
+    """
+    pending = deque()
+    for args in arg_lists:
+        pending.append(pool.submit(fn, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def generate_users(num_students=BASE_STUDENTS, num_lecturers=NUM_LECTURERS, num_admins=NUM_ADMINS, seed=0, workers=1):
+    # Only the ids are kept, as compact arrays, for the foreign keys that follow
+    ids = {'student': array('l'), 'lecturer': array('l'), 'admin': array('l')}
+    role_tables = {'student': 'Student', 'lecturer': 'Lecturer', 'admin': 'Admin'}
+
+    blocks = []
+    for user_type, first_id, total in (('student', 620100000, num_students),
+                                       ('lecturer', 300000000, num_lecturers),
+                                       ('admin', 100000000, num_admins)):
+        for offset in range(0, total, USER_BLOCK_SIZE):
+            blocks.append((user_type, first_id + offset, min(USER_BLOCK_SIZE, total - offset), seed))
+
+    def write_blocks(results):
+        # Results arrive in block order whichever process produced them
+        for (user_type, _, _, _), rows in zip(blocks, results):
+            for row in rows:
+                add_row('User', row)
+                add_row(role_tables[user_type], (row[0],))
+                ids[user_type].append(row[0])
+
+    if workers > 1 and len(blocks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            write_blocks(ordered_map(pool, generate_user_block, blocks, workers * 2))
+    else:
+        write_blocks(generate_user_block(*block) for block in blocks)
+
+    return ids['student'], ids['lecturer'], ids['admin']
 
 def generate_courses(lecturer_ids, admin_ids):
     course_entries = []
-    course_codes = []
-    used_codes = set()
+    course_names = {}
+    course_admins = {}
     idx = 0
     total_courses = len(UWI_COURSES)
     lecturer_course_count = {lid: 0 for lid in lecturer_ids}
@@ -379,13 +469,9 @@ def generate_courses(lecturer_ids, admin_ids):
             idx += 1
         lecturer_course_count[lecturer_id] += 1
         lecturer_assigned.add(lecturer_id)
-        admin_id = random.choice(admin_ids)
-        sql_statements.append(
-            f"INSERT INTO Course (CourseCode, CourseName, LecturerID, AdminID) VALUES ('{code[:20]}', '{escape_string(name)}', {lecturer_id}, {admin_id});"
-        )
+        course_admins[code[:20]] = random.choice(admin_ids)
+        course_names[code[:20]] = name
         course_entries.append((code[:20], lecturer_id))
-        course_codes.append(code[:20])
-        used_codes.add(code[:20])
         idx += 1
 
     # Ensure every lecturer has at least 1 course
@@ -397,196 +483,224 @@ def generate_courses(lecturer_ids, admin_ids):
                 if lecturer_course_count[assigned_lecturer] > 1:
 
                     # Reassign this course to the unassigned lecturer
-                    sql_statements.append(
-                        f"UPDATE Course SET LecturerID = {lecturer_id} WHERE CourseCode = '{code}';"
-                    )
                     lecturer_course_count[assigned_lecturer] -= 1
                     lecturer_course_count[lecturer_id] += 1
                     course_entries[i] = (code, lecturer_id)
                     lecturer_assigned.add(lecturer_id)
                     break
-    return course_entries
-
-def enrol_students(student_ids, course_codes):
 
-    # Each student: 3-6 courses; each course: at least 10 members
-    student_courses = {sid: set() for sid in student_ids}
-    course_members = {code: set() for code in course_codes}
-    all_students = student_ids.copy()
-    random.shuffle(all_students)
-    student_idx = 0
+    # Rows are emitted once the reassignments are settled, so no UPDATEs are needed
+    for code, lecturer_id in course_entries:
+        add_row('Course', (code, course_names[code], lecturer_id, course_admins[code]))
+    return course_entries
 
-    # Step 1: Ensure each course has at least 10 members
-    for code in course_codes:
-        assigned = set()
-        while len(assigned) < 10:
-            sid = all_students[student_idx % len(all_students)]
-            if len(student_courses[sid]) < 6:
-                assigned.add(sid)
-                student_courses[sid].add(code)
-                course_members[code].add(sid)
-            student_idx += 1
-        for sid in assigned:
-            sql_statements.append(f"INSERT INTO Enrol (CourseCode, UserID) VALUES ('{code}', {sid});")
-
-    # Step 2: Ensure each student has at least 3 courses
-    for sid in student_ids:
-        needed = 3 - len(student_courses[sid])
-        if needed > 0:
-            available = [c for c in course_codes if c not in student_courses[sid] and len(course_members[c]) < len(student_ids)]
-            chosen = random.sample(available, min(needed, len(available)))
-            for code in chosen:
-                if len(student_courses[sid]) < 6:
-                    sql_statements.append(f"INSERT INTO Enrol (CourseCode, UserID) VALUES ('{code}', {sid});")
-                    student_courses[sid].add(code)
-                    course_members[code].add(sid)
-                    
-    # Step 3: Optionally, randomly assign up to 6 courses per student
-    for sid in student_ids:
-        current = len(student_courses[sid])
-        max_extra = 6 - current
-        if max_extra > 0:
-            available = [c for c in course_codes if c not in student_courses[sid] and len(course_members[c]) < len(student_ids)]
-            extra = random.randint(0, max_extra)
-            chosen = random.sample(available, min(extra, len(available)))
-            for code in chosen:
-                sql_statements.append(f"INSERT INTO Enrol (CourseCode, UserID) VALUES ('{code}', {sid});")
-                student_courses[sid].add(code)
-                course_members[code].add(sid)
+def course_popularity(num_courses, rng, popularity='uniform', zipf_exponent=1.0):
+    """
+    Relative popularity of each course. 'zipf' gives the course of popularity
+    rank r a weight of 1 / r**zipf_exponent, with ranks shuffled across courses.
+    """
+    if popularity == 'zipf':
+        ranks = rng.permutation(num_courses) + 1
+        return 1.0 / ranks ** zipf_exponent
+    return np.ones(num_courses)
+
+def enrol_students(student_ids, course_codes, seed=0, popularity='uniform', zipf_exponent=1.0,
+                   min_members=10, min_courses=3, max_courses=6, chunk_size=10000):
+    """
+    Enrol every student in min_courses..max_courses courses and every course
+    with at least min_members students, vectorised with NumPy:
+
+    1. Seed slots: min_members slots per course are filled by walking a random
+       permutation of the students cyclically, so each course gets distinct
+       students and each student gets at most ceil(slots / students) of them.
+    2. Every student draws a target course count, and the remaining courses are
+       picked by weighted sampling without replacement (Gumbel top-k) over the
+       course popularity, excluding the student's seed courses. Students are
+       processed in chunks to bound memory.
+
+    Returns the Enrol table as (student id, course index) arrays.
+    """
+    rng = np.random.default_rng(derive_seed(seed, 'enrol'))
+    students = np.asarray(student_ids, dtype=np.int64)
+    num_students, num_courses = len(students), len(course_codes)
+
+    # Step 1: min_members seed slots per course, cycling over permuted students
+    slots = np.arange(num_courses * min_members)
+    seed_students = rng.permutation(num_students)[slots % num_students]
+    seed_courses = slots // min_members
+    for student_id, course_idx in zip(students[seed_students].tolist(), seed_courses.tolist()):
+        add_row('Enrol', (course_codes[course_idx], student_id))
+
+    # Step 2: top every student up to a random target of min..max courses
+    seeded = np.bincount(seed_students, minlength=num_students)
+    targets = np.maximum(rng.integers(min_courses, max_courses + 1, size=num_students), seeded)
+    extra = targets - seeded
+    log_weights = np.log(course_popularity(num_courses, rng, popularity, zipf_exponent))
+
+    order = np.argsort(seed_students, kind='stable')
+    seed_students, seed_courses = seed_students[order], seed_courses[order]
+    enrolled_students = [seed_students]
+    enrolled_courses = [seed_courses]
+
+    for start in range(0, num_students, chunk_size):
+        stop = min(start + chunk_size, num_students)
+        keys = log_weights + rng.gumbel(size=(stop - start, num_courses))
+
+        # A student's seed courses can't be drawn again
+        lo, hi = np.searchsorted(seed_students, [start, stop])
+        keys[seed_students[lo:hi] - start, seed_courses[lo:hi]] = -np.inf
+
+        # The top max_courses keys of each row, best first; each student keeps
+        # the first `extra` of them
+        top = np.argpartition(-keys, max_courses - 1, axis=1)[:, :max_courses]
+        top = np.take_along_axis(top, np.argsort(-np.take_along_axis(keys, top, axis=1), axis=1), axis=1)
+        keep = np.arange(max_courses) < extra[start:stop, None]
+        rows, cols = np.nonzero(keep)
+        chunk_students = rows + start
+        chunk_courses = top[rows, cols]
+
+        for student_id, course_idx in zip(students[chunk_students].tolist(), chunk_courses.tolist()):
+            add_row('Enrol', (course_codes[course_idx], student_id))
+        enrolled_students.append(chunk_students)
+        enrolled_courses.append(chunk_courses)
+
+    enrol_student_idx = np.concatenate(enrolled_students)
+    return students[enrol_student_idx], np.concatenate(enrolled_courses)
 
 def generate_assignments(course_codes, num_assignments_per_course=3):
     assignment_ids = []
     for code in course_codes:
         for _ in range(num_assignments_per_course):
-            content = escape_string(fake.sentence(nb_words=10))
-            due_date = fake.date_time_between(start_date="+1d", end_date="+60d").strftime('%Y-%m-%d %H:%M:%S')
-            sql_statements.append(
-                f"INSERT INTO Assignment (CourseCode, Content, DueDate) VALUES ('{code}', '{content}', '{due_date}');"
-            )
+            content = fake.sentence(nb_words=10)
+            due_date = fake.date_time_between(start_date=days_from_reference(1), end_date=days_from_reference(60)).strftime('%Y-%m-%d %H:%M:%S')
+            add_row('Assignment', (code, content, due_date))
             assignment_ids.append((code, len(assignment_ids)+1))
     return assignment_ids
 
 def generate_calendar_events(course_codes, lecturer_ids, num_events_per_course=2):
     for code in course_codes:
         for _ in range(num_events_per_course):
-            event_name = escape_string(fake.catch_phrase())
-            event_date = fake.date_time_between(start_date="+1d", end_date="+60d").strftime('%Y-%m-%d %H:%M:%S')
+            event_name = fake.catch_phrase()
+            event_date = fake.date_time_between(start_date=days_from_reference(1), end_date=days_from_reference(60)).strftime('%Y-%m-%d %H:%M:%S')
             created_by = random.choice(lecturer_ids)
-            sql_statements.append(
-                f"INSERT INTO CalendarEvents (CourseCode, EventName, EventDate, CreatedBy) VALUES ('{code}', '{event_name}', '{event_date}', {created_by});"
-            )
+            add_row('CalendarEvents', (code, event_name, event_date, created_by))
 
 def generate_discussion_forums(course_codes, num_forums_per_course=1):
     forum_ids = []
     for code in course_codes:
         for _ in range(num_forums_per_course):
-            forum_name = escape_string(fake.bs().capitalize())
-            sql_statements.append(
-                f"INSERT INTO DiscussionForum (CourseCode, ForumName) VALUES ('{code}', '{forum_name}');"
-            )
+            forum_name = fake.bs().capitalize()
+            add_row('DiscussionForum', (code, forum_name))
             forum_ids.append((code, len(forum_ids)+1))
     return forum_ids
 
 def generate_discussion_threads(forum_ids, lecturer_ids, student_ids, num_threads_per_forum=2):
-    thread_ids = []
+    authors = lecturer_ids + student_ids
     thread_counter = 1
     for (course_code, forum_id) in forum_ids:
         for _ in range(num_threads_per_forum):
-            title = escape_string(fake.sentence(nb_words=6))
-            content = escape_string(fake.paragraph(nb_sentences=2))
-            created_by = random.choice(lecturer_ids + student_ids)
-            created_at = fake.date_time_between(start_date="-30d", end_date="now").strftime('%Y-%m-%d %H:%M:%S')
+            title = fake.sentence(nb_words=6)
+            content = fake.paragraph(nb_sentences=2)
+            created_by = random.choice(authors)
+            created_at = fake.date_time_between(start_date=days_from_reference(-30), end_date=reference_time).strftime('%Y-%m-%d %H:%M:%S')
             updated_at = created_at
-            sql_statements.append(
-                f"INSERT INTO DiscussionThread (ForumID, ThreadTitle, Content, CreatedBy, CreatedAt, UpdatedAt) VALUES ({forum_id}, '{title}', '{content}', {created_by}, '{created_at}', '{updated_at}');"
-            )
-            thread_ids.append((forum_id, thread_counter))
+            add_row('DiscussionThread', (forum_id, title, content, created_by, created_at, updated_at))
             thread_counter += 1
-    return thread_ids
+    # Thread ids are assigned consecutively in insertion order
+    return range(1, thread_counter)
 
 def generate_thread_votes(thread_ids, user_ids, min_votes=0, max_votes=10):
-    for (_, thread_id) in thread_ids:
+    for thread_id in thread_ids:
         n_votes = random.randint(min_votes, max_votes)
         voters = random.sample(user_ids, min(n_votes, len(user_ids)))
         for uid in voters:
             vote = random.choice([1, -1])
-            sql_statements.append(
-                f"INSERT INTO ThreadVote (ThreadID, UserID, Vote) VALUES ({thread_id}, {uid}, {vote});"
-            )
+            add_row('ThreadVote', (thread_id, uid, vote))
 
 def generate_replies(thread_ids, lecturer_ids, student_ids, num_replies_per_thread=3):
-    reply_ids = []
+    authors = lecturer_ids + student_ids
     reply_counter = 1
-    for (forum_id, thread_id) in thread_ids:
+    for thread_id in thread_ids:
         parent_ids = [None]
+        # (path, depth) of this thread's replies, as reply_to_thread stores them
+        positions = {None: ('', -1)}
         for _ in range(num_replies_per_thread):
-            content = escape_string(fake.sentence(nb_words=12))
-            created_by = random.choice(lecturer_ids + student_ids)
+            content = fake.sentence(nb_words=12)
+            created_by = random.choice(authors)
             parent_reply_id = random.choice(parent_ids)
-            parent_str = "NULL" if parent_reply_id is None else str(parent_reply_id)
-            sql_statements.append(
-                f"INSERT INTO Reply (ThreadID, ParentReplyID, Content, CreatedBy) VALUES ({thread_id}, {parent_str}, '{content}', {created_by});"
-            )
-            reply_ids.append((thread_id, reply_counter))
+            parent_path, parent_depth = positions[parent_reply_id]
+            path = f"{parent_path}{reply_counter:08X}"
+            add_row('Reply', (thread_id, parent_reply_id, content, created_by, path, parent_depth + 1))
+            positions[reply_counter] = (path, parent_depth + 1)
             parent_ids.append(reply_counter)
             reply_counter += 1
-    return reply_ids
+    return range(1, reply_counter)
 
 def generate_reply_votes(reply_ids, user_ids, min_votes=0, max_votes=5):
-    for (_, reply_id) in reply_ids:
+    for reply_id in reply_ids:
         n_votes = random.randint(min_votes, max_votes)
         voters = random.sample(user_ids, min(n_votes, len(user_ids)))
         for uid in voters:
             vote = random.choice([1, -1])
-            sql_statements.append(
-                f"INSERT INTO ReplyVote (ReplyID, UserID, Vote) VALUES ({reply_id}, {uid}, {vote});"
-            )
+            add_row('ReplyVote', (reply_id, uid, vote))
 
 def generate_sections(course_codes, num_sections_per_course=2):
     section_ids = []
     for code in course_codes:
         for _ in range(num_sections_per_course):
-            title = escape_string(fake.catch_phrase())
-            sql_statements.append(
-                f"INSERT INTO Section (CourseCode, SectionTitle) VALUES ('{code}', '{title}');"
-            )
+            title = fake.catch_phrase()
+            add_row('Section', (code, title))
             section_ids.append((code, len(section_ids)+1))
     return section_ids
 
 def generate_section_items(section_ids, num_items_per_section=2):
     for (course_code, section_id) in section_ids:
         for _ in range(num_items_per_section):
-            item_title = escape_string(fake.sentence(nb_words=4))
+            item_title = fake.sentence(nb_words=4)
             link = fake.url() if random.random() < 0.5 else ''
             filename = fake.file_name(extension='pdf') if random.random() < 0.5 else ''
-            description = escape_string(fake.sentence(nb_words=8))
-            sql_statements.append(
-                f"INSERT INTO SectionItem (SectionID, ItemTitle, Link, Filename, Description) VALUES ({section_id}, '{item_title}', '{link}', '{filename}', '{description}');"
-            )
+            description = fake.sentence(nb_words=8)
+            add_row('SectionItem', (section_id, item_title, link, filename, description))
 
 def generate_submissions(student_ids, assignment_ids):
-    submission_ids = []
     submission_counter = 1
     for (course_code, assignment_id) in assignment_ids:
         n = random.randint(10, 30)
         submitters = random.sample(student_ids, n)
         for sid in submitters:
-            content = escape_string(fake.paragraph(nb_sentences=2))
-            upload_date = fake.date_time_between(start_date="-10d", end_date="now").strftime('%Y-%m-%d %H:%M:%S')
-            sql_statements.append(
-                f"INSERT INTO Submission (StudentID, AssignmentID, SubmissionContent, UploadDate) VALUES ({sid}, {assignment_id}, '{content}', '{upload_date}');"
-            )
-            submission_ids.append((assignment_id, submission_counter, sid))
+            content = fake.paragraph(nb_sentences=2)
+            upload_date = fake.date_time_between(start_date=days_from_reference(-10), end_date=reference_time).strftime('%Y-%m-%d %H:%M:%S')
+            add_row('Submission', (sid, assignment_id, content, upload_date))
             submission_counter += 1
-    return submission_ids
+    return range(1, submission_counter)
 
 def generate_grades(submission_ids, lecturer_ids):
-    for (assignment_id, submission_id, sid) in submission_ids:
+    for submission_id in submission_ids:
         lecturer_id = random.choice(lecturer_ids)
         score = round(random.uniform(50, 100), 2)
-        sql_statements.append(
-            f"INSERT INTO Grade (SubmissionID, LecturerID, Score) VALUES ({submission_id}, {lecturer_id}, {score});"
-        )
+        add_row('Grade', (submission_id, lecturer_id, score))
+
+def write_vote_tallies(f):
+    # Votes are inserted directly, so derive the stored tallies once at the end
+    f.write("""
+-- Stored vote tallies (kept up to date by the API from here on)
+UPDATE DiscussionThread t
+JOIN (SELECT ThreadID, SUM(Vote) AS total FROM ThreadVote GROUP BY ThreadID) v ON t.ThreadID = v.ThreadID
+SET t.Votes = v.total, t.UpdatedAt = t.UpdatedAt;
+UPDATE Reply r
+JOIN (SELECT ReplyID, SUM(Vote) AS total FROM ReplyVote GROUP BY ReplyID) v ON r.ReplyID = v.ReplyID
+SET r.Votes = v.total;
+""")
+
+def write_thread_rankings(f):
+    # Reply counts and hot scores depend on the tallies, so this runs after write_vote_tallies
+    f.write(f"""
+-- Stored reply counts and hot scores (kept up to date by the API from here on)
+UPDATE DiscussionThread t
+JOIN (SELECT ThreadID, COUNT(*) AS total FROM Reply GROUP BY ThreadID) r ON t.ThreadID = r.ThreadID
+SET t.ReplyCount = r.total, t.UpdatedAt = t.UpdatedAt;
+UPDATE DiscussionThread SET HotScore = {HOT_SCORE_SQL}, UpdatedAt = UpdatedAt;
+""")
 
 def write_views(f):
     f.write("""
@@ -646,15 +760,142 @@ ORDER BY AverageScore DESC
 LIMIT 10;
 """)
 
-def main():
+# Statements around the data load. Foreign key and unique checks are switched
+# off and the whole load runs as one transaction, so InnoDB does not validate
+# and flush every row as it arrives; the checks are restored afterwards.
+LOAD_HEADER = """SET @OLD_FOREIGN_KEY_CHECKS = @@FOREIGN_KEY_CHECKS, FOREIGN_KEY_CHECKS = 0;
+SET @OLD_UNIQUE_CHECKS = @@UNIQUE_CHECKS, UNIQUE_CHECKS = 0;
+SET @OLD_AUTOCOMMIT = @@AUTOCOMMIT, AUTOCOMMIT = 0;
+"""
+
+LOAD_FOOTER = """COMMIT;
+SET FOREIGN_KEY_CHECKS = @OLD_FOREIGN_KEY_CHECKS;
+SET UNIQUE_CHECKS = @OLD_UNIQUE_CHECKS;
+SET AUTOCOMMIT = @OLD_AUTOCOMMIT;
+"""
+
+class SqlWriter:
+    """
+    Streams INSERT statements to a single .sql file. rows_per_statement=1 gives
+    one INSERT per row (the original insert.sql); larger values batch rows into
+    multi-row INSERTs, which MySQL loads many times faster. At most
+    rows_per_statement rows per table are held in memory at a time.
+    """
+
+    def __init__(self, path, rows_per_statement=1):
+        self.path = path
+        self.rows_per_statement = rows_per_statement
+        self.pending = {}
+        self.f = open(path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE)
+        self.f.write(LOAD_HEADER)
+
+    def add(self, table, row):
+        rows = self.pending.setdefault(table, [])
+        rows.append(row)
+        if len(rows) >= self.rows_per_statement:
+            self._flush(table)
+
+    def _flush(self, table):
+        rows = self.pending[table]
+        if rows:
+            values = ",\n".join(f"({', '.join(sql_literal(v) for v in row)})" for row in rows)
+            self.f.write(f"INSERT INTO {table} ({', '.join(TABLE_COLUMNS[table])}) VALUES {values};\n")
+            rows.clear()
+
+    def close(self):
+        for table in self.pending:
+            self._flush(table)
+        self.f.write(LOAD_FOOTER)
+        write_vote_tallies(self.f)
+        write_thread_rankings(self.f)
+        write_views(self.f)
+        self.f.close()
+        return self.path
+
+def csv_field(value) -> str:
+    # Read back by LOAD DATA ... OPTIONALLY ENCLOSED BY '"' ESCAPED BY '', where
+    # an unquoted NULL is SQL NULL and a doubled quote is a literal quote
+    if value is None:
+        return "NULL"
+    if isinstance(value, str):
+        return '"' + value.replace('"', '""') + '"'
+    return str(value)
+
+class CsvWriter:
+    """
+    Streams one CSV file per table and, on close, writes load.sql, which loads
+    them with LOAD DATA LOCAL INFILE. Run load.sql from the output directory,
+    with local_infile enabled on the server and the client:
+
+        cd seed_data && mysql --local-infile=1 -u root -p app_db < load.sql
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.files = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def add(self, table, row):
+        f = self.files.get(table)
+        if f is None:
+            f = self.files[table] = open(os.path.join(self.directory, f"{table}.csv"), 'w',
+                                         encoding='utf-8', newline='', buffering=WRITE_BUFFER_SIZE)
+        f.write(",".join(csv_field(v) for v in row) + "\n")
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+        script_path = os.path.join(self.directory, 'load.sql')
+        with open(script_path, 'w', encoding='utf-8') as script:
+            script.write(LOAD_HEADER)
+            for table, columns in TABLE_COLUMNS.items():
+                if table not in self.files:
+                    continue
+                script.write(
+                    f"LOAD DATA LOCAL INFILE '{table}.csv' INTO TABLE {table}\n"
+                    "CHARACTER SET utf8mb4\n"
+                    "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY ''\n"
+                    "LINES TERMINATED BY '\\n'\n"
+                    f"({', '.join(columns)});\n"
+                )
+            script.write(LOAD_FOOTER)
+            write_vote_tallies(script)
+            write_thread_rankings(script)
+            write_views(script)
+        return script_path
+
+def make_writer(output_format, output=None, rows_per_statement=1000):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    if output_format == 'csv':
+        return CsvWriter(output or os.path.join(base_dir, 'seed_data'))
+    path = output or os.path.join(base_dir, 'insert.sql')
+    if output_format == 'multirow':
+        return SqlWriter(path, rows_per_statement)
+    return SqlWriter(path)
+
+def main(output_format='sql', output_path=None, rows_per_statement=1000,
+         scale=1.0, seed=None, workers=None, reference_date=None,
+         popularity='uniform', zipf_exponent=1.0):
+    global output, reference_time
     start = time.time()
-    print("Generating users...")
-    student_ids, lecturer_ids, admin_ids = generate_users()
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 32)
+    print(f"Using seed {seed}")
+    random.seed(derive_seed(seed, 'main'))
+    fake.seed_instance(derive_seed(seed, 'faker'))
+    if reference_date is not None:
+        reference_time = datetime.combine(reference_date, datetime.min.time())
+
+    output = make_writer(output_format, output_path, rows_per_statement)
+    num_students = round(BASE_STUDENTS * scale)
+    print(f"Generating users ({num_students} students)...")
+    student_ids, lecturer_ids, admin_ids = generate_users(num_students, seed=seed, workers=workers or os.cpu_count() or 1)
     print("Generating courses...")
     course_entries = generate_courses(lecturer_ids, admin_ids)
     course_codes = [code for code, _ in course_entries]
     print("Enrolling students...")
-    enrol_students(student_ids, course_codes)
+    enrol_students(student_ids, course_codes, seed, popularity, zipf_exponent)
     print("Generating assignments...")
     assignment_ids = generate_assignments(course_codes)
     print("Generating calendar events...")
@@ -665,10 +906,11 @@ def main():
     thread_ids = generate_discussion_threads(forum_ids, lecturer_ids, student_ids)
     print("Generating replies...")
     reply_ids = generate_replies(thread_ids, lecturer_ids, student_ids)
+    user_ids = lecturer_ids + student_ids
     print("Generating thread votes...")
-    generate_thread_votes(thread_ids, lecturer_ids + student_ids)
+    generate_thread_votes(thread_ids, user_ids)
     print("Generating reply votes...")
-    generate_reply_votes(reply_ids, lecturer_ids + student_ids)
+    generate_reply_votes(reply_ids, user_ids)
     print("Generating sections...")
     section_ids = generate_sections(course_codes)
     print("Generating section items...")
@@ -678,12 +920,36 @@ def main():
     print("Generating grades...")
     generate_grades(submission_ids, lecturer_ids)
 
-    sql_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'insert.sql')
-    with open(sql_path, 'w', encoding='utf-8') as f:
-        for stmt in sql_statements:
-            f.write(stmt + '\n')
-        write_views(f)
-    print(f"Done in {time.time() - start:.2f}s. SQL written to {sql_path}.")
+    written_to = output.close()
+    print(f"Done in {time.time() - start:.2f}s. SQL written to {written_to}.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate a seed dataset for the course management database")
+    parser.add_argument("--format", choices=["sql", "multirow", "csv"], default="sql",
+                        help="sql: one INSERT per row; multirow: batched INSERTs; "
+                             "csv: per-table CSV files plus a LOAD DATA script")
+    parser.add_argument("--rows-per-statement", type=int, default=1000,
+                        help="Rows per INSERT statement (multirow format)")
+    parser.add_argument("--output", help="Output file (sql, multirow) or directory (csv)")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help=f"Multiply the number of students ({BASE_STUDENTS} at 1.0); "
+                             "the course catalogue, lecturers and admins stay fixed")
+    parser.add_argument("--seed", type=int,
+                        help="Seed for a reproducible dataset (random if omitted; the seed used is printed)")
+    parser.add_argument("--workers", type=int, help="Processes generating users (default: CPU count)")
+    parser.add_argument("--course-popularity", choices=["uniform", "zipf"], default="uniform",
+                        help="How students pick courses beyond the 10 seed members each course gets")
+    parser.add_argument("--zipf-exponent", type=float, default=1.0,
+                        help="Skew of --course-popularity zipf; larger values concentrate enrolment")
+    parser.add_argument("--reference-date", type=date.fromisoformat,
+                        help="Date that generated due/created dates are relative to (YYYY-MM-DD, default: today); "
+                             "pass it with --seed to reproduce a dataset on a later day")
+
+    args = parser.parse_args()
+    if round(BASE_STUDENTS * args.scale) < MIN_STUDENTS:
+        parser.error(f"--scale must give at least {MIN_STUDENTS} students")
+
+    main(args.format, args.output, args.rows_per_statement, args.scale, args.seed, args.workers,
+         args.reference_date, args.course_popularity, args.zipf_exponent)
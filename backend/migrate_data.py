@@ -3,27 +3,57 @@ Migrate data from existing MySQL database to SQLAlchemy models.
 This script will:
 1. Read data from the existing database using direct MySQL queries
 2. Insert the data into the database using SQLAlchemy models
+
+Every table defined in models/models.py is copied. Tables are scheduled from
+the foreign keys on Base.metadata: a table starts as soon as every table it
+references has finished, and independent tables run concurrently on a worker
+pool (--workers). Each table is read in primary-key order through an unbuffered
+cursor and written chunk by chunk with executemany inserts, one transaction per
+chunk, so memory use does not grow with table size. Progress is saved to a
+checkpoint file (MIGRATION_CHECKPOINT_PATH, default migrate_checkpoint.json).
+Running the script again skips finished tables and resumes the others after
+the last row already in the target, which is right even if the script stopped
+between a commit and the checkpoint write. A table whose target already holds
+rows that this script did not copy is refused, so --restart needs the target
+tables emptied first.
+
+The source database is read with SOURCE_DB_HOST, SOURCE_DB_USERNAME,
+SOURCE_DB_PASSWORD and SOURCE_DB_NAME, each falling back to the DB_* variable
+the target engine uses.
+
+Usage:
+    python migrate_data.py                         # migrate (or resume) every table
+    python migrate_data.py --table User --table Student
+    python migrate_data.py --restart               # ignore the checkpoint and start over (empty target tables)
+    python migrate_data.py --workers 8             # copy up to 8 tables at a time
 """
 
 import mysql.connector
-from sqlalchemy.orm import Session
-from models.database import engine, get_db
-from models.models import User, Student, Lecturer, Admin, Course, Assignment, CalendarEvents
-from models.models import DiscussionForum, DiscussionThread, Reply, ThreadVote, ReplyVote
-from models.models import Section, SectionItem, Submission, Grade, Enrol
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from sqlalchemy import select
+from models.database import engine, Base
+import models.models  # registers every table on Base.metadata
+from pagination import keyset_condition
 from dotenv import load_dotenv
 import os
 
 # Load environment variables
 load_dotenv()
 
+CHUNK_SIZE = 5000
+
+DEFAULT_CHECKPOINT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrate_checkpoint.json')
+
 def get_mysql_connection():
-    """Get a connection to the MySQL database"""
+    """Get a connection to the source MySQL database"""
     try:
-        db_host = os.getenv('DB_HOST')
-        db_username = os.getenv('DB_USERNAME')
-        db_password = os.getenv('DB_PASSWORD')
-        db_name = os.getenv('DB_NAME')
+        db_host = os.getenv('SOURCE_DB_HOST', os.getenv('DB_HOST'))
+        db_username = os.getenv('SOURCE_DB_USERNAME', os.getenv('DB_USERNAME'))
+        db_password = os.getenv('SOURCE_DB_PASSWORD', os.getenv('DB_PASSWORD'))
+        db_name = os.getenv('SOURCE_DB_NAME', os.getenv('DB_NAME'))
 
         conn = mysql.connector.connect(
             host=db_host,
@@ -36,226 +66,214 @@ def get_mysql_connection():
         print(f"Error connecting to database: {err}")
         return None
 
-def migrate_users():
-    """Migrate users from MySQL to SQLAlchemy"""
-    print("Migrating users...")
-    conn = get_mysql_connection()
-    if not conn:
-        return False
-    
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM User")
-    users = cursor.fetchall()
-    
-    with Session(engine) as session:
-        for user in users:
-            new_user = User(
-                UserID=user['UserID'],
-                FirstName=user['FirstName'],
-                LastName=user['LastName'],
-                Password=user['Password'],
-                UserType=user['UserType']
-            )
-            session.add(new_user)
-        
-        try:
-            session.commit()
-            print(f"Migrated {len(users)} users")
-            return True
-        except Exception as e:
-            session.rollback()
-            print(f"Error migrating users: {e}")
-            return False
-    
-    cursor.close()
-    conn.close()
-
-def migrate_students():
-    """Migrate students from MySQL to SQLAlchemy"""
-    print("Migrating students...")
-    conn = get_mysql_connection()
-    if not conn:
-        return False
-    
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM Student")
-    students = cursor.fetchall()
-    
-    with Session(engine) as session:
-        for student in students:
-            new_student = Student(
-                StudentID=student['StudentID']
-            )
-            session.add(new_student)
-        
-        try:
-            session.commit()
-            print(f"Migrated {len(students)} students")
-            return True
-        except Exception as e:
-            session.rollback()
-            print(f"Error migrating students: {e}")
-            return False
-    
-    cursor.close()
-    conn.close()
-
-def migrate_lecturers():
-    """Migrate lecturers from MySQL to SQLAlchemy"""
-    print("Migrating lecturers...")
-    conn = get_mysql_connection()
-    if not conn:
-        return False
-    
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM Lecturer")
-    lecturers = cursor.fetchall()
-    
-    with Session(engine) as session:
-        for lecturer in lecturers:
-            new_lecturer = Lecturer(
-                LecturerID=lecturer['LecturerID']
-            )
-            session.add(new_lecturer)
-        
-        try:
-            session.commit()
-            print(f"Migrated {len(lecturers)} lecturers")
-            return True
-        except Exception as e:
-            session.rollback()
-            print(f"Error migrating lecturers: {e}")
-            return False
-    
-    cursor.close()
-    conn.close()
-
-def migrate_admins():
-    """Migrate admins from MySQL to SQLAlchemy"""
-    print("Migrating admins...")
-    conn = get_mysql_connection()
-    if not conn:
-        return False
-    
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM Admin")
-    admins = cursor.fetchall()
-    
-    with Session(engine) as session:
-        for admin in admins:
-            new_admin = Admin(
-                AdminID=admin['AdminID']
-            )
-            session.add(new_admin)
-        
-        try:
-            session.commit()
-            print(f"Migrated {len(admins)} admins")
-            return True
-        except Exception as e:
-            session.rollback()
-            print(f"Error migrating admins: {e}")
-            return False
-    
-    cursor.close()
-    conn.close()
-
-def migrate_courses():
-    """Migrate courses from MySQL to SQLAlchemy"""
-    print("Migrating courses...")
-    conn = get_mysql_connection()
-    if not conn:
-        return False
-    
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM Course")
-    courses = cursor.fetchall()
-    
-    with Session(engine) as session:
-        for course in courses:
-            new_course = Course(
-                CourseCode=course['CourseCode'],
-                CourseName=course['CourseName'],
-                LecturerID=course['LecturerID'],
-                AdminID=course['AdminID']
-            )
-            session.add(new_course)
-        
-        try:
-            session.commit()
-            print(f"Migrated {len(courses)} courses")
-            return True
-        except Exception as e:
-            session.rollback()
-            print(f"Error migrating courses: {e}")
-            return False
-    
-    cursor.close()
-    conn.close()
-
-def migrate_assignments():
-    """Migrate assignments from MySQL to SQLAlchemy"""
-    print("Migrating assignments...")
+class Checkpoint:
+    """
+    Progress of each table's migration, persisted as JSON: whether copying has
+    started, the number of rows copied and whether the table is finished. Where
+    to resume is read from the target table itself (see target_last_key).
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('MIGRATION_CHECKPOINT_PATH', DEFAULT_CHECKPOINT_PATH)
+        # Tables migrate on several threads, all recording progress here
+        self.lock = threading.Lock()
+        self.tables = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.tables = json.load(f)
+
+    def get(self, table_name):
+        return dict({'started': False, 'rows': 0, 'done': False}, **self.tables.get(table_name, {}))
+
+    def update(self, table_name, **progress):
+        with self.lock:
+            self.tables[table_name] = dict(self.get(table_name), **progress)
+            self.save()
+
+    def reset(self):
+        self.tables = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def save(self):
+        # Write to a temporary file first so a crash never leaves a truncated checkpoint
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.tables, f, indent=2, sort_keys=True, default=str)
+        os.replace(tmp_path, self.path)
+
+def target_last_key(table):
+    """Primary key of the last row of `table` in the target database, or None if it is empty"""
+    key_columns = list(table.primary_key.columns)
+    query = select(*key_columns).order_by(*[column.desc() for column in key_columns]).limit(1)
+    with engine.connect() as target:
+        row = target.execute(query).first()
+    return list(row) if row is not None else None
+
+def migrate_table(table, checkpoint, chunk_size=CHUNK_SIZE):
+    """
+    Copy one table from the source database, resuming after the last row
+    already in the target. Returns the number of rows copied by this call, or
+    None on failure.
+    """
+    progress = checkpoint.get(table.name)
+    if progress['done']:
+        print(f"{table.name}: already migrated ({progress['rows']} rows), skipping")
+        return 0
+
+    columns = [column.name for column in table.columns]
+    key_columns = [column.name for column in table.primary_key.columns]
+
+    # The checkpoint is written after each chunk commits, so a crash in between
+    # leaves it one chunk behind; resume after the last row the target holds
+    try:
+        last_key = target_last_key(table)
+    except Exception as e:
+        print(f"Error reading {table.name} in the target database: {e}")
+        return None
+    if last_key is not None and not progress['started']:
+        print(f"{table.name}: the target table already holds rows; empty it before migrating it")
+        return None
+    if not progress['started']:
+        checkpoint.update(table.name, started=True)
+
+    query = f"SELECT {', '.join(columns)} FROM {table.name}"
+    params = []
+    if last_key is not None:
+        condition, params = keyset_condition(key_columns, last_key, descending=False)
+        query += f" WHERE {condition}"
+        print(f"{table.name}: resuming after key {last_key}")
+    query += f" ORDER BY {', '.join(key_columns)}"
+
     conn = get_mysql_connection()
     if not conn:
-        return False
-    
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM Assignment")
-    assignments = cursor.fetchall()
-    
-    with Session(engine) as session:
-        for assignment in assignments:
-            new_assignment = Assignment(
-                AssignmentID=assignment['AssignmentID'],
-                CourseCode=assignment['CourseCode'],
-                Content=assignment['Content'],
-                DueDate=assignment['DueDate']
-            )
-            session.add(new_assignment)
-        
+        return None
+
+    # Unbuffered, so rows stream from the server a chunk at a time
+    cursor = conn.cursor(buffered=False)
+    copied = 0
+    start_time = time.time()
+    try:
+        cursor.execute(query, params)
+        insert = table.insert()
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+
+            # One executemany insert and one commit per chunk
+            with engine.begin() as target:
+                target.execute(insert, [dict(zip(columns, row)) for row in rows])
+
+            copied += len(rows)
+            checkpoint.update(table.name, rows=progress['rows'] + copied)
+
+        checkpoint.update(table.name, done=True)
+        elapsed = time.time() - start_time
+        print(f"{table.name}: migrated {copied} rows in {elapsed:.1f}s "
+              f"({copied / elapsed if elapsed > 0 else 0:.0f} rows/sec)")
+        return copied
+
+    except Exception as e:
+        print(f"Error migrating {table.name} after {copied} rows: {e}")
+        return None
+
+    finally:
         try:
-            session.commit()
-            print(f"Migrated {len(assignments)} assignments")
-            return True
-        except Exception as e:
-            session.rollback()
-            print(f"Error migrating assignments: {e}")
-            return False
-    
-    cursor.close()
-    conn.close()
-
-# Add similar functions for other tables...
-
-def migrate_all():
+            cursor.close()
+        except mysql.connector.Error:
+            pass  # rows left unread after a failed chunk; closing the connection discards them
+        conn.close()
+
+def table_dependencies(tables):
+    """
+    {table: set of tables it must wait for}: the tables its foreign keys
+    reference, among `tables`. Self-references (Reply.ParentReplyID) are
+    ignored; rows are copied in key order, so parents precede their children.
+    """
+    selected = set(tables)
+    return {table: {fk.column.table for fk in table.foreign_keys
+                    if fk.column.table is not table and fk.column.table in selected}
+            for table in tables}
+
+def timed_migrate(table, checkpoint, chunk_size):
+    start_time = time.time()
+    copied = migrate_table(table, checkpoint, chunk_size)
+    return copied, time.time() - start_time
+
+def print_summary(results, wall_time):
+    print("\n=== Migration Summary ===")
+    print(f"{'Table':<24}{'Rows':>12}{'Seconds':>10}{'Rows/sec':>12}")
+    total_rows = 0
+    for table_name, (copied, elapsed) in results.items():
+        total_rows += copied
+        rate = copied / elapsed if elapsed > 0 else 0
+        print(f"{table_name:<24}{copied:>12}{elapsed:>10.1f}{rate:>12.0f}")
+    rate = total_rows / wall_time if wall_time > 0 else 0
+    print(f"{'Total (wall time)':<24}{total_rows:>12}{wall_time:>10.1f}{rate:>12.0f}")
+
+def migrate_all(table_names=None, chunk_size=CHUNK_SIZE, restart=False, workers=4):
     """Migrate all data from MySQL to SQLAlchemy"""
     print("Starting data migration...")
-    
-    # Order matters due to foreign key constraints
-    migration_functions = [
-        migrate_users,
-        migrate_students,
-        migrate_lecturers,
-        migrate_admins,
-        migrate_courses,
-        migrate_assignments,
-        # Add other migration functions here
-    ]
-    
-    success = True
-    for migrate_func in migration_functions:
-        if not migrate_func():
-            success = False
-            print(f"Migration failed at {migrate_func.__name__}")
-            break
-    
-    if success:
+
+    checkpoint = Checkpoint()
+    if restart:
+        checkpoint.reset()
+
+    tables = [table for table in Base.metadata.sorted_tables
+              if table_names is None or table.name in table_names]
+    dependencies = table_dependencies(tables)
+    dependents = {table: [] for table in tables}
+    for table, referenced in dependencies.items():
+        for parent in referenced:
+            dependents[parent].append(table)
+    waiting = {table: len(referenced) for table, referenced in dependencies.items()}
+
+    results = {}
+    failed = []
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        running = {pool.submit(timed_migrate, table, checkpoint, chunk_size): table
+                   for table in tables if waiting[table] == 0}
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                table = running.pop(future)
+                copied, elapsed = future.result()
+                if copied is None:
+                    # Tables that reference this one are never started
+                    failed.append(table.name)
+                    continue
+                results[table.name] = (copied, elapsed)
+                for dependent in dependents[table]:
+                    waiting[dependent] -= 1
+                    if waiting[dependent] == 0:
+                        running[pool.submit(timed_migrate, dependent, checkpoint, chunk_size)] = dependent
+
+    print_summary(results, time.time() - start_time)
+
+    if not failed:
         print("All data migrated successfully!")
-    else:
-        print("Migration failed. Please check the errors above.")
-    
-    return success
+        return True
+
+    skipped = [table.name for table in tables if table.name not in results and table.name not in failed]
+    print(f"Migration failed at {', '.join(failed)}")
+    if skipped:
+        print(f"Not started because a table they reference failed: {', '.join(skipped)}")
+    print("Run the script again to resume from the last committed chunks.")
+    return False
 
 if __name__ == "__main__":
-    migrate_all()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Copy every table from the source MySQL database")
+    parser.add_argument("--table", dest="tables", action="append",
+                        choices=[table.name for table in Base.metadata.sorted_tables],
+                        help="Table to migrate (repeatable, default: all)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows per insert and commit")
+    parser.add_argument("--restart", action="store_true", help="Discard the checkpoint and start from the beginning (the target tables must be empty)")
+    parser.add_argument("--workers", type=int, default=4, help="Tables to copy concurrently")
+
+    args = parser.parse_args()
+
+    migrate_all(args.tables, args.chunk_size, args.restart, args.workers)
@@ -0,0 +1,41 @@
+"""Add stored vote tallies to threads and replies
+
+Revision ID: 5b2e9c1d7a43
+Revises: 03f6c760e58e
+Create Date: 2026-10-18 09:12:41.207315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2e9c1d7a43'
+down_revision = '03f6c760e58e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('DiscussionThread', sa.Column('Votes', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('Reply', sa.Column('Votes', sa.Integer(), server_default='0', nullable=False))
+
+    # Seed the tallies from the existing votes; backfill.py --votes can re-run this later.
+    # UpdatedAt is assigned to itself so ON UPDATE CURRENT_TIMESTAMP leaves it alone
+    op.execute("""
+        UPDATE DiscussionThread t
+        JOIN (SELECT ThreadID, SUM(Vote) AS total FROM ThreadVote GROUP BY ThreadID) v
+            ON t.ThreadID = v.ThreadID
+        SET t.Votes = v.total, t.UpdatedAt = t.UpdatedAt
+    """)
+    op.execute("""
+        UPDATE Reply r
+        JOIN (SELECT ReplyID, SUM(Vote) AS total FROM ReplyVote GROUP BY ReplyID) v
+            ON r.ReplyID = v.ReplyID
+        SET r.Votes = v.total
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('Reply', 'Votes')
+    op.drop_column('DiscussionThread', 'Votes')
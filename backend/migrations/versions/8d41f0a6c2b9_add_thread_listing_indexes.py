@@ -0,0 +1,30 @@
+"""Add composite indexes for paginated thread listings
+
+Revision ID: 8d41f0a6c2b9
+Revises: 5b2e9c1d7a43
+Create Date: 2026-10-18 11:03:17.554902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41f0a6c2b9'
+down_revision = '5b2e9c1d7a43'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Match the ORDER BY of /threads/<forum_id> for sort=new and sort=top
+    op.create_index('ix_thread_forum_created', 'DiscussionThread', ['ForumID', 'CreatedAt', 'ThreadID'])
+    op.create_index('ix_thread_forum_votes', 'DiscussionThread', ['ForumID', 'Votes', 'CreatedAt', 'ThreadID'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_thread_forum_votes', table_name='DiscussionThread')
+    # MySQL dropped the index it created for the ForumID foreign key when these
+    # indexes were added; restore it first, or the last drop fails with error 1553
+    op.create_index('ForumID', 'DiscussionThread', ['ForumID'])
+    op.drop_index('ix_thread_forum_created', table_name='DiscussionThread')
@@ -0,0 +1,53 @@
+"""Add materialized paths to replies
+
+Revision ID: a9d27e4c6b13
+Revises: f3a8c1d0b5e2
+Create Date: 2026-10-18 17:20:09.845126
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d27e4c6b13'
+down_revision = 'f3a8c1d0b5e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('Reply', sa.Column('Path', mysql.VARCHAR(length=1024, charset='ascii', collation='ascii_bin'), server_default='', nullable=False))
+    op.add_column('Reply', sa.Column('Depth', sa.SmallInteger(), server_default='0', nullable=False))
+
+    # Seed the paths of existing replies; backfill.py --reply-paths can re-run this in batches
+    op.execute("""
+        UPDATE Reply r
+        JOIN (
+            WITH RECURSIVE tree (ReplyID, Path, Depth) AS (
+                SELECT ReplyID, CAST(LPAD(HEX(ReplyID), 8, '0') AS CHAR(1024) CHARACTER SET ascii), 0
+                FROM Reply
+                WHERE ParentReplyID IS NULL
+                UNION ALL
+                SELECT child.ReplyID, CONCAT(tree.Path, LPAD(HEX(child.ReplyID), 8, '0')), tree.Depth + 1
+                FROM Reply child
+                JOIN tree ON child.ParentReplyID = tree.ReplyID
+            )
+            SELECT ReplyID, Path, Depth FROM tree
+        ) t ON r.ReplyID = t.ReplyID
+        SET r.Path = t.Path, r.Depth = t.Depth
+    """)
+
+    # Subtrees by path, top-level replies in posting order, and a reply's children in posting order
+    op.create_index('ix_reply_thread_path', 'Reply', ['ThreadID', 'Path'])
+    op.create_index('ix_reply_thread_depth_date', 'Reply', ['ThreadID', 'Depth', 'ReplyDate', 'ReplyID'])
+    op.create_index('ix_reply_parent_date', 'Reply', ['ParentReplyID', 'ReplyDate', 'ReplyID'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reply_parent_date', table_name='Reply')
+    op.drop_index('ix_reply_thread_depth_date', table_name='Reply')
+    op.drop_index('ix_reply_thread_path', table_name='Reply')
+    op.drop_column('Reply', 'Depth')
+    op.drop_column('Reply', 'Path')
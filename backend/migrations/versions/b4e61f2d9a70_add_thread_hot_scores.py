@@ -0,0 +1,45 @@
+"""Add reply counts and hot scores to threads
+
+Revision ID: b4e61f2d9a70
+Revises: a9d27e4c6b13
+Create Date: 2026-10-18 18:11:36.402874
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4e61f2d9a70'
+down_revision = 'a9d27e4c6b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('DiscussionThread', sa.Column('ReplyCount', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('DiscussionThread', sa.Column('HotScore', sa.Float(precision=53), server_default='0', nullable=False))
+
+    # Seed from the existing replies; thread_ranking.py --refresh can re-run this in batches
+    op.execute("""
+        UPDATE DiscussionThread t
+        JOIN (SELECT ThreadID, COUNT(*) AS total FROM Reply GROUP BY ThreadID) r ON t.ThreadID = r.ThreadID
+        SET t.ReplyCount = r.total, t.UpdatedAt = t.UpdatedAt
+    """)
+    # Written out rather than imported from thread_ranking.py so this revision
+    # keeps producing the same scores if the constants there change
+    op.execute("""
+        UPDATE DiscussionThread
+        SET HotScore = SIGN(Votes + 2 * ReplyCount) * LOG10(GREATEST(ABS(Votes + 2 * ReplyCount), 1))
+                       + TIMESTAMPDIFF(SECOND, '2026-01-01 00:00:00', CreatedAt) / 45000,
+            UpdatedAt = UpdatedAt
+    """)
+
+    # Match the ORDER BY of /threads/<forum_id>?sort=hot
+    op.create_index('ix_thread_forum_hot', 'DiscussionThread', ['ForumID', 'HotScore', 'ThreadID'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_thread_forum_hot', table_name='DiscussionThread')
+    op.drop_column('DiscussionThread', 'HotScore')
+    op.drop_column('DiscussionThread', 'ReplyCount')
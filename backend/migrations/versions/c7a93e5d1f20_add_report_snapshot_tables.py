@@ -0,0 +1,67 @@
+"""Add report snapshot tables
+
+Revision ID: c7a93e5d1f20
+Revises: 8d41f0a6c2b9
+Create Date: 2026-10-18 12:26:54.913028
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a93e5d1f20'
+down_revision = '8d41f0a6c2b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('ReportSnapshot',
+    sa.Column('ReportName', sa.String(length=50), nullable=False),
+    sa.Column('RefreshedAt', sa.DateTime(), nullable=False),
+    sa.Column('RowCount', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('ReportName')
+    )
+    op.create_table('ReportPopularCourses',
+    sa.Column('CourseCode', sa.String(length=8), nullable=False),
+    sa.Column('CourseName', sa.String(length=255), nullable=False),
+    sa.Column('StudentCount', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('CourseCode')
+    )
+    op.create_table('ReportActiveStudents',
+    sa.Column('StudentID', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('FirstName', sa.String(length=100), nullable=False),
+    sa.Column('LastName', sa.String(length=100), nullable=False),
+    sa.Column('CourseCount', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('StudentID')
+    )
+    op.create_table('ReportBusyLecturers',
+    sa.Column('LecturerID', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('FirstName', sa.String(length=100), nullable=False),
+    sa.Column('LastName', sa.String(length=100), nullable=False),
+    sa.Column('CourseCount', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('LecturerID')
+    )
+    op.create_table('ReportTopCourses',
+    sa.Column('CourseCode', sa.String(length=8), nullable=False),
+    sa.Column('CourseName', sa.String(length=255), nullable=False),
+    sa.Column('StudentCount', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('CourseCode')
+    )
+    op.create_table('ReportTopStudents',
+    sa.Column('StudentID', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('FirstName', sa.String(length=100), nullable=False),
+    sa.Column('LastName', sa.String(length=100), nullable=False),
+    sa.Column('AverageScore', sa.DECIMAL(precision=9, scale=6), nullable=True),
+    sa.PrimaryKeyConstraint('StudentID')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('ReportTopStudents')
+    op.drop_table('ReportTopCourses')
+    op.drop_table('ReportBusyLecturers')
+    op.drop_table('ReportActiveStudents')
+    op.drop_table('ReportPopularCourses')
+    op.drop_table('ReportSnapshot')
@@ -0,0 +1,36 @@
+"""Add FULLTEXT indexes for /search
+
+Revision ID: d52a7c9e3f18
+Revises: b4e61f2d9a70
+Create Date: 2026-10-18 19:02:47.915306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd52a7c9e3f18'
+down_revision = 'b4e61f2d9a70'
+branch_labels = None
+depends_on = None
+
+# The column lists must match the MATCH() clauses in search.py exactly.
+# The first FULLTEXT index on a table rebuilds it to add FTS_DOC_ID, so expect
+# this revision to take a while on a seeded database.
+INDEXES = [
+    ('ft_thread_title_content', 'DiscussionThread', ['ThreadTitle', 'Content']),
+    ('ft_reply_content', 'Reply', ['Content']),
+    ('ft_course_name', 'Course', ['CourseName']),
+    ('ft_sectionitem_title_description', 'SectionItem', ['ItemTitle', 'Description']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, mysql_prefix='FULLTEXT')
+
+
+def downgrade() -> None:
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
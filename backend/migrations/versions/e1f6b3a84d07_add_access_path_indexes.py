@@ -0,0 +1,43 @@
+"""Add composite indexes for the API's access paths
+
+Revision ID: e1f6b3a84d07
+Revises: c7a93e5d1f20
+Create Date: 2026-10-18 13:41:08.336170
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1f6b3a84d07'
+down_revision = 'c7a93e5d1f20'
+branch_labels = None
+depends_on = None
+
+# DiscussionThread(ForumID, CreatedAt) is already covered by ix_thread_forum_created
+# (ForumID, CreatedAt, ThreadID) from revision 8d41f0a6c2b9.
+# (name, table, columns, foreign key column it also serves). MySQL creates an
+# index for each foreign key when the table is created and silently drops it
+# once another index leads with the same column, so downgrade() has to put a
+# plain index back before dropping ours (otherwise error 1553).
+INDEXES = [
+    ('ix_enrol_user_course', 'Enrol', ['UserID', 'CourseCode'], 'UserID'),
+    ('ix_assignment_course_due', 'Assignment', ['CourseCode', 'DueDate'], 'CourseCode'),
+    ('ix_event_course_date', 'CalendarEvents', ['CourseCode', 'EventDate'], 'CourseCode'),
+    ('ix_reply_thread_date', 'Reply', ['ThreadID', 'ReplyDate'], 'ThreadID'),
+    ('ix_course_lecturer', 'Course', ['LecturerID'], 'LecturerID'),
+    ('ix_submission_assignment', 'Submission', ['AssignmentID'], 'AssignmentID'),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns, _ in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, columns, foreign_key_column in reversed(INDEXES):
+        # Named like the index MySQL created for the foreign key originally
+        op.create_index(foreign_key_column, table, [foreign_key_column])
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,29 @@
+"""Add resource version counters for conditional GETs
+
+Revision ID: f3a8c1d0b5e2
+Revises: e1f6b3a84d07
+Create Date: 2026-10-18 16:02:47.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8c1d0b5e2'
+down_revision = 'e1f6b3a84d07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('ResourceVersion',
+    sa.Column('Resource', sa.String(length=100), nullable=False),
+    sa.Column('Version', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('UpdatedAt', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('Resource')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('ResourceVersion')
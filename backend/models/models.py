@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, DECIMAL, TIMESTAMP, func, UniqueConstraint, SmallInteger
+from sqlalchemy import Column, Integer, BigInteger, Float, String, Text, DateTime, ForeignKey, Enum, DECIMAL, TIMESTAMP, func, UniqueConstraint, SmallInteger, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.dialects import mysql
 from sqlalchemy.ext.declarative import declarative_base
 from .database import Base
 import enum
@@ -65,6 +66,11 @@ class Course(Base):
     LecturerID = Column(Integer, ForeignKey('Lecturer.LecturerID', ondelete="RESTRICT"), nullable=False)
     AdminID = Column(Integer, ForeignKey('Admin.AdminID', ondelete="RESTRICT"), nullable=False)
     
+    __table_args__ = (
+        Index('ix_course_lecturer', 'LecturerID'),
+        Index('ft_course_name', 'CourseName', mysql_prefix='FULLTEXT'),  # /search
+    )
+    
     # Relationships
     lecturer = relationship("Lecturer", back_populates="courses")
     admin = relationship("Admin", back_populates="courses")
@@ -83,6 +89,8 @@ class Assignment(Base):
     Content = Column(Text)
     DueDate = Column(DateTime)
     
+    __table_args__ = (Index('ix_assignment_course_due', 'CourseCode', 'DueDate'),)
+    
     # Relationships
     course = relationship("Course", back_populates="assignments")
     submissions = relationship("Submission", back_populates="assignment", cascade="all, delete-orphan")
@@ -97,6 +105,8 @@ class CalendarEvents(Base):
     EventDate = Column(DateTime, nullable=False)
     CreatedBy = Column(Integer, ForeignKey('User.UserID', ondelete="RESTRICT"), nullable=False)
     
+    __table_args__ = (Index('ix_event_course_date', 'CourseCode', 'EventDate'),)
+    
     # Relationships
     course = relationship("Course", back_populates="events")
     creator = relationship("User", back_populates="created_events")
@@ -124,6 +134,17 @@ class DiscussionThread(Base):
     CreatedBy = Column(Integer, ForeignKey('User.UserID', ondelete="RESTRICT"), nullable=False)
     CreatedAt = Column(DateTime, nullable=False, server_default=func.current_timestamp())
     UpdatedAt = Column(DateTime, nullable=False, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
+    Votes = Column(Integer, nullable=False, server_default='0')  # Running SUM(ThreadVote.Vote)
+    ReplyCount = Column(Integer, nullable=False, server_default='0')  # Running COUNT of Reply rows
+    HotScore = Column(Float(precision=53), nullable=False, server_default='0')  # See thread_ranking.py
+    
+    # Indexes backing the paginated thread listings (sort=new / sort=top / sort=hot)
+    __table_args__ = (
+        Index('ix_thread_forum_created', 'ForumID', 'CreatedAt', 'ThreadID'),
+        Index('ix_thread_forum_votes', 'ForumID', 'Votes', 'CreatedAt', 'ThreadID'),
+        Index('ix_thread_forum_hot', 'ForumID', 'HotScore', 'ThreadID'),
+        Index('ft_thread_title_content', 'ThreadTitle', 'Content', mysql_prefix='FULLTEXT'),  # /search
+    )
     
     # Relationships
     forum = relationship("DiscussionForum", back_populates="threads")
@@ -141,6 +162,18 @@ class Reply(Base):
     Content = Column(Text, nullable=False)
     CreatedBy = Column(Integer, ForeignKey('User.UserID', ondelete="RESTRICT"), nullable=False)
     ReplyDate = Column(DateTime, nullable=False, server_default=func.current_timestamp())
+    Votes = Column(Integer, nullable=False, server_default='0')  # Running SUM(ReplyVote.Vote)
+    # Ancestor ReplyIDs and its own, as 8 hex digits each, root first (see reply_tree.py)
+    Path = Column(mysql.VARCHAR(1024, charset='ascii', collation='ascii_bin'), nullable=False, server_default='')
+    Depth = Column(SmallInteger, nullable=False, server_default='0')  # 0 for a reply to the thread itself
+    
+    __table_args__ = (
+        Index('ix_reply_thread_date', 'ThreadID', 'ReplyDate'),
+        Index('ix_reply_thread_path', 'ThreadID', 'Path'),
+        Index('ix_reply_thread_depth_date', 'ThreadID', 'Depth', 'ReplyDate', 'ReplyID'),
+        Index('ix_reply_parent_date', 'ParentReplyID', 'ReplyDate', 'ReplyID'),
+        Index('ft_reply_content', 'Content', mysql_prefix='FULLTEXT'),  # /search
+    )
     
     # Relationships
     thread = relationship("DiscussionThread", back_populates="replies")
@@ -195,6 +228,8 @@ class SectionItem(Base):
     Filename = Column(String(255))
     Description = Column(Text)
     
+    __table_args__ = (Index('ft_sectionitem_title_description', 'ItemTitle', 'Description', mysql_prefix='FULLTEXT'),)  # /search
+    
     # Relationships
     section = relationship("Section", back_populates="items")
 
@@ -208,8 +243,11 @@ class Submission(Base):
     SubmissionContent = Column(Text)
     UploadDate = Column(DateTime, nullable=False, server_default=func.current_timestamp())
     
-    # Unique constraint
-    __table_args__ = (UniqueConstraint('StudentID', 'AssignmentID', name='uq_student_assignment'),)
+    # Unique constraint and lookup index
+    __table_args__ = (
+        UniqueConstraint('StudentID', 'AssignmentID', name='uq_student_assignment'),
+        Index('ix_submission_assignment', 'AssignmentID'),
+    )
     
     # Relationships
     student = relationship("Student", back_populates="submissions")
@@ -235,6 +273,70 @@ class Enrol(Base):
     CourseCode = Column(String(8), ForeignKey('Course.CourseCode'), primary_key=True)
     UserID = Column(Integer, ForeignKey('User.UserID'), primary_key=True)
     
+    # The primary key serves lookups by course; this one serves lookups by student
+    __table_args__ = (Index('ix_enrol_user_course', 'UserID', 'CourseCode'),)
+    
     # Relationships
     course = relationship("Course", back_populates="enrollments")
     user = relationship("User", back_populates="enrollments")
+
+# Report snapshot tables (rebuilt by reports.py, read by the /reports/* routes)
+
+# ReportSnapshot model
+class ReportSnapshot(Base):
+    __tablename__ = "ReportSnapshot"
+
+    ReportName = Column(String(50), primary_key=True)
+    RefreshedAt = Column(DateTime, nullable=False)
+    RowCount = Column(Integer, nullable=False, server_default='0')
+
+# ReportPopularCourses model
+class ReportPopularCourses(Base):
+    __tablename__ = "ReportPopularCourses"
+
+    CourseCode = Column(String(8), primary_key=True)
+    CourseName = Column(String(255), nullable=False)
+    StudentCount = Column(Integer, nullable=False)
+
+# ReportActiveStudents model
+class ReportActiveStudents(Base):
+    __tablename__ = "ReportActiveStudents"
+
+    StudentID = Column(Integer, primary_key=True, autoincrement=False)
+    FirstName = Column(String(100), nullable=False)
+    LastName = Column(String(100), nullable=False)
+    CourseCount = Column(Integer, nullable=False)
+
+# ReportBusyLecturers model
+class ReportBusyLecturers(Base):
+    __tablename__ = "ReportBusyLecturers"
+
+    LecturerID = Column(Integer, primary_key=True, autoincrement=False)
+    FirstName = Column(String(100), nullable=False)
+    LastName = Column(String(100), nullable=False)
+    CourseCount = Column(Integer, nullable=False)
+
+# ReportTopCourses model
+class ReportTopCourses(Base):
+    __tablename__ = "ReportTopCourses"
+
+    CourseCode = Column(String(8), primary_key=True)
+    CourseName = Column(String(255), nullable=False)
+    StudentCount = Column(Integer, nullable=False)
+
+# ReportTopStudents model
+class ReportTopStudents(Base):
+    __tablename__ = "ReportTopStudents"
+
+    StudentID = Column(Integer, primary_key=True, autoincrement=False)
+    FirstName = Column(String(100), nullable=False)
+    LastName = Column(String(100), nullable=False)
+    AverageScore = Column(DECIMAL(9, 6))
+
+# ResourceVersion model (bumped by the API's write routes, used for ETags; see conditional.py)
+class ResourceVersion(Base):
+    __tablename__ = "ResourceVersion"
+
+    Resource = Column(String(100), primary_key=True)
+    Version = Column(BigInteger, nullable=False, server_default='0')
+    UpdatedAt = Column(DateTime, nullable=False)
@@ -0,0 +1,81 @@
+"""
+Keyset (cursor) pagination helpers
+
+A page is requested with `limit` and, after the first page, the opaque
+`cursor` returned by the previous response. The cursor holds the sort key of
+the last row that was sent, so the next page is read with a WHERE clause on
+that key instead of an OFFSET, and page N costs the same as page 1 as long as
+an index matches the ORDER BY.
+"""
+
+import base64
+import json
+from datetime import datetime, date
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+class InvalidPageRequest(ValueError):
+    """Raised for a malformed limit or cursor"""
+
+def parse_limit(raw_limit, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Parse the `limit` query argument, clamping it to `maximum`"""
+    if raw_limit is None or raw_limit == '':
+        return default
+    try:
+        limit = int(raw_limit)
+    except (TypeError, ValueError):
+        raise InvalidPageRequest('limit must be an integer')
+    if limit < 1:
+        raise InvalidPageRequest('limit must be at least 1')
+    return min(limit, maximum)
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    return value
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+        raise InvalidPageRequest('Invalid cursor')
+    return value
+
+def encode_cursor(kind, key):
+    """Build an opaque cursor for `key` (a tuple of sort values) under a named ordering"""
+    payload = json.dumps([kind, [_encode_value(v) for v in key]], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, kind, key_length):
+    """Decode a cursor, checking it was issued for the same ordering"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_kind, key = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        key = [_decode_value(v) for v in key]
+    except InvalidPageRequest:
+        raise
+    except (ValueError, TypeError, UnicodeError):
+        raise InvalidPageRequest('Invalid cursor')
+    if cursor_kind != kind or len(key) != key_length:
+        raise InvalidPageRequest('Cursor does not match the requested sort order')
+    return tuple(key)
+
+def keyset_condition(columns, key, descending=True):
+    """
+    WHERE fragment selecting rows strictly after `key` in ORDER BY `columns`.
+
+    Written as nested OR/AND comparisons rather than a row constructor so that
+    MySQL turns it into an index range scan. Returns (sql, params).
+    """
+    op = '<' if descending else '>'
+    column, rest = columns[0], columns[1:]
+    if not rest:
+        return f"{column} {op} %s", [key[0]]
+    inner_sql, inner_params = keyset_condition(rest, key[1:], descending)
+    sql = f"({column} {op} %s OR ({column} = %s AND {inner_sql}))"
+    return sql, [key[0], key[0]] + inner_params
@@ -0,0 +1,170 @@
+"""
+Reply tree storage and paging
+
+Replies form a tree per thread through ParentReplyID. To read part of a tree
+without loading the whole thread, every reply also stores:
+
+- Path:  the ReplyIDs of its ancestors and of itself, root first, each written
+         as 8 upper-case hex digits. Reply 26 under reply 10 has the path
+         '0000000A0000001A'.
+- Depth: 0 for a reply to the thread itself, 1 for a reply to one of those, ...
+
+Every reply below reply X has a Path that starts with X's Path, so a subtree is
+one range scan on the (ThreadID, Path) index, and X's ancestors are the ids in
+its own Path, read by primary key. The helpers below cover the common tree
+queries without recursive SQL or loading the thread into Python:
+
+- reply_position(): a reply's thread, path and depth
+- subtree():        the replies below a reply, optionally depth-limited
+- ancestors():      the replies above a reply, root first
+- descendant_count()
+- load_reply_page(): a page of sibling replies with their subtrees nested
+
+Both columns are set by reply_to_thread when the reply is posted. They can be
+checked with `python backfill.py --check-reply-paths` and rebuilt with
+`python backfill.py --reply-paths`.
+"""
+
+from data_access import fetch_children
+from pagination import keyset_condition
+
+SEGMENT_LENGTH = 8
+PATH_LENGTH = 1024  # Reply.Path column size
+MAX_DEPTH = PATH_LENGTH // SEGMENT_LENGTH - 1  # deepest Depth a Path can hold
+
+REPLY_COLUMNS = """
+    r.replyid, r.parentreplyid, r.content, r.createdby, r.replydate,
+    u.firstname, u.lastname, r.votes, r.depth, r.path
+"""
+# Siblings are listed in posting order; replyid breaks ties between equal dates
+REPLY_SORT_KEY = ('r.replydate', 'r.replyid')
+
+def path_segment(reply_id):
+    return f"{reply_id:0{SEGMENT_LENGTH}X}"
+
+def child_path(parent_path, reply_id):
+    """Path of reply `reply_id` posted under a reply with `parent_path` (None for a top-level reply)"""
+    return (parent_path or '') + path_segment(reply_id)
+
+def path_ids(path):
+    """ReplyIDs in a path, root first; the last one is the reply's own"""
+    return [int(path[start:start + SEGMENT_LENGTH], 16) for start in range(0, len(path), SEGMENT_LENGTH)]
+
+def path_depth(path):
+    return len(path) // SEGMENT_LENGTH - 1
+
+def reply_position(cursor, reply_id):
+    """{replyid, threadid, path, depth} of a reply, or None if it does not exist"""
+    cursor.execute("SELECT replyid, threadid, path, depth FROM Reply WHERE replyid = %s", (reply_id,))
+    return cursor.fetchone()
+
+def subtree(cursor, roots, max_depth=None):
+    """
+    Every reply below the given replies (rows from reply_position, all in one
+    thread), at most `max_depth` levels below the shallowest of them, in path
+    order: each reply comes after its parent. One range scan per root.
+    """
+    if not roots:
+        return []
+    prefixes = " OR ".join(["r.path LIKE %s"] * len(roots))
+    params = [roots[0]['threadid'], *[root['path'] + '%' for root in roots]]
+    query = f"""
+        SELECT {REPLY_COLUMNS}
+        FROM Reply r
+        LEFT JOIN User u ON r.createdby = u.userid
+        WHERE r.threadid = %s AND ({prefixes}) AND r.depth > %s
+    """
+    top_depth = min(root['depth'] for root in roots)
+    params.append(top_depth)
+    if max_depth is not None:
+        query += " AND r.depth <= %s"
+        params.append(top_depth + max_depth)
+    cursor.execute(query + " ORDER BY r.path", tuple(params))
+    return cursor.fetchall()
+
+def ancestors(cursor, reply, include_self=False):
+    """The replies above `reply` (a row with a path), top-level reply first, optionally followed by the reply"""
+    ids = path_ids(reply['path'])
+    if not include_self:
+        ids = ids[:-1]
+    if not ids:
+        return []
+    placeholders = ", ".join(["%s"] * len(ids))
+    cursor.execute(f"""
+        SELECT {REPLY_COLUMNS}
+        FROM Reply r
+        LEFT JOIN User u ON r.createdby = u.userid
+        WHERE r.replyid IN ({placeholders})
+        ORDER BY r.depth
+    """, tuple(ids))
+    return cursor.fetchall()
+
+def descendant_count(cursor, reply):
+    """Number of replies anywhere below `reply`, counted on the (ThreadID, Path) index"""
+    cursor.execute("SELECT COUNT(*) AS total FROM Reply WHERE threadid = %s AND path LIKE %s AND depth > %s",
+                   (reply['threadid'], reply['path'] + '%', reply['depth']))
+    row = cursor.fetchone()
+    return row['total'] if isinstance(row, dict) else row[0]
+
+def load_reply_page(cursor, thread_id, parent=None, limit=20, after=None, depth=0):
+    """
+    One page of the replies directly under `parent` (a row with replyid, path
+    and depth, or None for the thread's top-level replies), in posting order,
+    after the sort key `after`. Each reply carries its descendants up to
+    `depth` levels further down, nested in 'children', and a 'childCount'; a
+    reply whose children were not loaded has an empty 'children' list but a
+    non-zero 'childCount', so the client knows to fetch them on demand.
+
+    The cursor must return dictionaries. Returns (replies, next_key), where
+    next_key is the sort key of the last reply if more replies follow.
+    """
+    query = f"SELECT {REPLY_COLUMNS} FROM Reply r LEFT JOIN User u ON r.createdby = u.userid WHERE "
+    if parent is None:
+        query += "r.threadid = %s AND r.depth = 0"
+        params = [thread_id]
+    else:
+        query += "r.parentreplyid = %s"
+        params = [parent['replyid']]
+    if after:
+        condition, condition_params = keyset_condition(REPLY_SORT_KEY, after, descending=False)
+        query += f" AND {condition}"
+        params.extend(condition_params)
+    query += " ORDER BY r.replydate, r.replyid LIMIT %s"
+    params.append(limit + 1)
+    cursor.execute(query, tuple(params))
+    page = cursor.fetchall()
+
+    next_key = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_key = [page[-1]['replydate'], page[-1]['replyid']]
+    if not page:
+        return [], None
+
+    page_depth = page[0]['depth']
+    nodes = {reply['replyid']: dict(reply, children=[]) for reply in page}
+
+    if depth > 0:
+        roots = [dict(reply, threadid=thread_id) for reply in page]
+        # Path order puts every reply after its parent
+        for reply in subtree(cursor, roots, max_depth=depth):
+            nodes[reply['replyid']] = dict(reply, children=[])
+            nodes[reply['parentreplyid']]['children'].append(nodes[reply['replyid']])
+        for node in nodes.values():
+            node['children'].sort(key=lambda child: (child['replydate'], child['replyid']))
+
+    # Replies on the last loaded level need their children counted
+    deepest = page_depth + depth
+    boundary = [reply_id for reply_id, node in nodes.items() if node['depth'] == deepest]
+    counts = fetch_children(cursor, """
+        SELECT parentreplyid, COUNT(*) AS childcount
+        FROM Reply
+        WHERE parentreplyid IN ({ids})
+        GROUP BY parentreplyid
+    """, boundary, key='parentreplyid')
+    for reply_id, node in nodes.items():
+        counted = counts.get(reply_id)
+        node['childCount'] = counted[0]['childcount'] if counted else len(node['children'])
+        del node['path']
+
+    return [nodes[reply['replyid']] for reply in page], next_key
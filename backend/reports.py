@@ -0,0 +1,216 @@
+"""
+Report snapshots
+
+The /reports/* routes aggregate over Enrol, Course, Submission and Grade. Rather
+than running those GROUP BYs on every request, each report's result is stored in
+its own snapshot table and the routes read that table back. Snapshots are
+rebuilt by refresh_reports(), which is run on a schedule (see --service below)
+or on demand through POST /reports/refresh. ReportSnapshot records when each
+report was last rebuilt.
+
+Usage:
+    python reports.py --refresh                        # rebuild every report once
+    python reports.py --refresh --report top_courses   # rebuild selected reports
+    python reports.py --service --interval 15          # rebuild every 15 minutes
+"""
+
+import time
+
+# name -> snapshot table, the query that rebuilds it and the query that reads it back.
+# The read queries alias columns to the names the report routes have always returned.
+REPORTS = {
+    'popular_courses': {
+        'table': 'ReportPopularCourses',
+        'build': """
+            INSERT INTO ReportPopularCourses (CourseCode, CourseName, StudentCount)
+            SELECT c.coursecode, c.coursename, count(e.UserID) AS student_count
+            FROM Course c
+            JOIN Enrol e ON c.coursecode = e.coursecode
+            GROUP BY c.coursecode
+            HAVING student_count >= 50
+        """,
+        'read': """
+            SELECT CourseCode AS coursecode, CourseName AS coursename, StudentCount AS student_count
+            FROM ReportPopularCourses
+            ORDER BY StudentCount DESC, CourseCode
+        """,
+    },
+    'active_students': {
+        'table': 'ReportActiveStudents',
+        'build': """
+            INSERT INTO ReportActiveStudents (StudentID, FirstName, LastName, CourseCount)
+            SELECT s.studentid, u.firstname, u.lastname, count(e.coursecode) AS course_count
+            FROM Student s
+            JOIN User u ON s.studentid = u.userid
+            JOIN Enrol e ON s.studentid = e.UserID
+            GROUP BY s.studentid
+            HAVING course_count >= 5
+        """,
+        'read': """
+            SELECT StudentID AS studentid, FirstName AS firstname, LastName AS lastname, CourseCount AS course_count
+            FROM ReportActiveStudents
+            ORDER BY StudentID
+        """,
+    },
+    'busy_lecturers': {
+        'table': 'ReportBusyLecturers',
+        'build': """
+            INSERT INTO ReportBusyLecturers (LecturerID, FirstName, LastName, CourseCount)
+            SELECT l.lecturerid, u.firstname, u.lastname, count(c.coursecode) AS course_count
+            FROM Lecturer l
+            JOIN User u ON l.lecturerid = u.userid
+            JOIN Course c ON l.lecturerid = c.lecturerid
+            GROUP BY l.lecturerid
+            HAVING course_count >= 3
+        """,
+        'read': """
+            SELECT LecturerID AS lecturerid, FirstName AS firstname, LastName AS lastname, CourseCount AS course_count
+            FROM ReportBusyLecturers
+            ORDER BY LecturerID
+        """,
+    },
+    'top_courses': {
+        'table': 'ReportTopCourses',
+        'build': """
+            INSERT INTO ReportTopCourses (CourseCode, CourseName, StudentCount)
+            SELECT c.coursecode, c.coursename, count(e.userid) AS student_count
+            FROM Course c
+            JOIN Enrol e ON c.coursecode = e.coursecode
+            GROUP BY c.coursecode
+            ORDER BY student_count DESC
+            LIMIT 10
+        """,
+        'read': """
+            SELECT CourseCode AS coursecode, CourseName AS coursename, StudentCount AS student_count
+            FROM ReportTopCourses
+            ORDER BY StudentCount DESC, CourseCode
+        """,
+    },
+    'top_students': {
+        'table': 'ReportTopStudents',
+        'build': """
+            INSERT INTO ReportTopStudents (StudentID, FirstName, LastName, AverageScore)
+            SELECT s.studentid, u.firstname, u.lastname, avg(g.score) AS average_score
+            FROM Student s
+            JOIN User u ON s.studentid = u.userid
+            JOIN Submission sub ON s.studentid = sub.studentid
+            JOIN Grade g ON sub.submissionid = g.submissionid
+            GROUP BY s.studentid
+            ORDER BY average_score DESC
+            LIMIT 10
+        """,
+        'read': """
+            SELECT StudentID AS studentid, FirstName AS firstname, LastName AS lastname, AverageScore AS average_score
+            FROM ReportTopStudents
+            ORDER BY AverageScore DESC, StudentID
+        """,
+    },
+}
+
+class UnknownReport(KeyError):
+    """Raised when a report name is not in REPORTS"""
+
+def _report(name):
+    try:
+        return REPORTS[name]
+    except KeyError:
+        raise UnknownReport(name)
+
+def refresh_report(conn, name):
+    """
+    Rebuild one report snapshot in a single transaction. Readers keep seeing the
+    previous snapshot until the commit. Returns the new refresh timestamp.
+    """
+    report = _report(name)
+    cursor = conn.cursor()
+    try:
+        # Upserting the snapshot row first locks it, so concurrent refreshes of
+        # the same report queue up behind each other instead of interleaving
+        cursor.execute("""
+            INSERT INTO ReportSnapshot (ReportName, RefreshedAt, RowCount)
+            VALUES (%s, NOW(), 0)
+            ON DUPLICATE KEY UPDATE RefreshedAt = NOW()
+        """, (name,))
+        cursor.execute(f"DELETE FROM {report['table']}")
+        cursor.execute(report['build'])
+        row_count = cursor.rowcount
+        cursor.execute("UPDATE ReportSnapshot SET RowCount = %s WHERE ReportName = %s", (row_count, name))
+        cursor.execute("SELECT RefreshedAt FROM ReportSnapshot WHERE ReportName = %s", (name,))
+        refreshed_at = cursor.fetchone()[0]
+        conn.commit()
+        return refreshed_at
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def refresh_reports(conn, names=None):
+    """Rebuild the given reports (all of them by default); returns {name: refreshedAt}"""
+    return {name: refresh_report(conn, name) for name in (names or REPORTS)}
+
+def read_report(conn, name):
+    """
+    Return (rows, refreshed_at) for a report, building the snapshot first if it
+    has never been refreshed.
+    """
+    report = _report(name)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT RefreshedAt FROM ReportSnapshot WHERE ReportName = %s", (name,))
+        snapshot = cursor.fetchone()
+        if snapshot is None:
+            refreshed_at = refresh_report(conn, name)
+        else:
+            refreshed_at = snapshot['RefreshedAt']
+        cursor.execute(report['read'])
+        return cursor.fetchall(), refreshed_at
+    finally:
+        cursor.close()
+
+def run_refresh_service(get_connection, interval_minutes=15, names=None):
+    """Refresh the report snapshots at regular intervals"""
+    print(f"Starting report refresh service (interval: {interval_minutes} minutes)")
+    try:
+        while True:
+            conn = get_connection()
+            if conn:
+                try:
+                    start_time = time.time()
+                    refresh_reports(conn, names)
+                    print(f"Refreshed reports in {time.time() - start_time:.1f}s")
+                except Exception as e:
+                    print(f"Error refreshing reports: {e}")
+                finally:
+                    conn.close()
+            print(f"Next refresh in {interval_minutes} minutes...")
+            time.sleep(interval_minutes * 60)
+    except KeyboardInterrupt:
+        print("Report refresh service stopped by user")
+
+if __name__ == "__main__":
+    import argparse
+    from app import get_db_connection
+
+    parser = argparse.ArgumentParser(description="Rebuild report snapshot tables")
+    parser.add_argument("--report", dest="reports", action="append", choices=list(REPORTS),
+                        help="Report to rebuild (repeatable, default: all)")
+    parser.add_argument("--refresh", action="store_true", help="Rebuild the snapshots once")
+    parser.add_argument("--service", action="store_true", help="Keep rebuilding the snapshots on an interval")
+    parser.add_argument("--interval", type=int, default=15, help="Refresh interval in minutes (for service mode)")
+
+    args = parser.parse_args()
+
+    if args.service:
+        run_refresh_service(get_db_connection, args.interval, args.reports)
+    elif args.refresh:
+        conn = get_db_connection()
+        if not conn:
+            raise SystemExit("Database connection failed")
+        try:
+            for name, refreshed_at in refresh_reports(conn, args.reports).items():
+                print(f"{name}: refreshed at {refreshed_at}")
+        finally:
+            conn.close()
+    else:
+        parser.print_help()
@@ -1,4 +1,11 @@
 -- Active: 1745814531400@@127.0.0.1@3306@comp3161
+DROP TABLE IF EXISTS ResourceVersion;
+DROP TABLE IF EXISTS ReportTopStudents;
+DROP TABLE IF EXISTS ReportTopCourses;
+DROP TABLE IF EXISTS ReportBusyLecturers;
+DROP TABLE IF EXISTS ReportActiveStudents;
+DROP TABLE IF EXISTS ReportPopularCourses;
+DROP TABLE IF EXISTS ReportSnapshot;
 DROP TABLE IF EXISTS ReplyVote;
 DROP TABLE IF EXISTS ThreadVote;
 DROP TABLE IF EXISTS Grade;
@@ -49,6 +56,8 @@ CREATE TABLE Course (
     CourseName VARCHAR(255) NOT NULL,
     LecturerID INT(9) NOT NULL,
     AdminID INT(9) NOT NULL, -- The Admin responsible for managing the course setup
+    INDEX ix_course_lecturer (LecturerID), -- Courses taught by a lecturer
+    FULLTEXT INDEX ft_course_name (CourseName), -- /search
     FOREIGN KEY (AdminID) REFERENCES Admin(AdminID) ON DELETE RESTRICT -- Prevent deleting an Admin if they manage courses
 );
 
@@ -58,6 +67,7 @@ CREATE TABLE Assignment (
     CourseCode VARCHAR(8) NOT NULL,
     Content TEXT, 
     DueDate DATETIME,
+    INDEX ix_assignment_course_due (CourseCode, DueDate), -- A course's assignments by due date
     FOREIGN KEY (CourseCode) REFERENCES Course(CourseCode) ON DELETE CASCADE -- If Course is deleted, delete its Assignments
 );
 
@@ -68,6 +78,7 @@ CREATE TABLE CalendarEvents (
     EventName VARCHAR(255) NOT NULL,
     EventDate DATETIME NOT NULL,
     CreatedBy INT(9) NOT NULL, -- UserID of the person who created the event
+    INDEX ix_event_course_date (CourseCode, EventDate), -- A course's calendar by date
     FOREIGN KEY (CourseCode) REFERENCES Course(CourseCode) ON DELETE CASCADE, -- If Course is deleted, delete its Events
     FOREIGN KEY (CreatedBy) REFERENCES User(UserID) ON DELETE RESTRICT -- Or SET NULL if user deleted
 );
@@ -89,6 +100,13 @@ CREATE TABLE DiscussionThread (
     CreatedBy INT(9) NOT NULL, -- UserID of the thread creator
     CreatedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     UpdatedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    Votes INT NOT NULL DEFAULT 0, -- Running total of ThreadVote.Vote, maintained by the vote route
+    ReplyCount INT NOT NULL DEFAULT 0, -- Running count of Reply rows, maintained by the reply route
+    HotScore DOUBLE NOT NULL DEFAULT 0, -- Time-decayed engagement score (see thread_ranking.py)
+    INDEX ix_thread_forum_created (ForumID, CreatedAt, ThreadID), -- Thread listing, sort=new
+    INDEX ix_thread_forum_votes (ForumID, Votes, CreatedAt, ThreadID), -- Thread listing, sort=top
+    INDEX ix_thread_forum_hot (ForumID, HotScore, ThreadID), -- Thread listing, sort=hot
+    FULLTEXT INDEX ft_thread_title_content (ThreadTitle, Content), -- /search
     FOREIGN KEY (ForumID) REFERENCES DiscussionForum(ForumID) ON DELETE CASCADE, -- If Forum is deleted, delete its Threads
     FOREIGN KEY (CreatedBy) REFERENCES User(UserID) ON DELETE RESTRICT -- Or SET NULL if user deleted
 );
@@ -101,6 +119,14 @@ CREATE TABLE Reply (
     Content TEXT NOT NULL,
     CreatedBy INT(9) NOT NULL, -- UserID of the replier
     ReplyDate DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    Votes INT NOT NULL DEFAULT 0, -- Running total of ReplyVote.Vote, maintained by the vote route
+    Path VARCHAR(1024) CHARACTER SET ascii COLLATE ascii_bin NOT NULL DEFAULT '', -- Ancestor ReplyIDs and its own, 8 hex digits each, root first
+    Depth SMALLINT NOT NULL DEFAULT 0, -- 0 for a direct reply to the thread
+    INDEX ix_reply_thread_date (ThreadID, ReplyDate), -- A thread's replies in posting order
+    INDEX ix_reply_thread_path (ThreadID, Path), -- A reply's subtree as one range
+    INDEX ix_reply_thread_depth_date (ThreadID, Depth, ReplyDate, ReplyID), -- Top-level replies in posting order
+    INDEX ix_reply_parent_date (ParentReplyID, ReplyDate, ReplyID), -- A reply's children in posting order
+    FULLTEXT INDEX ft_reply_content (Content), -- /search
     FOREIGN KEY (ThreadID) REFERENCES DiscussionThread(ThreadID) ON DELETE CASCADE, -- If Thread is deleted, delete its Replies
     FOREIGN KEY (ParentReplyID) REFERENCES Reply(ReplyID) ON DELETE CASCADE, -- If a parent reply is deleted, delete child replies
     FOREIGN KEY (CreatedBy) REFERENCES User(UserID) ON DELETE RESTRICT -- Or SET NULL if user deleted
@@ -142,6 +168,7 @@ CREATE TABLE SectionItem (
     Link VARCHAR(2083), -- For external links
     Filename VARCHAR(255), -- For uploaded files
     Description TEXT,
+    FULLTEXT INDEX ft_sectionitem_title_description (ItemTitle, Description), -- /search
     FOREIGN KEY (SectionID) REFERENCES Section(SectionID) ON DELETE CASCADE -- If Section is deleted, delete its Items
 );
 
@@ -153,6 +180,7 @@ CREATE TABLE Submission (
     SubmissionContent TEXT, -- Could be text, or a path to an uploaded file
     UploadDate DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     UNIQUE (StudentID, AssignmentID), -- A student typically submits only once per assignment
+    INDEX ix_submission_assignment (AssignmentID), -- All submissions for an assignment
     FOREIGN KEY (StudentID) REFERENCES Student(StudentID) ON DELETE CASCADE, -- If Student record deleted, remove their submissions
     FOREIGN KEY (AssignmentID) REFERENCES Assignment(AssignmentID) ON DELETE CASCADE -- If Assignment deleted, remove its submissions
 );
@@ -170,6 +198,54 @@ CREATE TABLE Enrol (
     CourseCode VARCHAR(8) NOT NULL,
     UserID INT(9) NOT NULL, 
     PRIMARY KEY (CourseCode, UserID),
+    INDEX ix_enrol_user_course (UserID, CourseCode), -- A student's enrolments
     FOREIGN KEY (UserID) REFERENCES User(UserID),
     FOREIGN KEY (CourseCode) REFERENCES Course(CourseCode)
 );
+
+--  Report snapshots (rebuilt by reports.py / POST /reports/refresh, read by /reports/*)
+CREATE TABLE ReportSnapshot (
+    ReportName VARCHAR(50) PRIMARY KEY,
+    RefreshedAt DATETIME NOT NULL, -- When the report's snapshot table was last rebuilt
+    RowCount INT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE ReportPopularCourses (
+    CourseCode VARCHAR(8) PRIMARY KEY,
+    CourseName VARCHAR(255) NOT NULL,
+    StudentCount INT NOT NULL
+);
+
+CREATE TABLE ReportActiveStudents (
+    StudentID INT(9) PRIMARY KEY,
+    FirstName VARCHAR(100) NOT NULL,
+    LastName VARCHAR(100) NOT NULL,
+    CourseCount INT NOT NULL
+);
+
+CREATE TABLE ReportBusyLecturers (
+    LecturerID INT(9) PRIMARY KEY,
+    FirstName VARCHAR(100) NOT NULL,
+    LastName VARCHAR(100) NOT NULL,
+    CourseCount INT NOT NULL
+);
+
+CREATE TABLE ReportTopCourses (
+    CourseCode VARCHAR(8) PRIMARY KEY,
+    CourseName VARCHAR(255) NOT NULL,
+    StudentCount INT NOT NULL
+);
+
+CREATE TABLE ReportTopStudents (
+    StudentID INT(9) PRIMARY KEY,
+    FirstName VARCHAR(100) NOT NULL,
+    LastName VARCHAR(100) NOT NULL,
+    AverageScore DECIMAL(9, 6)
+);
+
+--  Version counters behind the API's ETags (bumped by the write routes, see conditional.py)
+CREATE TABLE ResourceVersion (
+    Resource VARCHAR(100) PRIMARY KEY, -- e.g. 'course:COMP3161', 'thread:42'
+    Version BIGINT NOT NULL DEFAULT 0,
+    UpdatedAt DATETIME NOT NULL -- UTC time of the last bump
+);
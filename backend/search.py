@@ -0,0 +1,212 @@
+"""
+Full-text search over forum posts, courses and course content
+
+/search matches a query against four kinds of document, each through its own
+MySQL FULLTEXT index (see migration d52a7c9e3f18):
+
+- thread:  DiscussionThread.ThreadTitle and Content
+- reply:   Reply.Content
+- course:  Course.CourseName
+- content: SectionItem.ItemTitle and Description
+
+Queries run in natural language mode, so results are ranked by InnoDB's
+relevance score. Words shorter than innodb_ft_min_token_size (3 by default)
+and stopwords are ignored. Each kind is scored against its own index, so scores
+are only roughly comparable across kinds; results are merged on them as they
+are.
+
+A search takes two queries. A UNION over the indexes finds one page of
+(kind, id, score) keys. The rows for that page are then loaded by primary key,
+so long bodies are read only for the results that are returned. Pages continue
+with a keyset cursor on (score, kind, id). Relevance scores shift as documents
+are added, so a result can move between pages while a busy forum is paged
+through.
+"""
+
+import html
+import re
+
+from data_access import fetch_children
+from pagination import keyset_condition
+
+SEARCH_SORT_KEY = ('hits.score', 'hits.kind', 'hits.id')
+MIN_TERM_LENGTH = 3  # innodb_ft_min_token_size
+SNIPPET_LENGTH = 160
+
+# kind -> the FULLTEXT columns as MATCH() must name them, the tables they are
+# searched in, the row id and course code, and the query loading rows by id.
+# Every 'load' query selects id, coursecode, title and body.
+SEARCH_SOURCES = {
+    'thread': {
+        'match': 't.threadtitle, t.content',
+        'from': 'DiscussionThread t JOIN DiscussionForum f ON t.forumid = f.forumid',
+        'id': 't.threadid',
+        'course': 'f.coursecode',
+        'load': """
+            SELECT t.threadid AS id, f.coursecode, t.threadtitle AS title, t.content AS body,
+                t.forumid, t.threadid, t.createdat
+            FROM DiscussionThread t
+            JOIN DiscussionForum f ON t.forumid = f.forumid
+            WHERE t.threadid IN ({ids})
+        """,
+    },
+    'reply': {
+        'match': 'r.content',
+        'from': """Reply r
+            JOIN DiscussionThread t ON r.threadid = t.threadid
+            JOIN DiscussionForum f ON t.forumid = f.forumid""",
+        'id': 'r.replyid',
+        'course': 'f.coursecode',
+        'load': """
+            SELECT r.replyid AS id, f.coursecode, t.threadtitle AS title, r.content AS body,
+                t.forumid, r.threadid, r.replydate AS createdat
+            FROM Reply r
+            JOIN DiscussionThread t ON r.threadid = t.threadid
+            JOIN DiscussionForum f ON t.forumid = f.forumid
+            WHERE r.replyid IN ({ids})
+        """,
+    },
+    'course': {
+        'match': 'c.coursename',
+        'from': 'Course c',
+        'id': 'c.coursecode',
+        'course': 'c.coursecode',
+        'load': """
+            SELECT c.coursecode AS id, c.coursecode, c.coursename AS title, NULL AS body
+            FROM Course c
+            WHERE c.coursecode IN ({ids})
+        """,
+    },
+    'content': {
+        'match': 'si.itemtitle, si.description',
+        'from': 'SectionItem si JOIN Section s ON si.sectionid = s.sectionid',
+        'id': 'si.sectionitemid',
+        'course': 's.coursecode',
+        'load': """
+            SELECT si.sectionitemid AS id, s.coursecode, si.itemtitle AS title, si.description AS body,
+                si.sectionid, si.link, si.filename
+            FROM SectionItem si
+            JOIN Section s ON si.sectionid = s.sectionid
+            WHERE si.sectionitemid IN ({ids})
+        """,
+    },
+}
+
+def query_terms(query):
+    """The words of a query that the FULLTEXT indexes can match, lower-cased, in order"""
+    terms = []
+    for word in re.findall(r'\w+', query.lower()):
+        if len(word) >= MIN_TERM_LENGTH and word not in terms:
+            terms.append(word)
+    return terms
+
+def term_pattern(terms):
+    """Regex matching any of `terms` as a whole word, or None if there are no terms"""
+    if not terms:
+        return None
+    return re.compile(r'\b(?:' + '|'.join(map(re.escape, terms)) + r')\b', re.IGNORECASE)
+
+def highlight(text, pattern, length=SNIPPET_LENGTH):
+    """
+    HTML snippet of about `length` characters from `text`, starting shortly
+    before the first match of `pattern`, with every match wrapped in <mark>.
+    Everything else is escaped.
+    """
+    if not text:
+        return ''
+    text = ' '.join(text.split())
+    first = pattern.search(text) if pattern else None
+
+    start = 0
+    if first and first.end() > length:
+        # Keep a little context before the match, starting on a word
+        start = text.find(' ', max(0, first.start() - length // 4)) + 1
+    end = min(len(text), start + length)
+    window = text[start:end]
+
+    parts = ['…'] if start else []
+    position = 0
+    for match in (pattern.finditer(window) if pattern else []):
+        parts.append(html.escape(window[position:match.start()]))
+        parts.append(f"<mark>{html.escape(match.group())}</mark>")
+        position = match.end()
+    parts.append(html.escape(window[position:]))
+    if end < len(text):
+        parts.append('…')
+    return ''.join(parts)
+
+def search(cursor, query, kinds, course_code=None, student_id=None, limit=20, after=None):
+    """
+    One page of the documents of the given kinds matching `query`, most
+    relevant first, after the sort key `after`. With `course_code`, only
+    documents of that course; with `student_id`, only documents of courses the
+    student is enrolled in.
+
+    The cursor must return dictionaries. Returns (results, next_key), where
+    next_key is the sort key of the last result if more results follow.
+    """
+    branches, params = [], []
+    for kind in kinds:
+        source = SEARCH_SOURCES[kind]
+        match = f"MATCH({source['match']}) AGAINST (%s IN NATURAL LANGUAGE MODE)"
+        branch = f"""
+            SELECT '{kind}' AS kind, {source['id']} AS id, {match} AS score
+            FROM {source['from']}
+            WHERE {match}
+        """
+        params.extend([query, query])
+        if course_code is not None:
+            branch += f" AND {source['course']} = %s"
+            params.append(course_code)
+        if student_id is not None:
+            branch += f" AND {source['course']} IN (SELECT coursecode FROM Enrol WHERE userid = %s)"
+            params.append(student_id)
+        branches.append(branch)
+
+    sql = f"SELECT hits.kind, hits.id, hits.score FROM ({' UNION ALL '.join(branches)}) hits"
+    if after:
+        condition, condition_params = keyset_condition(SEARCH_SORT_KEY, after)
+        sql += f" WHERE {condition}"
+        params.extend(condition_params)
+    sql += " ORDER BY hits.score DESC, hits.kind DESC, hits.id DESC LIMIT %s"
+    params.append(limit + 1)
+    cursor.execute(sql, tuple(params))
+    hits = cursor.fetchall()
+
+    next_key = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        next_key = [hits[-1]['score'], hits[-1]['kind'], hits[-1]['id']]
+    return load_results(cursor, hits, query), next_key
+
+def load_results(cursor, hits, query):
+    """
+    Search results for `hits` ({kind, id, score} dictionaries, best first): the
+    rows loaded by id with a highlighted snippet. Hits whose row no longer
+    exists are dropped.
+    """
+    # The UNION turns ids into strings when courses are included, so rows are matched on str(id)
+    rows = {}
+    for kind in SEARCH_SOURCES:
+        ids = [hit['id'] for hit in hits if hit['kind'] == kind]
+        if not ids:
+            continue
+        loaded = fetch_children(cursor, SEARCH_SOURCES[kind]['load'], ids, key='id')
+        for row_id, matched in loaded.items():
+            if matched:
+                rows[(kind, str(row_id))] = matched[0]
+
+    pattern = term_pattern(query_terms(query))
+    results = []
+    for hit in hits:
+        row = rows.get((hit['kind'], str(hit['id'])))
+        if row is None:
+            continue  # deleted since it was matched
+        result = {'type': hit['kind'], 'score': hit['score'], **row}
+        body, title = result.pop('body'), result['title']
+        # Quote the body unless only the title mentions the query
+        if not body or (pattern and not pattern.search(body) and pattern.search(title)):
+            body = title
+        result['snippet'] = highlight(body, pattern)
+        results.append(result)
+    return results
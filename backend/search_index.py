@@ -0,0 +1,491 @@
+"""
+In-process full-text index
+
+A fallback for /search where MySQL FULLTEXT is unavailable (the indexes of
+migration d52a7c9e3f18 are missing, or the server does not support them) or too
+coarse. SearchIndex is an inverted index over thread titles and bodies,
+replies and course content items, scored with BM25.
+
+Layout:
+
+- Documents are numbered 0..n-1. Per document the index keeps its kind, row
+  id, course and length in tokens, each as a flat integer array.
+- Each term maps to a postings list: the numbers of the documents containing
+  it, in ascending order, and the term's count in each, as two integer arrays.
+
+The index is saved as a generation directory of raw array files plus JSON for
+the term lexicon and metadata. It is opened with mmap, so a worker only pages in
+the postings its queries touch, and every worker shares the same pages.
+CURRENT names the active generation; it is replaced atomically after a new
+generation has been written.
+
+Documents added after the index was saved go into an in-memory segment that is
+searched together with the saved one:
+
+- reply_to_thread and add_course_content add their new row straight away, so
+  the worker that served the write sees it immediately;
+- every REFRESH_SECONDS a search reloads a newer saved generation if there is
+  one, and indexes rows with ids above the highest id the index has seen.
+
+`python search_index.py --service` keeps the saved generation current. Rows
+that are edited or deleted keep their old entry until the next --build; deleted
+rows are dropped from results when they are loaded.
+
+Usage:
+    python search_index.py --build                     # index everything from scratch
+    python search_index.py --update                    # add new rows and save a new generation
+    python search_index.py --service --interval 15     # --update every 15 minutes
+    python search_index.py --query "exam revision"     # time a search
+"""
+
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from array import array
+from collections import Counter
+
+from data_access import iter_chunks
+from pagination import InvalidPageRequest
+from search import load_results
+
+# Index kind codes; sorted, so ordering by code is ordering by name as /search does
+KINDS = ('content', 'reply', 'thread')
+K1 = 1.2
+B = 0.75
+REFRESH_SECONDS = 30
+FORMAT_VERSION = 1
+
+TOKEN_PATTERN = re.compile(r'\w+')
+STOPWORDS = frozenset("""
+    a an and are as at be but by for from has have he her his i if in into is it its me my no not of
+    on or our she so than that the their them then there these they this to was we were what when
+    which who will with you your
+""".split())
+
+# kind -> rows with an id above %s, as (id, coursecode, text), in id order
+INDEX_QUERIES = {
+    'thread': """
+        SELECT t.threadid AS id, f.coursecode, CONCAT_WS(' ', t.threadtitle, t.content) AS text
+        FROM DiscussionThread t
+        JOIN DiscussionForum f ON t.forumid = f.forumid
+        WHERE t.threadid > %s
+        ORDER BY t.threadid
+    """,
+    'reply': """
+        SELECT r.replyid AS id, f.coursecode, r.content AS text
+        FROM Reply r
+        JOIN DiscussionThread t ON r.threadid = t.threadid
+        JOIN DiscussionForum f ON t.forumid = f.forumid
+        WHERE r.replyid > %s
+        ORDER BY r.replyid
+    """,
+    'content': """
+        SELECT si.sectionitemid AS id, s.coursecode, CONCAT_WS(' ', si.itemtitle, si.description) AS text
+        FROM SectionItem si
+        JOIN Section s ON si.sectionid = s.sectionid
+        WHERE si.sectionitemid > %s
+        ORDER BY si.sectionitemid
+    """,
+}
+
+# Per-document arrays: file name, array typecode
+DOCUMENT_ARRAYS = (('kinds', 'B'), ('refs', 'I'), ('lengths', 'I'), ('courses', 'I'))
+NO_POSTINGS = (array('I'), array('H'))
+
+def tokenize(text):
+    """Lower-cased words of `text`, without stopwords and single characters"""
+    if not text:
+        return []
+    return [word for word in TOKEN_PATTERN.findall(text.lower()) if len(word) > 1 and word not in STOPWORDS]
+
+def _map_array(path, typecode):
+    """Read-only integer view of an array file, memory-mapped"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return memoryview(array(typecode))  # mmap cannot map an empty file
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mapped).cast(typecode)
+
+class MemorySegment:
+    """Documents added since the index was saved, in growable arrays"""
+
+    def __init__(self, offset=0):
+        self.offset = offset  # number of the segment's first document in the index
+        self.count = 0
+        self.total_length = 0
+        self.kinds, self.refs, self.lengths, self.courses = array('B'), array('I'), array('I'), array('I')
+        self.lexicon = {}  # term -> (document numbers, term counts)
+
+    def add(self, kind, ref, course, tokens):
+        doc = self.count
+        for term, tf in Counter(tokens).items():
+            postings = self.lexicon.get(term)
+            if postings is None:
+                postings = self.lexicon[term] = (array('I'), array('H'))
+            postings[0].append(doc)
+            postings[1].append(min(tf, 0xFFFF))
+        self.kinds.append(kind)
+        self.refs.append(ref)
+        self.lengths.append(len(tokens))
+        self.courses.append(course)
+        self.count += 1
+        self.total_length += len(tokens)
+
+    def postings(self, term):
+        return self.lexicon.get(term) or NO_POSTINGS
+
+class MappedSegment:
+    """A saved generation, memory-mapped"""
+
+    offset = 0
+
+    def __init__(self, directory=None, meta=None):
+        if directory is None:
+            self.count = self.total_length = 0
+            for name, typecode in DOCUMENT_ARRAYS:
+                setattr(self, name, memoryview(array(typecode)))
+            self.lexicon, self.docs, self.tfs = {}, memoryview(array('I')), memoryview(array('H'))
+            return
+        self.count = meta['documents']
+        self.total_length = meta['total_length']
+        for name, typecode in DOCUMENT_ARRAYS:
+            setattr(self, name, _map_array(os.path.join(directory, f'{name}.bin'), typecode))
+        self.docs = _map_array(os.path.join(directory, 'postings.bin'), 'I')
+        self.tfs = _map_array(os.path.join(directory, 'freqs.bin'), 'H')
+        with open(os.path.join(directory, 'lexicon.json')) as f:
+            self.lexicon = json.load(f)  # term -> [start, count] in postings.bin / freqs.bin
+
+    def postings(self, term):
+        entry = self.lexicon.get(term)
+        if entry is None:
+            return NO_POSTINGS
+        start, count = entry
+        return self.docs[start:start + count], self.tfs[start:start + count]
+
+class SearchIndex:
+    """BM25 index over a saved generation plus the documents added since"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.refreshed_at = float('-inf')  # catch up on the first search
+        self._load(self._current_generation())
+
+    def _current_generation(self):
+        try:
+            with open(os.path.join(self.path, 'CURRENT')) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _load(self, generation):
+        if generation is None:
+            meta = {'courses': [], 'marks': {}, 'pending': {}}
+            self.base = MappedSegment()
+        else:
+            directory = os.path.join(self.path, generation)
+            with open(os.path.join(directory, 'meta.json')) as f:
+                meta = json.load(f)
+            if meta['format'] != FORMAT_VERSION or meta['byteorder'] != sys.byteorder:
+                raise RuntimeError(f"Search index {directory} was written by an incompatible version; rebuild it")
+            self.base = MappedSegment(directory, meta)
+        self.generation = generation
+        self.courses = meta['courses']
+        self.course_ids = {code: number for number, code in enumerate(self.courses)}
+        # Highest row id per kind indexed from the database, and ids above it added by the write routes
+        self.marks = {kind: meta['marks'].get(kind, 0) for kind in KINDS}
+        self.pending = {(kind, ref) for kind, refs in meta['pending'].items() for ref in refs}
+        self.delta = MemorySegment(offset=self.base.count)
+
+    @property
+    def documents(self):
+        return self.base.count + self.delta.count
+
+    def add(self, kind, ref, course_code, text):
+        """Index one new row; called by the write routes after their commit"""
+        with self.lock:
+            self._add(kind, ref, course_code, text)
+            if ref > self.marks[kind]:
+                self.pending.add((kind, ref))
+
+    def _add(self, kind, ref, course_code, text):
+        course = self.course_ids.get(course_code)
+        if course is None:
+            course = self.course_ids[course_code] = len(self.courses)
+            self.courses.append(course_code)
+        self.delta.add(KINDS.index(kind), ref, course, tokenize(text))
+
+    def catch_up(self, cursor, chunk_size=1000):
+        """
+        Index the rows with ids above the marks. The cursor must return
+        dictionaries. Returns the number of rows added.
+        """
+        added = 0
+        with self.lock:
+            for kind, query in INDEX_QUERIES.items():
+                cursor.execute(query, (self.marks[kind],))
+                for rows in iter_chunks(cursor, chunk_size):
+                    for row in rows:
+                        if (kind, row['id']) not in self.pending:
+                            self._add(kind, row['id'], row['coursecode'], row['text'])
+                            added += 1
+                    self.marks[kind] = rows[-1]['id']
+            self.pending = {(kind, ref) for kind, ref in self.pending if ref > self.marks[kind]}
+        return added
+
+    def refresh(self, cursor, max_age=REFRESH_SECONDS):
+        """Pick up a newer saved generation and new rows, at most every `max_age` seconds"""
+        if time.monotonic() - self.refreshed_at < max_age:
+            return
+        with self.lock:
+            generation = self._current_generation()
+            if generation != self.generation:
+                try:
+                    self._load(generation)
+                except FileNotFoundError:
+                    # Removed by a save since CURRENT was read; CURRENT names a newer one now
+                    self._load(self._current_generation())
+            self.catch_up(cursor)
+            self.refreshed_at = time.monotonic()
+
+    def save(self):
+        """Write the saved and added documents as a new generation and switch to it"""
+        with self.lock:
+            number = int(self.generation.split('-')[1]) + 1 if self.generation else 1
+            generation = f'gen-{number:06d}'
+            directory = os.path.join(self.path, generation)
+            os.makedirs(directory)
+            base, delta = self.base, self.delta
+
+            lexicon = {}
+            start = 0
+            with open(os.path.join(directory, 'postings.bin'), 'wb') as docs_file, \
+                    open(os.path.join(directory, 'freqs.bin'), 'wb') as tfs_file:
+                for term in sorted(set(base.lexicon) | set(delta.lexicon)):
+                    docs, tfs = base.postings(term)
+                    docs_file.write(docs)
+                    tfs_file.write(tfs)
+                    count = len(docs)
+                    docs, tfs = delta.postings(term)
+                    if docs:
+                        docs_file.write(array('I', [doc + delta.offset for doc in docs]))
+                        tfs_file.write(tfs)
+                        count += len(docs)
+                    lexicon[term] = [start, count]
+                    start += count
+
+            for name, _ in DOCUMENT_ARRAYS:
+                with open(os.path.join(directory, f'{name}.bin'), 'wb') as f:
+                    f.write(getattr(base, name))
+                    f.write(getattr(delta, name))
+            with open(os.path.join(directory, 'lexicon.json'), 'w') as f:
+                json.dump(lexicon, f, separators=(',', ':'))
+            pending = {}
+            for kind, ref in sorted(self.pending):
+                pending.setdefault(kind, []).append(ref)
+            with open(os.path.join(directory, 'meta.json'), 'w') as f:
+                json.dump({
+                    'format': FORMAT_VERSION,
+                    'byteorder': sys.byteorder,
+                    'documents': base.count + delta.count,
+                    'total_length': base.total_length + delta.total_length,
+                    'courses': self.courses,
+                    'marks': self.marks,
+                    'pending': pending,
+                }, f)
+
+            current = os.path.join(self.path, 'CURRENT')
+            with open(current + '.tmp', 'w') as f:
+                f.write(generation)
+            os.replace(current + '.tmp', current)
+            # Keep the generation just replaced: other workers may have read CURRENT
+            # but not opened its files yet. Anything older has had a full save
+            # interval to be reloaded.
+            for name in os.listdir(self.path):
+                if name.startswith('gen-') and name not in (generation, self.generation):
+                    shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+            self._load(generation)
+
+    def search(self, query, kinds, courses=None, limit=20, after=None):
+        """
+        One page of hits ({kind, id, score}, best first) for `query` among the
+        given kinds, optionally only in the course codes `courses`, after the
+        sort key `after`. Same ordering and keys as search.search(). Returns
+        (hits, next_key).
+        """
+        if after is not None:
+            try:
+                after = (float(after[0]), str(after[1]), int(after[2]))
+            except (TypeError, ValueError):
+                raise InvalidPageRequest('Invalid cursor')
+        terms = list(dict.fromkeys(tokenize(query)))
+        kind_codes = {KINDS.index(kind) for kind in kinds if kind in KINDS}
+
+        with self.lock:
+            allowed = None
+            if courses is not None:
+                allowed = {self.course_ids[code] for code in courses if code in self.course_ids}
+            segments = (self.base, self.delta)
+            documents = self.documents
+            if not documents or not terms or not kind_codes:
+                return [], None
+            average_length = (self.base.total_length + self.delta.total_length) / documents or 1
+
+            scores = {}
+            for term in terms:
+                postings = [segment.postings(term) for segment in segments]
+                df = sum(len(docs) for docs, _ in postings)
+                if not df:
+                    continue
+                # BM25: idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / average_length))
+                weight = math.log(1 + (documents - df + 0.5) / (df + 0.5)) * (K1 + 1)
+                fixed, per_token = K1 * (1 - B), K1 * B / average_length
+                for segment, (docs, tfs) in zip(segments, postings):
+                    lengths, offset = segment.lengths, segment.offset
+                    for doc, tf in zip(docs, tfs):
+                        key = doc + offset
+                        scores[key] = scores.get(key, 0.0) + weight * tf / (tf + fixed + per_token * lengths[doc])
+
+            candidates = []
+            for key, score in scores.items():
+                segment = self.base if key < self.base.count else self.delta
+                doc = key - segment.offset
+                kind = segment.kinds[doc]
+                if kind not in kind_codes or (allowed is not None and segment.courses[doc] not in allowed):
+                    continue
+                sort_key = (score, KINDS[kind], segment.refs[doc])
+                if after is None or sort_key < after:
+                    candidates.append(sort_key)
+
+        page = heapq.nlargest(limit + 1, candidates)
+        next_key = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_key = list(page[-1])
+        return [{'kind': kind, 'id': ref, 'score': score} for score, kind, ref in page], next_key
+
+def open_index(path):
+    """The saved index at `path`, or None (with a message) if there is none yet"""
+    if not os.path.exists(os.path.join(path, 'CURRENT')):
+        print(f"No search index at {path}; build one with `python search_index.py --build`")
+        return None
+    return SearchIndex(path)
+
+class IndexLoader:
+    """
+    Opens the saved index at `path` on first use. Until one has been saved,
+    open_index() is retried at most every `retry_seconds`, so workers that
+    started before the first --build or --service run pick it up once it exists.
+    """
+
+    def __init__(self, path, retry_seconds=REFRESH_SECONDS):
+        self.path = path
+        self.retry_seconds = retry_seconds
+        self.lock = threading.Lock()
+        self.index = None
+        self.tried_at = float('-inf')
+
+    def get(self):
+        """The index, or None if there is no path or nothing has been saved there yet"""
+        if self.index is not None or not self.path:
+            return self.index
+        with self.lock:
+            if self.index is None and time.monotonic() - self.tried_at >= self.retry_seconds:
+                self.tried_at = time.monotonic()
+                self.index = open_index(self.path)
+        return self.index
+
+def indexed_search(index, cursor, query, kinds, course_code=None, student_id=None, limit=20, after=None):
+    """search.search() answered from `index` instead of the FULLTEXT indexes"""
+    index.refresh(cursor)
+    courses = None
+    if course_code is not None:
+        courses = {course_code}
+    if student_id is not None:
+        cursor.execute("SELECT coursecode FROM Enrol WHERE userid = %s", (student_id,))
+        enrolled = {row['coursecode'] for row in cursor.fetchall()}
+        courses = enrolled if courses is None else courses & enrolled
+    hits, next_key = index.search(query, kinds, courses, limit, after)
+    return load_results(cursor, hits, query), next_key
+
+def update_index(conn, path, rebuild=False):
+    """Add the rows newer than the saved index at `path` (or all rows) and save a new generation"""
+    if rebuild and os.path.exists(path):
+        shutil.rmtree(path)
+    os.makedirs(path, exist_ok=True)
+    index = SearchIndex(path)
+    # Unbuffered, so a full build streams the tables instead of holding them in memory
+    cursor = conn.cursor(dictionary=True, buffered=False)
+    try:
+        added = index.catch_up(cursor)
+    finally:
+        cursor.close()
+    index.save()
+    return index, added
+
+def run_index_service(get_connection, path, interval_minutes=15):
+    """Save a new generation with the latest rows at regular intervals"""
+    print(f"Starting search index service (interval: {interval_minutes} minutes)")
+    try:
+        while True:
+            conn = get_connection()
+            if conn:
+                try:
+                    start_time = time.time()
+                    index, added = update_index(conn, path)
+                    print(f"Indexed {added} new rows ({index.documents} total) in {time.time() - start_time:.1f}s")
+                except Exception as e:
+                    print(f"Error updating search index: {e}")
+                finally:
+                    conn.close()
+            print(f"Next update in {interval_minutes} minutes...")
+            time.sleep(interval_minutes * 60)
+    except KeyboardInterrupt:
+        print("Search index service stopped by user")
+
+if __name__ == "__main__":
+    import argparse
+    from app import get_db_connection
+
+    parser = argparse.ArgumentParser(description="Build and query the in-process search index")
+    parser.add_argument("--path", default=os.getenv('SEARCH_INDEX_PATH', 'search_index'), help="Index directory")
+    parser.add_argument("--build", action="store_true", help="Index every row from scratch")
+    parser.add_argument("--update", action="store_true", help="Index rows added since the last save")
+    parser.add_argument("--service", action="store_true", help="Keep updating on an interval")
+    parser.add_argument("--interval", type=int, default=15, help="Update interval in minutes (for service mode)")
+    parser.add_argument("--query", help="Search the saved index and print the timing and top hits")
+    parser.add_argument("--limit", type=int, default=10, help="Hits to print for --query")
+
+    args = parser.parse_args()
+
+    if args.service:
+        run_index_service(get_db_connection, args.path, args.interval)
+    elif args.build or args.update:
+        conn = get_db_connection()
+        if not conn:
+            raise SystemExit("Database connection failed")
+        try:
+            start_time = time.time()
+            index, added = update_index(conn, args.path, rebuild=args.build)
+            print(f"Indexed {added} rows ({index.documents} total, {len(index.base.lexicon)} terms) "
+                  f"in {time.time() - start_time:.1f}s")
+        finally:
+            conn.close()
+    elif args.query:
+        index = open_index(args.path)
+        if index is None:
+            raise SystemExit(1)
+        start_time = time.perf_counter()
+        hits, _ = index.search(args.query, KINDS, limit=args.limit)
+        print(f"{len(hits)} hits in {(time.perf_counter() - start_time) * 1000:.1f} ms")
+        for hit in hits:
+            print(f"  {hit['score']:8.3f}  {hit['kind']:<8} {hit['id']}")
+    else:
+        parser.print_help()
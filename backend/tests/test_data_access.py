@@ -0,0 +1,76 @@
+import pytest
+
+import app as api
+from data_access import fetch_children
+
+
+class CountingCursor:
+    """Fake dictionary cursor that answers the forum routes' queries and counts them"""
+
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+
+    def execute(self, query, params=()):
+        self.db.queries.append(query)
+        if 'FROM ResourceVersion' in query:
+            self.rows = []
+        elif 'FROM Student' in query:
+            self.rows = [{'studentid': params[0]}]
+        elif 'FROM Course c' in query:
+            self.rows = [{'coursecode': code, 'coursename': f'Course {code}'} for code in self.db.courses]
+        elif 'FROM DiscussionForum' in query:
+            self.rows = [{'coursecode': code, 'forumid': number, 'forumname': f'{code} forum'}
+                         for number, code in enumerate(params, start=1)]
+        else:
+            raise AssertionError(f"Unexpected query: {query}")
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def close(self):
+        pass
+
+
+class CountingConnection:
+    def __init__(self, courses):
+        self.courses = courses
+        self.queries = []
+
+    def cursor(self, *args, **kwargs):
+        return CountingCursor(self)
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+
+def forum_queries(monkeypatch, course_count):
+    """Number of queries /forums/student/<id> runs for a student in `course_count` courses"""
+    conn = CountingConnection([f'C{number:03d}' for number in range(course_count)])
+    monkeypatch.setattr(api, 'get_db_connection', lambda: conn)
+    response = api.app.test_client().get('/forums/student/7')
+    assert response.status_code == 200
+    assert len(response.get_json()['courses_forums']) == course_count
+    return len(conn.queries)
+
+
+def test_student_forums_query_count_does_not_grow_with_enrolments(monkeypatch):
+    assert forum_queries(monkeypatch, 1) == forum_queries(monkeypatch, 6)
+
+
+@pytest.mark.parametrize('parents, chunk_size, expected_queries', [(1, 1000, 1), (6, 1000, 1), (2500, 1000, 3)])
+def test_fetch_children_queries_once_per_chunk(parents, chunk_size, expected_queries):
+    conn = CountingConnection([])
+    cursor = conn.cursor()
+    ids = [f'C{number:04d}' for number in range(parents)]
+    grouped = fetch_children(cursor, "SELECT coursecode, forumid FROM DiscussionForum WHERE coursecode IN ({ids})",
+                             ids, key='coursecode', chunk_size=chunk_size)
+    assert len(conn.queries) == expected_queries
+    assert all(len(grouped[parent]) == 1 for parent in ids)
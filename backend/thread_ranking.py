@@ -0,0 +1,147 @@
+"""
+"Hot" ranking of forum threads
+
+/threads/<forum_id>?sort=hot lists threads by DiscussionThread.HotScore, read
+straight off the (ForumID, HotScore, ThreadID) index. The score combines a
+thread's engagement (votes plus replies) with its age:
+
+    sign(e) * log10(max(|e|, 1)) + (CreatedAt - HOT_EPOCH) / HOT_DECAY_SECONDS
+    where e = Votes + HOT_REPLY_WEIGHT * ReplyCount
+
+Engagement counts logarithmically, so a thread needs 10x the engagement to
+outrank one posted HOT_DECAY_SECONDS later. Age enters through the creation
+time rather than "now", so a stored score never goes stale: older threads sink
+only because newer ones score higher, and the score changes only when votes or
+replies do. The vote and reply routes recompute it in the same UPDATE that
+changes the counts (HOT_SCORE_SQL).
+
+refresh_thread_rankings() recomputes ReplyCount and HotScore for every thread
+from the source tables. Run it after bulk imports, after changing the
+constants below, or periodically (--service) to correct any drift.
+
+Usage:
+    python thread_ranking.py --refresh
+    python thread_ranking.py --service --interval 60
+"""
+
+import time
+
+from conditional import bump_versions
+
+HOT_EPOCH = '2026-01-01 00:00:00'
+HOT_DECAY_SECONDS = 45000  # 12.5 hours
+HOT_REPLY_WEIGHT = 2
+
+# MySQL applies single-table UPDATE assignments left to right, so placing this
+# after "votes = votes + %s" or "replycount = replycount + 1" uses the new counts
+HOT_SCORE_SQL = f"""
+    SIGN(Votes + {HOT_REPLY_WEIGHT} * ReplyCount)
+        * LOG10(GREATEST(ABS(Votes + {HOT_REPLY_WEIGHT} * ReplyCount), 1))
+        + TIMESTAMPDIFF(SECOND, '{HOT_EPOCH}', CreatedAt) / {HOT_DECAY_SECONDS}
+"""
+
+def refresh_thread_rankings(conn, batch_size=5000):
+    """
+    Recompute ReplyCount and HotScore of every thread, one ThreadID range per
+    transaction. UpdatedAt is left as it was. The version of each forum with a
+    thread that changed is bumped in the same transaction, so cached listings
+    and ETags for it are invalidated. Returns the number of threads whose
+    score changed.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT MIN(ThreadID), MAX(ThreadID) FROM DiscussionThread")
+        low, high = cursor.fetchone()
+        if low is None:
+            return 0
+
+        updated = 0
+        for lo in range(low, high + 1, batch_size):
+            hi = lo + batch_size - 1
+            reply_counts = """
+                DiscussionThread t
+                LEFT JOIN (
+                    SELECT ThreadID, COUNT(*) AS total
+                    FROM Reply
+                    WHERE ThreadID BETWEEN %s AND %s
+                    GROUP BY ThreadID
+                ) r ON t.ThreadID = r.ThreadID
+            """
+            cursor.execute(f"""
+                SELECT DISTINCT t.ForumID FROM {reply_counts}
+                WHERE t.ThreadID BETWEEN %s AND %s AND t.ReplyCount <> COALESCE(r.total, 0)
+            """, (lo, hi, lo, hi))
+            forums = {row[0] for row in cursor.fetchall()}
+            cursor.execute(f"""
+                UPDATE {reply_counts}
+                SET t.ReplyCount = COALESCE(r.total, 0), t.UpdatedAt = t.UpdatedAt
+                WHERE t.ThreadID BETWEEN %s AND %s
+            """, (lo, hi, lo, hi))
+
+            cursor.execute(f"""
+                SELECT DISTINCT ForumID FROM DiscussionThread
+                WHERE ThreadID BETWEEN %s AND %s AND HotScore <> ({HOT_SCORE_SQL})
+            """, (lo, hi))
+            forums.update(row[0] for row in cursor.fetchall())
+            cursor.execute(f"""
+                UPDATE DiscussionThread
+                SET HotScore = {HOT_SCORE_SQL}, UpdatedAt = UpdatedAt
+                WHERE ThreadID BETWEEN %s AND %s
+            """, (lo, hi))
+            updated += cursor.rowcount
+
+            bump_versions(cursor, *(f'forum:{forum_id}' for forum_id in forums))
+            conn.commit()
+        return updated
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def run_refresh_service(get_connection, interval_minutes=60):
+    """Recompute the thread rankings at regular intervals"""
+    print(f"Starting thread ranking refresh service (interval: {interval_minutes} minutes)")
+    try:
+        while True:
+            conn = get_connection()
+            if conn:
+                try:
+                    start_time = time.time()
+                    updated = refresh_thread_rankings(conn)
+                    print(f"Refreshed {updated} thread rankings in {time.time() - start_time:.1f}s")
+                except Exception as e:
+                    print(f"Error refreshing thread rankings: {e}")
+                finally:
+                    conn.close()
+            print(f"Next refresh in {interval_minutes} minutes...")
+            time.sleep(interval_minutes * 60)
+    except KeyboardInterrupt:
+        print("Thread ranking refresh service stopped by user")
+
+if __name__ == "__main__":
+    import argparse
+    from app import get_db_connection
+
+    parser = argparse.ArgumentParser(description="Recompute thread reply counts and hot scores")
+    parser.add_argument("--refresh", action="store_true", help="Recompute every thread once")
+    parser.add_argument("--service", action="store_true", help="Keep recomputing on an interval")
+    parser.add_argument("--interval", type=int, default=60, help="Refresh interval in minutes (for service mode)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Threads per transaction")
+
+    args = parser.parse_args()
+
+    if args.service:
+        run_refresh_service(get_db_connection, args.interval)
+    elif args.refresh:
+        conn = get_db_connection()
+        if not conn:
+            raise SystemExit("Database connection failed")
+        try:
+            start_time = time.time()
+            updated = refresh_thread_rankings(conn, args.batch_size)
+            print(f"Refreshed {updated} thread rankings in {time.time() - start_time:.1f}s")
+        finally:
+            conn.close()
+    else:
+        parser.print_help()
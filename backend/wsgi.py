@@ -0,0 +1,11 @@
+"""
+WSGI entry point for production serving
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+See README_DEPLOYMENT.md for worker sizing.
+"""
+
+from app import app, db_pool
+
+__all__ = ['app', 'db_pool']